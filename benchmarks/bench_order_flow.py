@@ -0,0 +1,72 @@
+"""
+Places orders through OrderService against an in-process SQLite database and measures throughput
+with a commit per order and with the group-commit OrderBatchWriter.
+
+No MySQL is needed: the schema is created from the ORM models in a temporary database file.
+
+Run from the project root:
+    python -m benchmarks.bench_order_flow
+"""
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from src.application.services.option_service import OptionService
+from src.application.services.order_service import OrderService
+from src.application.services.product_service import ProductService
+from src.domain.entities.shop import Shop
+from src.infrastructure.database.connection import async_session_maker, init_database
+from src.infrastructure.database.order_writer import OrderBatchWriter
+from src.infrastructure.database.repositories.option_repository import InMemoryOptionRepository
+from src.infrastructure.database.repositories.product_repository import InMemoryProductRepository
+
+ORDERS = 2000
+CONCURRENCY = 50
+SHOP = Shop(id=1, address="ул. Ленина, 1", admin_id=1, timezone="Europe/Moscow")
+
+
+def order_data(number: int) -> dict:
+    pickup_at = datetime.now(timezone.utc) + timedelta(minutes=30)
+    return {
+        "user_id": 1000 + number % 500,
+        "pickup_at": pickup_at.isoformat(),
+        "cart": [[2, "350мл", None, None, 1], [3, "250мл", None, None, 2]],
+    }
+
+
+async def place_orders(product_service: ProductService, option_service: OptionService, writer=None) -> float:
+    queue = asyncio.Queue()
+    for number in range(ORDERS):
+        queue.put_nowait(number)
+
+    async def client():
+        # Like the session middleware: one session per update
+        while not queue.empty():
+            number = queue.get_nowait()
+            async with async_session_maker() as session:
+                await OrderService(session, product_service, option_service, order_writer=writer).create_order(order_data(number), SHOP)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(CONCURRENCY)))
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    directory = tempfile.mkdtemp()
+    await init_database(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.sqlite3')}")
+    product_service = ProductService(product_repository=InMemoryProductRepository(file_path="data/menu.json"))
+    option_service = OptionService(option_repository=InMemoryOptionRepository(file_path="data/options.json"))
+
+    elapsed = await place_orders(product_service, option_service)
+    print(f"commit per order: {ORDERS / elapsed:8.0f} orders/s")
+
+    writer = OrderBatchWriter(async_session_maker)
+    elapsed = await place_orders(product_service, option_service, writer)
+    await writer.close()
+    print(f"group commit:     {ORDERS / elapsed:8.0f} orders/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
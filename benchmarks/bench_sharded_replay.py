@@ -0,0 +1,94 @@
+"""
+Replays synthetic menu clicks through the user sharding and measures how throughput
+scales with the number of worker processes.
+
+Every worker does the CPU part of handling a click the way a bot worker does: it parses the raw update
+into aiogram models, unpacks the callback data and builds the menu keyboard. Network and DB time are
+left out on purpose, they do not compete for the CPU.
+
+Run from the project root:
+    python -m benchmarks.bench_sharded_replay
+"""
+import asyncio
+import multiprocessing as mp
+import os
+import time
+from typing import Dict, List
+
+from aiogram.types import InlineKeyboardButton, Update
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from src.api.handlers.ordering.menu import ProductCallback, VolumeCallback
+from src.api.sharding import shard_for
+from src.infrastructure.database.repositories.product_repository import InMemoryProductRepository
+
+
+def make_update(update_id: int, user_id: int, product_id: int) -> Dict:
+    user = {"id": user_id, "is_bot": False, "first_name": "Гость"}
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": user,
+            "chat_instance": "1",
+            "data": ProductCallback(id=product_id).pack(),
+            "message": {
+                "message_id": update_id,
+                "date": 1700000000,
+                "chat": {"id": user_id, "type": "private"},
+                "from": user,
+                "text": "Наше текущее меню 🌿\nВыберите напиток:",
+            },
+        },
+    }
+
+
+def handle(raw: Dict, products: Dict) -> int:
+    update = Update.model_validate(raw)
+    callback_data = ProductCallback.unpack(update.callback_query.data)
+    product = products[callback_data.id]
+    builder = InlineKeyboardBuilder()
+    for volume in product.volumes:
+        builder.button(text=f"{volume.volume} - {volume.price}₽",
+                       callback_data=VolumeCallback(product_id=product.id, volume=volume.volume).pack())
+    builder.adjust(1)
+    builder.row(InlineKeyboardButton(text="⬅️ Назад к выбору напитка", callback_data="back_to_products"))
+    markup = builder.as_markup()
+    return len(markup.model_dump_json())
+
+
+def load_products() -> Dict:
+    products = asyncio.run(InMemoryProductRepository(file_path="data/menu.json").get_all())
+    return {product.id: product for product in products}
+
+
+def worker(updates: List[Dict]) -> float:
+    products = load_products()
+    started = time.perf_counter()
+    for raw in updates:
+        handle(raw, products)
+    return time.perf_counter() - started
+
+
+def main(total: int = 40000, users: int = 5000) -> None:
+    product_ids = list(load_products())
+    updates = [make_update(i, 100000 + i % users, product_ids[i % len(product_ids)]) for i in range(total)]
+    ctx = mp.get_context("spawn")
+    print(f"{'workers':<10}{'updates/s':>12}{'speedup':>10}")
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        if workers > (os.cpu_count() or 1):
+            break
+        shards: List[List[Dict]] = [[] for _ in range(workers)]
+        for raw in updates:
+            shards[shard_for(raw["callback_query"]["from"]["id"], workers)].append(raw)
+        with ctx.Pool(workers) as pool:
+            # Workers time only their own loop, so process start-up is not counted
+            elapsed = max(pool.map(worker, shards))
+        throughput = total / elapsed
+        baseline = baseline or throughput
+        print(f"{workers:<10}{throughput:>12.0f}{throughput / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
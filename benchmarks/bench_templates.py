@@ -0,0 +1,68 @@
+"""
+Measures the cost of rendering the /orders listing: the previous string concatenation without
+escaping against the precompiled, escaping templates and the record-boundary paginator.
+
+Run from the project root:
+    python -m benchmarks.bench_templates
+"""
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from src.api.handlers.admin.commands import ACTIVE_ORDERS_HEADER_TEMPLATE, render_active_order
+from src.application.templates import paginate
+from src.application.time_utils import to_shop_time
+from src.domain.entities.order import Order, OrderItem
+
+ORDERS = 200
+
+
+def make_orders() -> list:
+    pickup_time = datetime(2025, 12, 11, 5, 0, tzinfo=timezone.utc)
+    items = [
+        OrderItem("Латте", "350мл", 1, 260, milk_name="Овсяное", syrup_name="Солёная карамель"),
+        OrderItem("Американо", "250мл", 2, 150),
+        OrderItem("Раф <ванильный> & Co", "350мл", 1, 280),  # Needs escaping
+    ]
+    return [
+        Order(user_id=1000 + number, shop_id=1, address="ул. Ленина, 1", quantity=4, pickup_time=pickup_time + timedelta(minutes=number),
+              total_price=840, items=items, id=number)
+        for number in range(ORDERS)
+    ]
+
+
+def concatenate(orders: list) -> list:
+    # The listing as it was built before the template layer, including its fixed-size split
+    response_text = "<b>Активные заказы:</b>\n\n"
+    for order in orders:
+        response_text += (
+            f"<b>Заказ #{order.id}</b>\n"
+            f"От: {order.user_id}\n"
+            f"Адрес: {order.address}\n"
+            f"Время: {to_shop_time(order.pickup_time, order.shop_id):%H:%M}\n"
+            f"Статус: {order.status.value}\n"
+            f"--- Состав ---\n"
+        )
+        for item in order.items:
+            options = "".join(f", {name}" for name in (item.milk_name, item.syrup_name) if name)
+            response_text += f"{item.product_name} ({item.volume}){options} × {item.quantity}\n"
+        response_text += f"<b>Итого: {order.total_price}₽</b>\n"
+        response_text += "-------------------\n\n"
+    return [response_text[i:i + 4096] for i in range(0, len(response_text), 4096)]
+
+
+def templates(orders: list) -> list:
+    return paginate((render_active_order(order) for order in orders), header=ACTIVE_ORDERS_HEADER_TEMPLATE.render())
+
+
+def main(number: int = 200) -> None:
+    orders = make_orders()
+    print(f"{ORDERS} active orders, 3 drinks each")
+    print(f"{'renderer':<16}{'messages':>10}{'µs/listing':>14}{'µs/order':>12}")
+    for name, render in (("concatenation", concatenate), ("templates", templates)):
+        pages = render(orders)
+        seconds = timeit.timeit(lambda: render(orders), number=number) / number
+        print(f"{name:<16}{len(pages):>10}{seconds * 1e6:>14.1f}{seconds / ORDERS * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Measures the per-message cost of pickup time parsing.
+
+Run from the project root:
+    python -m benchmarks.bench_time_parser
+"""
+import timeit
+from datetime import datetime, timezone
+
+from src.application.time_utils import PickupTimeParser
+
+SAMPLES = [
+    "к 08:40",
+    "в 8.40",
+    "полвосьмого",
+    "через полчаса",
+    "через 10 минут",
+    "через пятнадцать минут",
+    "через 2 часа",
+    "к 9",
+    "Спасибо, а можно без сахара?",  # Not a time: the worst case, every pattern is tried
+]
+
+
+def main(number: int = 20000) -> None:
+    clock = lambda: datetime(2025, 12, 11, 5, 0, tzinfo=timezone.utc)
+    parser = PickupTimeParser("Europe/Moscow", clock=clock)
+    print(f"{'input':<32}{'result':<8}{'µs/message':>12}")
+    for text in SAMPLES:
+        result = parser.parse(text)
+        seconds = timeit.timeit(lambda: parser.parse(text), number=number)
+        shown = f"{result:%H:%M}" if result else "-"
+        print(f"{text:<32}{shown:<8}{seconds / number * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
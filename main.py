@@ -1,4 +1,5 @@
 import asyncio
+import json
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -6,45 +7,252 @@ from aiogram import Bot, Dispatcher
 
 from aiogram.enums import ParseMode
 from src.api.routers import main_router
+from src.api.handlers.ordering.menu import send_journaled_order_saved
 from src.application.services.user_service import UserService
-from src.infrastructure.database.connection import get_session
+from src.infrastructure.database.connection import get_session, async_session_maker, init_database
+from src.infrastructure.database.order_journal import OrderJournal
+from src.infrastructure.database.order_writer import OrderBatchWriter
+from src.infrastructure.database.archiver import OrderArchiver
 # No direct import of SQLAlchemyUserRepository needed here anymore
 # No direct import of SQLAlchemyOrderRepository needed here anymore
 from src.application.services.product_service import ProductService
 from src.infrastructure.database.repositories.product_repository import InMemoryProductRepository # Still in-memory
 from src.application.services.option_service import OptionService
 from src.infrastructure.database.repositories.option_repository import InMemoryOptionRepository # Still in-memory
+from src.application.services.slot_service import PickupSlotScheduler, SlotCounters
+from src.application.services.reminder_service import ReminderService
+from src.application.services.board_service import OrderBoard
+from src.application.services.sales_service import SalesService
+from src.application.services.loyalty_service import LoyaltyService
+from src.application.services.stop_list_service import StopListService
+from src.application.services.export_service import OrderExportService
+from src.application.scheduler import TimerQueue
+from src.application.active_orders import ActiveOrderIndex
+from src.application.services.idempotency_service import IdempotencyGuard
+from src.application.recent_baskets import RecentBaskets
+from src.application.loyalty_balances import LoyaltyBalanceCache
+from src.application.stop_list import StopList
+from src.application.menu_search import MenuSearchIndex
+from src.application.circuit_breaker import CircuitBreaker
+from src.application.shops import ShopRegistry
+from src.application.time_utils import configure_shop_timezones, to_shop_time
+from datetime import datetime, timedelta, timezone
 
 from aiogram.fsm.storage.memory import MemoryStorage
+from src.api.middlewares.throttling import ThrottlingMiddleware, Rate, DEFAULT_RATES
+from src.api.middlewares.concurrency import ConcurrencyMiddleware
+from src.api.sharding import Supervisor, shard_for
 
-async def main():
-    """
-    Main function to initialize and start the Telegram bot.
+async def setup_dispatcher(bot: Bot, shard: tuple[int, int] | None = None,
+                           slot_counters: SlotCounters | None = None) -> tuple[Dispatcher, TimerQueue]:
     """
-    # Load environment variables from .env file
-    load_dotenv()
-    TOKEN = os.getenv("TOKEN_BOT")
+    Builds the dispatcher with all services, middlewares and routers.
 
-    if not TOKEN:
-        raise ValueError("TOKEN_BOT environment variable not set.")
+    Args:
+        bot (Bot): The bot instance timers and background jobs send through.
+        shard (tuple[int, int] | None): (index, count) when running as one of several sharded workers.
+            The worker then only rebuilds timers and slot reservations of its own users.
+        slot_counters (SlotCounters | None): Slot counters shared with the other workers; in-process if None.
 
-    # Initialize bot and dispatcher with FSM storage
+    Returns:
+        tuple[Dispatcher, TimerQueue]: The dispatcher and the timer queue that still has to be started.
+    """
+    # Initialize dispatcher with FSM storage
     storage = MemoryStorage()
-    bot = Bot(token=TOKEN, parse_mode=ParseMode.HTML)
     dp = Dispatcher(storage=storage)
+    shard_index, shard_count = shard or (0, 1)
+
+    # Creates the engine for DB_BACKEND (and the schema on SQLite) before any session is opened
+    await init_database()
 
     # --- Dependency Injection Setup with Session Middleware ---
-    # Product and Option services are still in-memory and don't need the session directly
-    product_repository = InMemoryProductRepository(file_path="data/menu.json")
+    # Product and Option services are still in-memory and don't need the session directly.
+    # SHOP_MENUS_FILE holds per-shop changes to the base menu and options; without it every shop sells the same.
+    shop_menus_file = os.getenv("SHOP_MENUS_FILE", "data/shop_menus.json")
+    product_repository = InMemoryProductRepository(file_path="data/menu.json", overrides_path=shop_menus_file)
     product_service = ProductService(product_repository=product_repository)
 
-    option_repository = InMemoryOptionRepository(file_path="data/options.json")
+    option_repository = InMemoryOptionRepository(file_path="data/options.json", overrides_path=shop_menus_file)
     option_service = OptionService(option_repository=option_repository)
+
+    # Inline-mode search ("@bot лат") answers from a prefix index of the base menu built once here
+    menu_search = await MenuSearchIndex.build(product_service, option_service)
     
-    # Parse coffee shops from .env
-    import json
+    # Parse coffee shops from .env; handlers, callbacks and orders refer to them by ID
     coffee_shops_json = os.getenv("COFFEE_SHOPS", "[]")
-    coffee_shops = json.loads(coffee_shops_json)
+    shops = ShopRegistry.from_config(json.loads(coffee_shops_json))
+    configure_shop_timezones(shops)
+
+    # Pickup slot capacity: drinks per interval, optionally overridden per shop with "capacity".
+    # Sharded workers count in the supervisor's shared counters, so together they never overbook a slot.
+    slot_scheduler = PickupSlotScheduler(
+        interval_minutes=int(os.getenv("SLOT_INTERVAL_MINUTES", 10)),
+        default_capacity=int(os.getenv("SLOT_CAPACITY", 6)),
+        capacities={shop.id: shop.capacity for shop in shops if shop.capacity},
+        counters=slot_counters,
+    )
+    from src.application.services.order_service import OrderService
+
+    async def expire_order(order_id: int):
+        # Timer jobs run outside of any update, so they open their own session
+        async for session in get_session():
+            return await OrderService(session, product_service, option_service, slot_scheduler, reminder_service,
+                                      active_orders=active_order_index).cancel_order(order_id)
+
+    async def load_active_orders():
+        # Without an index OrderService reads the active orders from the database
+        async for session in get_session():
+            return await OrderService(session, product_service, option_service).get_active_orders()
+
+    # Pickup reminders and auto-expiry of orders nobody closed
+    timer_queue = TimerQueue()
+    reminder_service = ReminderService(
+        bot=bot,
+        timer_queue=timer_queue,
+        expire_order=expire_order,
+        remind_before=timedelta(minutes=int(os.getenv("REMINDER_BEFORE_MINUTES", 5))),
+        expire_after=timedelta(minutes=int(os.getenv("ORDER_EXPIRE_AFTER_MINUTES", 60))),
+        shops=shops,
+    )
+
+    # In-memory index of active orders, so /orders, /due and the board never query the database.
+    # It only sees the orders this process writes, so sharded workers keep reading from the database.
+    active_order_index = ActiveOrderIndex() if shard_count == 1 else None
+
+    # Optional live board: one pinned message per shop instead of a message per order
+    order_board = None
+    if os.getenv("ORDER_BOARD", "0") == "1":
+        if active_order_index is not None:
+            order_board = OrderBoard(bot, shops, timer_queue, active_order_index,
+                                     min_interval=timedelta(seconds=float(os.getenv("ORDER_BOARD_INTERVAL_SECONDS", 3))))
+        else:
+            print("ORDER_BOARD is ignored with BOT_WORKERS > 1, admins get a message per order.")
+
+    # Degraded mode: while the database is down, confirmed orders are fsynced to a local journal of this worker,
+    # the barista is told at once, and the journal is replayed in batches when the database is back
+    order_journal = order_breaker = None
+    if os.getenv("ORDER_JOURNAL", "0") == "1":
+        order_breaker = CircuitBreaker(
+            "orders",
+            failure_threshold=int(os.getenv("ORDER_DB_FAILURE_THRESHOLD", 3)),
+            reset_timeout=float(os.getenv("ORDER_DB_RESET_SECONDS", 30)),
+        )
+        order_journal = OrderJournal(
+            os.path.join(os.getenv("ORDER_JOURNAL_DIR", "journal"), f"orders-{shard_index}.jsonl"),
+            async_session_maker,
+            batch_size=int(os.getenv("ORDER_JOURNAL_BATCH_SIZE", 100)),
+        )
+    journaled_orders = order_journal.pending() if order_journal else []
+
+    async for session in get_session():
+        # Orders placed before shops had IDs get theirs first, so slots are counted per shop.
+        # Every worker runs it (it is idempotent), so none loads orders that still lack an ID.
+        await OrderService(session, product_service, option_service).assign_shop_ids(shops)
+    # Rebuild reserved capacity and timers from the orders that are still active
+    active_orders = await load_active_orders()
+    own_orders = [order for order in active_orders if shard_for(order.user_id, shard_count) == shard_index]
+    # Journaled orders are not in the database yet, but their pickup slots are taken
+    slot_scheduler.load(own_orders + journaled_orders)
+
+    async def prune_slots():
+        slot_scheduler.prune(datetime.now(timezone.utc))
+
+    def release_closed_order(order):
+        # An admin handled in another worker closed an order of this worker's customer
+        slot_scheduler.release(order.shop_id, to_shop_time(order.pickup_time, order.shop_id), order.quantity)
+        reminder_service.forget(order.id)
+
+    dp["release_closed_order"] = release_closed_order
+
+    # Counters of past slots are never read again; drop them so a long-running process does not grow
+    timer_queue.schedule_every(("prune_slots",), timedelta(minutes=int(os.getenv("SLOT_PRUNE_MINUTES", 30))), prune_slots)
+    reminder_service.load(own_orders)
+    if active_order_index is not None:
+        active_order_index.load(active_orders)
+        active_order_index.start(
+            timer_queue, interval=timedelta(minutes=int(os.getenv("ACTIVE_ORDERS_RECONCILE_MINUTES", 5))), load_active=load_active_orders
+        )
+    if order_board:
+        order_board.start()
+
+    # Stop-list checks on the ordering path are set lookups in memory. The worker that handles a toggle
+    # updates its copy at once; with several workers the others reload it from the database periodically.
+    stop_list = StopList()
+
+    async def load_stop_list():
+        async for session in get_session():
+            return await StopListService(session, stop_list).get_all()
+
+    stop_list.load(await load_stop_list())
+    if shard_count > 1:
+        stop_list.start(timer_queue, interval=timedelta(seconds=int(os.getenv("STOP_LIST_RELOAD_SECONDS", 30))), load_items=load_stop_list)
+
+    # Optional group commit of new orders: inserts arriving within a few ms share one transaction
+    order_writer = None
+    if os.getenv("ORDER_WRITE_BATCHING", "0") == "1":
+        order_writer = OrderBatchWriter(
+            async_session_maker,
+            max_batch=int(os.getenv("ORDER_WRITE_MAX_BATCH", 50)),
+            max_delay=float(os.getenv("ORDER_WRITE_MAX_DELAY_MS", 5)) / 1000,
+        )
+        dp.shutdown.register(order_writer.close)
+
+    if order_journal:
+        async def on_journaled_order_saved(order):
+            reminder_service.track(order)
+            if active_order_index is not None:
+                active_order_index.upsert(order)
+            await send_journaled_order_saved(bot, shops.get(order.shop_id), order)
+
+        order_journal.start(
+            timer_queue, interval=timedelta(seconds=int(os.getenv("ORDER_JOURNAL_REPLAY_SECONDS", 15))),
+            breaker=order_breaker, on_saved=on_journaled_order_saved,
+        )
+
+    # Moves finished orders to the history tables; with several workers only the first one does it
+    if shard_index == 0:
+        archiver = OrderArchiver(
+            async_session_maker,
+            min_age=timedelta(days=int(os.getenv("ARCHIVE_AFTER_DAYS", 30))),
+            chunk_size=int(os.getenv("ARCHIVE_CHUNK_SIZE", 500)),
+        )
+        archiver.start(timer_queue, interval=timedelta(minutes=int(os.getenv("ARCHIVE_INTERVAL_MINUTES", 60))))
+
+        async def refresh_sales_rollups():
+            async for session in get_session():
+                await SalesService(session).refresh(days=int(os.getenv("ROLLUP_REFRESH_DAYS", 2)))
+
+        # Rollups are kept up to date on completion; the periodic refresh corrects drift in recent days
+        async for session in get_session():
+            await SalesService(session).refresh_if_empty()
+        timer_queue.schedule_every(("refresh_sales_rollups",), timedelta(minutes=int(os.getenv("ROLLUP_REFRESH_MINUTES", 60))), refresh_sales_rollups)
+
+    # Order dumps for admins read in short chunked sessions of their own
+    export_service = OrderExportService(async_session_maker)
+
+    # Loyalty balances shown on every cart summary. Orders are completed by admins, whose updates can go to
+    # another worker that would not invalidate this one's cache, so sharded workers read the balance table.
+    loyalty_balance_cache = LoyaltyBalanceCache() if shard_count == 1 else None
+
+    # Remembers confirmed baskets so replayed confirmations are dropped
+    idempotency_guard = IdempotencyGuard()
+
+    # Last basket per user for "repeat order"; a user always lands on the same worker
+    recent_baskets = RecentBaskets(capacity=int(os.getenv("RECENT_BASKETS_CAPACITY", 10000)))
+
+    # Anti-flood protection goes first, so throttled updates never open a DB session.
+    # THROTTLE_RATES overrides rates per handler class, e.g. {"confirm_order": [1, 0.5]} (burst, per second)
+    throttle_rates = dict(DEFAULT_RATES)
+    for handler_class, (burst, per_second) in json.loads(os.getenv("THROTTLE_RATES", "{}")).items():
+        throttle_rates[handler_class] = Rate(burst=burst, per_second=per_second)
+    dp.update.outer_middleware(ThrottlingMiddleware(rates=throttle_rates))
+
+    # Backpressure: bounded in-flight updates, per-user ordering, "busy" answers under overload
+    dp.update.outer_middleware(ConcurrencyMiddleware(
+        max_in_flight=int(os.getenv("MAX_CONCURRENT_UPDATES", 15)),
+        max_waiting=int(os.getenv("MAX_QUEUED_UPDATES", 200)),
+        max_wait=float(os.getenv("MAX_QUEUE_WAIT_SECONDS", 5)),
+    ))
 
     # Outer middleware to inject services per request
     @dp.update.outer_middleware()
@@ -53,12 +261,25 @@ async def main():
             from src.application.services.order_service import OrderService # Import inside middleware
             # Services that use the DB
             data["user_service"] = UserService(session)
-            data["order_service"] = OrderService(session, product_service, option_service)
+            data["sales_service"] = SalesService(session)
+            data["stop_list_service"] = StopListService(session, stop_list)
+            data["loyalty_service"] = LoyaltyService(session, product_service, loyalty_balance_cache)
+            data["order_service"] = OrderService(session, product_service, option_service, slot_scheduler, reminder_service, order_writer,
+                                                 active_orders=active_order_index, loyalty_service=data["loyalty_service"],
+                                                 order_journal=order_journal, order_breaker=order_breaker,
+                                                 forward_closed=data.get("forward_order_closed"))
             
             # Services that don't use the DB directly
             data["product_service"] = product_service
             data["option_service"] = option_service
-            data["coffee_shops"] = coffee_shops
+            data["shops"] = shops
+            data["order_board"] = order_board
+            data["slot_scheduler"] = slot_scheduler
+            data["idempotency_guard"] = idempotency_guard
+            data["stop_list"] = stop_list
+            data["menu_search"] = menu_search
+            data["recent_baskets"] = recent_baskets
+            data["export_service"] = export_service
             
             return await handler(event, data)
 
@@ -67,9 +288,37 @@ async def main():
     # Include routers
     dp.include_router(main_router)
 
+    return dp, timer_queue
+
+async def main():
+    """
+    Main function to initialize and start the Telegram bot.
+    With BOT_WORKERS > 1 it runs as a supervisor that shards updates between worker processes.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+    TOKEN = os.getenv("TOKEN_BOT")
+
+    if not TOKEN:
+        raise ValueError("TOKEN_BOT environment variable not set.")
+
+    workers = int(os.getenv("BOT_WORKERS", 1))
+    if workers > 1:
+        print(f"Bot started with {workers} workers...")
+        await Supervisor(token=TOKEN, workers=workers, setup=setup_dispatcher).run()
+        return
+
+    bot = Bot(token=TOKEN, parse_mode=ParseMode.HTML)
+    dp, timer_queue = await setup_dispatcher(bot)
+
     # Start polling
     print("Bot started...")
-    await dp.start_polling(bot)
+    timer_task = asyncio.create_task(timer_queue.run())
+    try:
+        await dp.start_polling(bot)
+    finally:
+        timer_queue.stop()
+        await timer_task
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,71 @@
+"""Add month-partitioned order history tables and an index for the archiver
+
+Revision ID: 5d2b8e41f6a7
+Revises: c4e1f07a92d3
+Create Date: 2026-10-19 15:32:18.220415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2b8e41f6a7'
+down_revision: Union[str, None] = 'c4e1f07a92d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_orders_status_updated_at', 'orders', ['status', 'updated_at'], unique=False)
+
+    # Partitioned by month of created_at. The archiver splits p_future into monthly partitions as it goes,
+    # so old months can later be dropped or moved cheaply with ALTER TABLE ... DROP PARTITION.
+    op.execute("""
+        CREATE TABLE orders_history (
+            id INTEGER NOT NULL,
+            created_at DATETIME NOT NULL,
+            user_id BIGINT NOT NULL,
+            address VARCHAR(255) NOT NULL,
+            quantity INTEGER NOT NULL,
+            pickup_time DATETIME NOT NULL,
+            total_price INTEGER NOT NULL,
+            status ENUM('PENDING','CONFIRMED','IN_PROGRESS','READY','COMPLETED','CANCELLED') NOT NULL,
+            is_completed BOOL NOT NULL,
+            idempotency_key VARCHAR(32) NULL,
+            updated_at DATETIME NOT NULL,
+            archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, created_at),
+            INDEX ix_orders_history_user_id (user_id),
+            INDEX ix_orders_history_idempotency_key (idempotency_key)
+        )
+        PARTITION BY RANGE COLUMNS(created_at) (
+            PARTITION p_future VALUES LESS THAN (MAXVALUE)
+        )
+    """)
+    op.execute("""
+        CREATE TABLE order_items_history (
+            id INTEGER NOT NULL,
+            order_created_at DATETIME NOT NULL,
+            order_id INTEGER NOT NULL,
+            product_name VARCHAR(100) NOT NULL,
+            volume VARCHAR(50) NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price INTEGER NOT NULL,
+            milk_name VARCHAR(100) NULL,
+            syrup_name VARCHAR(100) NULL,
+            PRIMARY KEY (id, order_created_at),
+            INDEX ix_order_items_history_order_id (order_id)
+        )
+        PARTITION BY RANGE COLUMNS(order_created_at) (
+            PARTITION p_future VALUES LESS THAN (MAXVALUE)
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('order_items_history')
+    op.drop_table('orders_history')
+    op.drop_index('ix_orders_status_updated_at', table_name='orders')
@@ -0,0 +1,77 @@
+"""Store pickup_time as a UTC DATETIME with an (address, pickup_time) index
+
+Revision ID: 9f5c63631c1a
+Revises: 7881b9def5b1
+Create Date: 2026-10-19 10:12:41.118402
+
+"""
+import json
+import os
+from datetime import timedelta, timezone
+from typing import Sequence, Union
+from zoneinfo import ZoneInfo
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f5c63631c1a'
+down_revision: Union[str, None] = '7881b9def5b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _shop_timezones() -> tuple:
+    # Same settings the bot uses: SHOP_TIMEZONE with optional per-shop "timezone" overrides
+    default = os.getenv("SHOP_TIMEZONE", "Europe/Moscow")
+    shops = json.loads(os.getenv("COFFEE_SHOPS", "[]"))
+    return {shop["address"]: shop.get("timezone", default) for shop in shops}, default
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('pickup_at', sa.DateTime(), nullable=True))
+
+    # Backfill: "HH:MM" is shop-local wall time, the date comes from created_at (server-local time).
+    # If the clock time is earlier than the creation time, the order was placed for the next day.
+    timezones, default_tz = _shop_timezones()
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, address, pickup_time, created_at FROM orders")).fetchall()
+    updates = []
+    for order_id, address, pickup_time, created_at in rows:
+        created_local = created_at.astimezone(ZoneInfo(timezones.get(address, default_tz)))
+        hours, minutes = (int(part) for part in pickup_time.split(":"))
+        pickup_local = created_local.replace(hour=hours, minute=minutes, second=0, microsecond=0)
+        if pickup_local < created_local.replace(second=0, microsecond=0):
+            pickup_local += timedelta(days=1)
+        updates.append({"id": order_id, "pickup_at": pickup_local.astimezone(timezone.utc).replace(tzinfo=None)})
+    if updates:
+        bind.execute(sa.text("UPDATE orders SET pickup_at = :pickup_at WHERE id = :id"), updates)
+
+    op.drop_column('orders', 'pickup_time')
+    op.alter_column('orders', 'pickup_at', new_column_name='pickup_time',
+                    existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_orders_address_pickup_time', 'orders', ['address', 'pickup_time'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_address_pickup_time', table_name='orders')
+    op.add_column('orders', sa.Column('pickup_hhmm', sa.String(length=5), nullable=True))
+
+    timezones, default_tz = _shop_timezones()
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, address, pickup_time FROM orders")).fetchall()
+    updates = [
+        {
+            "id": order_id,
+            "pickup_hhmm": pickup_time.replace(tzinfo=timezone.utc)
+                .astimezone(ZoneInfo(timezones.get(address, default_tz))).strftime("%H:%M"),
+        }
+        for order_id, address, pickup_time in rows
+    ]
+    if updates:
+        bind.execute(sa.text("UPDATE orders SET pickup_hhmm = :pickup_hhmm WHERE id = :id"), updates)
+
+    op.drop_column('orders', 'pickup_time')
+    op.alter_column('orders', 'pickup_hhmm', new_column_name='pickup_time',
+                    existing_type=sa.String(length=5), nullable=False)
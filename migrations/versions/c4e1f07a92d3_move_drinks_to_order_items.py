@@ -0,0 +1,67 @@
+"""Move drinks from orders to a normalized order_items table
+
+Revision ID: c4e1f07a92d3
+Revises: 0118b86ca16d
+Create Date: 2026-10-19 14:05:52.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e1f07a92d3'
+down_revision: Union[str, None] = '0118b86ca16d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('order_items',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_name', sa.String(length=100), nullable=False),
+    sa.Column('volume', sa.String(length=50), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('unit_price', sa.Integer(), nullable=False),
+    sa.Column('milk_name', sa.String(length=100), nullable=True),
+    sa.Column('syrup_name', sa.String(length=100), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+    # Backfill: every existing order becomes one item; orders.quantity stays as the drink count
+    op.execute(
+        "INSERT INTO order_items (order_id, product_name, volume, quantity, unit_price, milk_name, syrup_name) "
+        "SELECT id, product_name, volume, quantity, total_price DIV GREATEST(quantity, 1), milk_name, syrup_name "
+        "FROM orders"
+    )
+
+    op.drop_column('orders', 'product_name')
+    op.drop_column('orders', 'volume')
+    op.drop_column('orders', 'milk_name')
+    op.drop_column('orders', 'syrup_name')
+
+
+def downgrade() -> None:
+    op.add_column('orders', sa.Column('syrup_name', sa.String(length=100), nullable=True))
+    op.add_column('orders', sa.Column('milk_name', sa.String(length=100), nullable=True))
+    op.add_column('orders', sa.Column('volume', sa.String(length=50), nullable=True))
+    op.add_column('orders', sa.Column('product_name', sa.String(length=100), nullable=True))
+
+    # Multi-item orders cannot be represented in the old schema; keep their first item
+    op.execute(
+        "UPDATE orders o JOIN ("
+        "  SELECT order_id, MIN(id) AS first_id FROM order_items GROUP BY order_id"
+        ") f ON f.order_id = o.id "
+        "JOIN order_items i ON i.id = f.first_id "
+        "SET o.product_name = i.product_name, o.volume = i.volume, o.milk_name = i.milk_name, o.syrup_name = i.syrup_name"
+    )
+    op.alter_column('orders', 'product_name', existing_type=sa.String(length=100), nullable=False)
+    op.alter_column('orders', 'volume', existing_type=sa.String(length=50), nullable=False)
+
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_table('order_items')
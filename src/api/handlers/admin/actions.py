@@ -1,6 +1,7 @@
 from aiogram import F, Router, Bot, types
 from aiogram.filters.callback_data import CallbackData
 from aiogram.exceptions import TelegramBadRequest
+from src.application.services.board_service import OrderBoard
 from src.application.services.order_service import OrderService
 
 # This needs to be defined here or imported from a central place
@@ -13,11 +14,19 @@ class AdminActionCallback(CallbackData, prefix="admin"):
 admin_router = Router()
 
 @admin_router.callback_query(AdminActionCallback.filter(F.action == "done"))
-async def cq_admin_order_done(callback: types.CallbackQuery, callback_data: AdminActionCallback, bot: Bot, order_service: OrderService):
+async def cq_admin_order_done(callback: types.CallbackQuery, callback_data: AdminActionCallback, bot: Bot, order_service: OrderService,
+                              order_board: OrderBoard | None = None):
     """
     Handles the 'Done' button press from the admin chat.
     Updates the database, edits the admin message, and notifies the user.
+    Buttons on the order board leave the message alone: the board re-renders itself.
     """
+    on_board = order_board is not None and order_board.is_board_message(callback.message.chat.id, callback.message.message_id)
+    if on_board and not order_board.is_active(callback_data.order_id):
+        # The board has not been re-rendered yet since someone else closed the order
+        await callback.answer("Заказ уже выполнен или отменён.")
+        return
+
     # 0. Update order status in the database
     try:
         completed_order = await order_service.complete_order(callback_data.order_id)
@@ -29,19 +38,20 @@ async def cq_admin_order_done(callback: types.CallbackQuery, callback_data: Admi
         return
 
     # 1. Edit the message to show it's completed and remove the button
-    try:
-        await callback.message.edit_text(
-            text=f"{callback.message.text}\n\n<b>✅ Заказ выполнен!</b>",
-            reply_markup=None, # Remove keyboard
-            parse_mode="HTML"
-        )
-    except TelegramBadRequest as e:
-        if "message is not modified" in e.message:
-            await callback.answer("Заказ уже был отмечен как выполненный.")
-            return
-        else:
-            await callback.answer(f"Произошла ошибка: {e.message}", show_alert=True)
-            return
+    if not on_board:
+        try:
+            await callback.message.edit_text(
+                text=f"{callback.message.html_text}\n\n<b>✅ Заказ выполнен!</b>",  # html_text keeps the markup and escaping of the original
+                reply_markup=None, # Remove keyboard
+                parse_mode="HTML"
+            )
+        except TelegramBadRequest as e:
+            if "message is not modified" in e.message:
+                await callback.answer("Заказ уже был отмечен как выполненный.")
+                return
+            else:
+                await callback.answer(f"Произошла ошибка: {e.message}", show_alert=True)
+                return
 
     # 2. Notify the user that their order is ready.
     try:
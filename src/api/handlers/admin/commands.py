@@ -1,51 +1,131 @@
 import asyncio
+import os
+import tempfile
+from datetime import date, timedelta
 from aiogram import Router, types, Bot, F
 from aiogram.filters import Command, CommandObject
+from aiogram.filters.callback_data import CallbackData
 from aiogram.fsm.context import FSMContext
-from aiogram.types import ContentType, InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.types import ContentType, FSInputFile, InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 from src.api.filters import IsAdminFilter
+from src.application.services.board_service import OrderBoard
 from src.application.services.order_service import OrderService
+from src.application.services.sales_service import SalesService
+from src.application.services.export_service import EXPORT_FORMATS, OrderExportService
+from src.application.services.option_service import OptionService
+from src.application.services.product_service import ProductService
+from src.application.services.stop_list_service import StopListService
 from src.application.services.user_service import UserService
+from src.application.shops import ShopRegistry
+from src.application.stop_list import StopList
 from src.application.states import Broadcast
+from src.application.templates import ITEM_TEMPLATE, Markup, Template, item_options, paginate
+from src.application.time_utils import to_shop_time
+from src.application.metrics import metrics, merge_snapshots, render_snapshot
+from src.domain.entities.shop import Shop
+from src.domain.entities.stop_list import OPTION, PRODUCT
+
+class StopListCallback(CallbackData, prefix="stoplist"):
+    shop_id: int
+    item_type: str = ""  # Empty: just open the shop's stop-list
+    item_id: int = 0
 
 admin_commands_router = Router()
 
+MAX_DOCUMENT_SIZE = 50 * 1024 * 1024 # Telegram Bot API upload limit
+
+ACTIVE_ORDERS_HEADER_TEMPLATE = Template("<b>Активные заказы:</b>\n\n")
+ACTIVE_ORDER_TEMPLATE = Template(
+    "<b>Заказ #{order.id}</b>\n"
+    "От: {order.user_id}\n"
+    "Адрес: {order.address}\n"
+    "Время: {pickup:%H:%M}\n"
+    "Статус: {order.status.value}\n"
+    "--- Состав ---\n"
+    "{items}"
+    "<b>Итого: {order.total_price}₽</b>\n"
+    "-------------------\n\n"
+)
+DUE_SHOP_TEMPLATE = Template("<b>{address}</b>\n")
+DUE_TITLE_TEMPLATE = Template("{title}:\n")
+DUE_ORDER_TEMPLATE = Template("#{order.id} {pickup:%H:%M} — {drinks}\n")
+STATS_HEADER_TEMPLATE = Template("📊 <b>Продажи</b>\n\n")
+STATS_SHOP_TEMPLATE = Template(
+    "<b>{address}</b>\n"
+    "Сегодня: {report.today_drinks} шт. на {report.today_revenue}₽\n"
+    "За {report.days} дн.: {report.drinks} шт. на {report.revenue}₽\n"
+)
+STATS_PEAK_HOUR_TEMPLATE = Template("Пиковый час сегодня: {start:02d}:00–{end:02d}:00 ({drinks} шт.)\n")
+STATS_PRODUCT_TEMPLATE = Template("{number}. {product.product_name} — {product.drinks} шт., {product.revenue}₽\n")
+STOP_LIST_TEMPLATE = Template(
+    "🛑 <b>Стоп-лист — {address}</b>\n\n"
+    "Нажмите на позицию, чтобы убрать её из продажи или вернуть.\n✅ — в продаже, ⛔ — закончилось."
+)
+
+def render_active_order(order) -> Markup:
+    items = "".join(ITEM_TEMPLATE.render(item=item, options=item_options(item)) + "\n" for item in order.items)
+    return ACTIVE_ORDER_TEMPLATE.render(order=order, pickup=to_shop_time(order.pickup_time, order.shop_id), items=Markup(items))
+
+def render_shop_report(shop: Shop, report) -> Markup:
+    text = STATS_SHOP_TEMPLATE.render(address=shop.address, report=report)
+    if report.peak_hour:
+        hour, drinks = report.peak_hour
+        text += STATS_PEAK_HOUR_TEMPLATE.render(start=hour, end=(hour + 1) % 24, drinks=drinks)
+    for number, product in enumerate(report.top_products, 1):
+        text += STATS_PRODUCT_TEMPLATE.render(number=number, product=product)
+    return Markup(text + "\n")
+
 @admin_commands_router.message(Command("orders"), IsAdminFilter())
-async def get_active_orders(message: types.Message, order_service: OrderService):
+async def get_active_orders(message: types.Message, order_service: OrderService, shops: ShopRegistry,
+                            order_board: OrderBoard | None = None):
     """
     Handles the /orders command for admins, displaying a list of active orders.
+    With the live board enabled it moves the boards of the admin's shops to the bottom of the chat instead.
     """
+    if order_board:
+        for shop in shops.managed_by(message.from_user.id):
+            await order_board.repost(shop.id)
+        return
+
     active_orders = await order_service.get_active_orders()
 
     if not active_orders:
         await message.answer("Активных заказов нет.")
         return
 
-    response_text = "<b>Активные заказы:</b>\n\n"
-    for order in active_orders:
-        response_text += (
-            f"<b>Заказ #{order.id}</b>\n"
-            f"От: {order.user_id}\n"
-            f"Адрес: {order.address}\n"
-            f"Время: {order.pickup_time}\n"
-            f"Статус: {order.status.value}\n"
-            f"--- Состав ---\n"
-            f"Напиток: {order.product_name} ({order.volume})\n"
-            f"Кол-во: {order.quantity}\n"
-        )
-        if order.milk_name:
-            response_text += f"Молоко: {order.milk_name}\n"
-        if order.syrup_name:
-            response_text += f"Сироп: {order.syrup_name}\n"
-        response_text += f"<b>Итого: {order.total_price}₽</b>\n"
-        response_text += "-------------------\n\n"
-
-    # Telegram messages have a length limit of 4096 characters
-    if len(response_text) > 4096:
-        for i in range(0, len(response_text), 4096):
-            await message.answer(response_text[i:i + 4096])
-    else:
-        await message.answer(response_text)
+    # Split between orders only, so every message keeps its markup balanced
+    records = (render_active_order(order) for order in active_orders)
+    for page in paginate(records, header=ACTIVE_ORDERS_HEADER_TEMPLATE.render()):
+        await message.answer(page)
+
+@admin_commands_router.message(Command("due"), IsAdminFilter())
+async def get_due_orders(message: types.Message, command: CommandObject, order_service: OrderService, shops: ShopRegistry):
+    """
+    Handles the /due [minutes] command for admins: overdue orders and orders due soon in the admin's coffee shops.
+    """
+    try:
+        minutes = int(command.args) if command.args else 15
+    except ValueError:
+        await message.answer("Количество минут должно быть числом. Пример: `/due 30`")
+        return
+
+    response_text = ""
+    for shop in shops.managed_by(message.from_user.id):
+        overdue = await order_service.get_overdue_orders(shop.id)
+        due_soon = await order_service.get_due_soon_orders(shop.id, timedelta(minutes=minutes))
+        if not overdue and not due_soon:
+            continue
+        response_text += DUE_SHOP_TEMPLATE.render(address=shop.address)
+        for title, orders in (("Просрочены", overdue), (f"В ближайшие {minutes} мин", due_soon)):
+            if orders:
+                response_text += DUE_TITLE_TEMPLATE.render(title=title)
+                for order in orders:
+                    drinks = ", ".join(ITEM_TEMPLATE.render(item=item, options="") for item in order.items)
+                    response_text += DUE_ORDER_TEMPLATE.render(order=order, pickup=to_shop_time(order.pickup_time, order.shop_id), drinks=Markup(drinks))
+        response_text += "\n"
+
+    await message.answer(response_text or f"Заказов на ближайшие {minutes} мин нет.")
 
 @admin_commands_router.message(Command("done"), IsAdminFilter())
 async def complete_order_command(message: types.Message, command: CommandObject, order_service: OrderService, bot: Bot):
@@ -85,6 +165,121 @@ async def complete_order_command(message: types.Message, command: CommandObject,
     except Exception as e:
         await message.answer(f"Заказ #{order_id} отмечен как выполненный, но не удалось уведомить пользователя: {e}")
 
+@admin_commands_router.message(Command("stats"), IsAdminFilter())
+async def show_stats(message: types.Message, command: CommandObject, sales_service: SalesService, shops: ShopRegistry):
+    """
+    Handles the /stats [days] command for admins: sales of the admin's coffee shops, read from the rollups only.
+    """
+    try:
+        days = int(command.args) if command.args else 7
+    except ValueError:
+        await message.answer("Количество дней должно быть числом. Пример: `/stats 30`")
+        return
+    days = min(max(days, 1), 366)
+
+    records = [
+        render_shop_report(shop, await sales_service.get_shop_report(shop.id, days))
+        for shop in shops.managed_by(message.from_user.id)
+    ]
+    # Split between shops only, so every message keeps its markup balanced
+    for page in paginate(records, header=STATS_HEADER_TEMPLATE.render()):
+        await message.answer(page)
+
+@admin_commands_router.message(Command("export"), IsAdminFilter())
+async def export_orders(message: types.Message, command: CommandObject, export_service: OrderExportService, shops: ShopRegistry):
+    """
+    Handles the /export <from> <to> [csv|jsonl] command for admins: sends the orders of the admin's coffee shops as a file.
+    """
+    usage = "Пример: <code>/export 2025-12-01 2025-12-31 csv</code> (формат: csv или jsonl)"
+    args = (command.args or "").split()
+    try:
+        first_day, last_day = date.fromisoformat(args[0]), date.fromisoformat(args[1])
+    except (IndexError, ValueError):
+        await message.answer(f"Укажите период в формате ГГГГ-ММ-ДД.\n{usage}")
+        return
+    fmt = args[2].lower() if len(args) > 2 else "csv"
+    if fmt not in EXPORT_FORMATS or first_day > last_day:
+        await message.answer(usage)
+        return
+
+    shop_ids = [shop.id for shop in shops.managed_by(message.from_user.id)]
+    await message.answer("Готовлю выгрузку, это может занять немного времени...")
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, f"orders_{first_day}_{last_day}.{fmt}")
+        exported = await export_service.export(file_path, fmt, shop_ids, first_day, last_day)
+        if not exported:
+            await message.answer("За этот период заказов нет.")
+            return
+        if os.path.getsize(file_path) > MAX_DOCUMENT_SIZE:
+            await message.answer("Файл получился больше 50 МБ, Telegram его не примет. Выберите период покороче.")
+            return
+        await message.answer_document(FSInputFile(file_path), caption=f"Заказов: {exported}")
+
+@admin_commands_router.message(Command("metrics"), IsAdminFilter())
+async def show_metrics(message: types.Message, shared_metrics: dict | None = None):
+    """
+    Handles the /metrics command for admins, showing the bot's metrics.
+    In sharded mode the last published snapshots of all workers are summed up.
+    """
+    if shared_metrics:
+        rendered = render_snapshot(merge_snapshots(shared_metrics.values()))
+    else:
+        rendered = metrics.render()
+    await message.answer(f"<pre>{rendered}</pre>" if rendered else "Метрик пока нет.")
+
+# --- Stop-list Handlers ---
+
+async def build_stop_list(shop: Shop, stop_list: StopList, product_service: ProductService,
+                          option_service: OptionService) -> tuple[str, InlineKeyboardMarkup]:
+    """
+    Builds the stop-list of a shop: one toggle button per drink, milk and syrup.
+    """
+    items = [(PRODUCT, product.id, product.name) for product in await product_service.get_all_products(shop.id)]
+    for category in ("milk", "syrups"):
+        items += [(OPTION, option.id, option.name) for option in await option_service.get_options_by_category(category, shop.id)]
+
+    builder = InlineKeyboardBuilder()
+    for item_type, item_id, name in items:
+        mark = "✅" if stop_list.is_available(shop.id, item_type, item_id) else "⛔"
+        builder.button(text=f"{mark} {name}", callback_data=StopListCallback(shop_id=shop.id, item_type=item_type, item_id=item_id).pack())
+    builder.adjust(2)
+    return STOP_LIST_TEMPLATE.render(address=shop.address), builder.as_markup()
+
+@admin_commands_router.message(Command("stoplist"), IsAdminFilter())
+async def show_stop_list(message: types.Message, shops: ShopRegistry, stop_list: StopList, product_service: ProductService,
+                         option_service: OptionService):
+    """
+    Handles the /stoplist command for admins: toggles what the admin's coffee shops have run out of.
+    """
+    managed = list(shops.managed_by(message.from_user.id))
+    if len(managed) == 1:
+        text, markup = await build_stop_list(managed[0], stop_list, product_service, option_service)
+        await message.answer(text, reply_markup=markup)
+        return
+
+    builder = InlineKeyboardBuilder()
+    for shop in managed:
+        builder.button(text=shop.address, callback_data=StopListCallback(shop_id=shop.id).pack())
+    builder.adjust(1)
+    await message.answer("Выберите кофейню:", reply_markup=builder.as_markup())
+
+@admin_commands_router.callback_query(StopListCallback.filter(), IsAdminFilter())
+async def cq_toggle_stop_list(callback: types.CallbackQuery, callback_data: StopListCallback, shops: ShopRegistry, stop_list: StopList,
+                              stop_list_service: StopListService, product_service: ProductService, option_service: OptionService):
+    """
+    Opens a shop's stop-list or toggles one of its items.
+    """
+    shop = next((shop for shop in shops.managed_by(callback.from_user.id) if shop.id == callback_data.shop_id), None)
+    if not shop:
+        await callback.answer("Эта кофейня вам недоступна.", show_alert=True)
+        return
+    if callback_data.item_type:
+        await stop_list_service.toggle(shop.id, callback_data.item_type, callback_data.item_id)
+
+    text, markup = await build_stop_list(shop, stop_list, product_service, option_service)
+    await callback.message.edit_text(text, reply_markup=markup)
+    await callback.answer()
+
 # --- Broadcast Handlers ---
 
 @admin_commands_router.message(Command("broadcast"), IsAdminFilter())
@@ -0,0 +1,83 @@
+from calendar import timegm
+from datetime import datetime, timedelta
+from aiogram import F, Router, types
+from aiogram.filters.callback_data import CallbackData
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from src.application.services.order_service import OrderHistoryPage, OrderService
+from src.application.templates import ITEM_TEMPLATE, Markup, Template, item_options
+from src.application.time_utils import to_shop_time
+from src.domain.entities.order import Order as DomainOrder, OrderStatus
+
+# --- CallbackData ---
+class HistoryCallback(CallbackData, prefix="history"):
+    newer: bool
+    created: int  # created_at of the cursor order, in seconds since the epoch
+    order_id: int
+
+# --- Router ---
+history_router = Router()
+
+PAGE_SIZE = 5
+EPOCH = datetime(1970, 1, 1)
+
+# Parsed once at import; a page is a few template renders whatever its depth
+PAGE_TEMPLATE = Template("🧾 <b>Мои заказы</b>\n\n{orders}")
+ORDER_TEMPLATE = Template("<b>#{id}</b> · {pickup:%d.%m.%Y %H:%M} · {status}\n{address}\n{drinks}\nИтого: {total}₽\n")
+HISTORY_ITEM_TEMPLATE = Template("• {item}")
+STATUS_TEXT = {
+    OrderStatus.PENDING: "принят",
+    OrderStatus.CONFIRMED: "принят",
+    OrderStatus.IN_PROGRESS: "готовится",
+    OrderStatus.READY: "готов",
+    OrderStatus.COMPLETED: "выполнен",
+    OrderStatus.CANCELLED: "отменён",
+}
+
+# --- Utility Functions ---
+def history_cursor(order: DomainOrder, newer: bool) -> str:
+    # created_at is stored with whole seconds, so the cursor survives the round trip exactly
+    return HistoryCallback(newer=newer, created=timegm(order.created_at.timetuple()), order_id=order.id).pack()
+
+def render_order(order: DomainOrder) -> Markup:
+    drinks = "\n".join(
+        HISTORY_ITEM_TEMPLATE.render(item=ITEM_TEMPLATE.render(item=item, options=item_options(item))) for item in order.items
+    )
+    return ORDER_TEMPLATE.render(
+        id=order.id, pickup=to_shop_time(order.pickup_time, order.shop_id), status=STATUS_TEXT[order.status],
+        address=order.address, drinks=Markup(drinks), total=order.total_price,
+    )
+
+async def show_history_page(callback: types.CallbackQuery, page: OrderHistoryPage):
+    builder = InlineKeyboardBuilder()
+    if page.orders:
+        text = PAGE_TEMPLATE.render(orders=Markup("\n".join(render_order(order) for order in page.orders)))
+        navigation = []
+        if page.has_newer:
+            navigation.append(types.InlineKeyboardButton(text="⬅️ Новее", callback_data=history_cursor(page.orders[0], newer=True)))
+        if page.has_older:
+            navigation.append(types.InlineKeyboardButton(text="Старше ➡️", callback_data=history_cursor(page.orders[-1], newer=False)))
+        if navigation:
+            builder.row(*navigation)
+    else:
+        text = PAGE_TEMPLATE.render(orders="У вас пока нет заказов.")
+    builder.row(types.InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_main_menu"))
+
+    await callback.message.edit_text(text, reply_markup=builder.as_markup(), parse_mode="HTML")
+    await callback.answer()
+
+# --- Handlers ---
+
+@history_router.callback_query(F.data == "my_orders")
+async def cq_my_orders(callback: types.CallbackQuery, order_service: OrderService):
+    page = await order_service.get_order_history(callback.from_user.id, page_size=PAGE_SIZE)
+    await show_history_page(callback, page)
+
+@history_router.callback_query(HistoryCallback.filter())
+async def cq_history_page(callback: types.CallbackQuery, callback_data: HistoryCallback, order_service: OrderService):
+    cursor = (EPOCH + timedelta(seconds=callback_data.created), callback_data.order_id)
+    page = await order_service.get_order_history(callback.from_user.id, cursor, newer=callback_data.newer, page_size=PAGE_SIZE)
+    if not page.orders:
+        # Nothing left in that direction (e.g. the cursor order is gone): start over from the newest
+        page = await order_service.get_order_history(callback.from_user.id, page_size=PAGE_SIZE)
+    await show_history_page(callback, page)
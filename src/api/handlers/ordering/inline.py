@@ -0,0 +1,46 @@
+from html import escape
+from typing import Dict, Tuple
+from aiogram import Bot, Router, types
+
+from src.application.menu_search import MenuEntry, MenuSearchIndex
+from src.domain.entities.stop_list import PRODUCT
+
+# --- Router ---
+inline_router = Router()
+
+CACHE_TIME = 300  # Seconds Telegram may reuse an answer for the same query; the menu rarely changes
+
+# Results are immutable for the lifetime of the catalog, so each one is built once
+_articles: Dict[Tuple[str, int], types.InlineQueryResultArticle] = {}
+
+# --- Utility Functions ---
+def build_article(entry: MenuEntry, bot_username: str) -> types.InlineQueryResultArticle:
+    kind, item = entry
+    article = _articles.get((kind, item.id))
+    if article:
+        return article
+
+    if kind == PRODUCT:
+        description = " · ".join(f"{volume.volume} — {volume.price}₽" for volume in item.volumes)
+    else:
+        description = f"Добавка к напитку: +{item.price}₽"
+    order_button = types.InlineKeyboardButton(text="Заказать ☕", url=f"https://t.me/{bot_username}?start=menu")
+    article = _articles[(kind, item.id)] = types.InlineQueryResultArticle(
+        id=f"{kind}:{item.id}",
+        title=item.name,
+        description=description,
+        input_message_content=types.InputTextMessageContent(
+            message_text=f"☕ <b>{escape(item.name)}</b>\n{escape(description)}", parse_mode="HTML"
+        ),
+        reply_markup=types.InlineKeyboardMarkup(inline_keyboard=[[order_button]]),
+    )
+    return article
+
+# --- Handlers ---
+
+@inline_router.inline_query()
+async def inline_menu_search(inline_query: types.InlineQuery, bot: Bot, menu_search: MenuSearchIndex):
+    # bot.me() is fetched once and then cached by aiogram
+    bot_username = (await bot.me()).username
+    results = [build_article(entry, bot_username) for entry in menu_search.search(inline_query.query)]
+    await inline_query.answer(results, cache_time=CACHE_TIME, is_personal=False)
@@ -1,22 +1,33 @@
 import os
 import json
-from datetime import datetime, timedelta
 from aiogram import F, Router, Bot, types
+from aiogram.exceptions import TelegramAPIError
 from aiogram.filters.callback_data import CallbackData
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from src.application.services.option_service import OptionService
 from src.application.services.product_service import ProductService
-from src.application.services.order_service import OrderService
+from src.application.services.order_service import OrderService, DuplicateOrderError
+from src.application.services.loyalty_service import LoyaltyService
+from src.application.services.idempotency_service import IdempotencyGuard
+from src.application.services.board_service import OrderBoard
+from src.application.services.slot_service import PickupSlotScheduler, SlotUnavailableError
 from src.application.states import Order
-from src.application.time_utils import parse_pickup_time, is_valid_pickup_time
+from src.application.cart import MAX_CART_DRINKS, CartLine, add_to_cart, drinks_count, get_cart
+from src.application.recent_baskets import RecentBaskets
+from src.application.stop_list import StopList
+from src.application.shops import ShopRegistry
+from src.application.templates import ITEM_TEMPLATE, Markup, Template, item_options
+from src.application.time_utils import get_pickup_time_parser, to_shop_time
+from src.domain.entities.order import Order as DomainOrder
+from src.domain.entities.shop import Shop
+from src.domain.entities.stop_list import OPTION, PRODUCT
 from src.api.handlers.admin.actions import AdminActionCallback
 
 # --- CallbackData ---
 class LocationCallback(CallbackData, prefix="location"):
-    admin_id: int
-    address: str
+    shop_id: int
 
 class ProductCallback(CallbackData, prefix="product"):
     id: int
@@ -35,43 +46,141 @@ class QuantityCallback(CallbackData, prefix="quantity"):
 # --- Router ---
 menu_router = Router()
 
-# --- Utility Function ---
-async def build_order_summary(state: FSMContext, product_service: ProductService, option_service: OptionService, order_service: OrderService) -> str:
+SHOP_NOT_FOUND_TEXT = "Кофейня не найдена. Пожалуйста, начните заказ заново."
+OUT_OF_STOCK_TEXT = "К сожалению, это сейчас закончилось. Выберите, пожалуйста, что-нибудь другое."
+
+# The order summary, shown to the customer and sent to the shop admin
+SUMMARY_HEADER_TEMPLATE = Template("<b>Ваш заказ:</b>\n\n")
+SUMMARY_ITEM_TEMPLATE = Template("{number}. <b>{item.product_name}</b> ({item.volume}){options} × {item.quantity} — {item.total_price}₽\n")
+SUMMARY_TIME_TEMPLATE = Template("<b>Время:</b> {time}\n")
+SUMMARY_ADDRESS_TEMPLATE = Template("<b>Адрес:</b> {address}\n\n")
+SUMMARY_TOTAL_TEMPLATE = Template("<b>Итого: {total}₽</b>")
+SUMMARY_POINTS_TEMPLATE = Template("\n🎁 Баллы за заказ: +{points} (на счету: {balance})")
+ADMIN_ORDER_TEMPLATE = Template("Новый заказ от {customer}!\n\n{summary}")
+JOURNALED_ORDER_TEMPLATE = Template(
+    "Новый заказ от {customer}!\n\n{summary}\n\n"
+    "⚠️ База данных недоступна: заказ сохранён в резервный журнал. Готовьте его как обычно — "
+    "номер и кнопка «Готов» придут отдельным сообщением, когда база заработает."
+)
+
+JOURNALED_ORDER_SAVED_TEMPLATE = Template(
+    "💾 Заказ из резервного журнала записан в базу: <b>#{order.id}</b>, к {pickup:%H:%M}\n{drinks}"
+)
+JOURNALED_ORDER_NUMBER_TEMPLATE = Template("Ваш заказ к {pickup:%H:%M} сохранён под номером <b>#{order.id}</b>.")
+WORKING_HOURS_HEADER_TEMPLATE = Template("⏰ <b>Режим работы</b>\n\n")
+WORKING_HOURS_TEMPLATE = Template("{shop.address}: {shop.hours}\n")
+LOYALTY_HEADER_TEMPLATE = Template(
+    "❤️ <b>Программа лояльности</b>\n\nНа вашем счету: <b>{balance}</b> баллов.\n\n"
+    "Баллы за каждый напиток начисляются, когда заказ готов:\n"
+)
+LOYALTY_PRODUCT_TEMPLATE = Template("• {product.name} — {product.loyalty_points}\n")
+LOYALTY_HISTORY_HEADER_TEMPLATE = Template("\n<b>Последние начисления:</b>\n")
+LOYALTY_ENTRY_TEMPLATE = Template("{entry.created_at:%d.%m} {entry.points:+d}{order}\n")
+# --- Utility Functions ---
+async def build_order_summary(state: FSMContext, order_service: OrderService, shops: ShopRegistry) -> Markup:
     user_data = await state.get_data()
-    product = await product_service.get_product_by_id(user_data.get("product_id"))
-    milk = await option_service.get_option_by_id(user_data.get("milk_id")) if user_data.get("milk_id") else None
-    syrup = await option_service.get_option_by_id(user_data.get("syrup_id")) if user_data.get("syrup_id") else None
-    total_price = await order_service.calculate_total(user_data)
+    shop = shops.get(user_data.get("shop_id"))
+    items = await order_service.build_items(get_cart(user_data), user_data.get("shop_id"))
     
-    summary = f"<b>Ваш заказ:</b>\n\n"
-    if product:
-        summary += f"<b>Напиток:</b> {product.name}\n"
-    summary += f"<b>Объем:</b> {user_data.get('volume')}\n"
-    if milk:
-        summary += f"<b>Молоко:</b> {milk.name}\n"
-    if syrup:
-        summary += f"<b>Сироп:</b> {syrup.name}\n"
-    summary += f"<b>Количество:</b> {user_data.get('quantity', 1)} шт.\n"
+    summary = SUMMARY_HEADER_TEMPLATE.render()
+    for number, item in enumerate(items, 1):
+        summary += SUMMARY_ITEM_TEMPLATE.render(number=number, item=item, options=item_options(item))
+    summary += "\n"
     if user_data.get('pickup_time'):
-        summary += f"<b>Время:</b> {user_data.get('pickup_time')}\n"
-    if user_data.get('address'):
-        summary += f"<b>Адрес:</b> {user_data.get('address')}\n\n"
+        summary += SUMMARY_TIME_TEMPLATE.render(time=user_data.get('pickup_time'))
+    if shop:
+        summary += SUMMARY_ADDRESS_TEMPLATE.render(address=shop.address)
     
-    summary += f"<b>Итого: {total_price}₽</b>"
+    summary += SUMMARY_TOTAL_TEMPLATE.render(total=sum(item.total_price for item in items))
+
+    # The balance comes from the cache or the balance table, never from summing the ledger
+    loyalty_service = order_service.loyalty_service
+    try:
+        points, balance = await loyalty_service.points_for(items, user_data.get("shop_id")), await loyalty_service.get_balance(state.key.user_id)
+    except Exception as e:
+        # Points are a bonus line: a database outage must not keep the customer from ordering
+        print(f"Could not load the loyalty balance of user {state.key.user_id}: {e}")
+        points = balance = 0
+    if points or balance:
+        summary += SUMMARY_POINTS_TEMPLATE.render(points=points, balance=balance)
+    
+    return Markup(summary)
+
+async def send_journaled_order_saved(bot: Bot, shop: Shop | None, order: DomainOrder):
+    """
+    Once a journaled order has been written to the database, tells the customer its number
+    and gives the shop admin the number and the "Done" button.
+    """
+    pickup = to_shop_time(order.pickup_time, order.shop_id)
+    try:
+        await bot.send_message(chat_id=order.user_id, text=JOURNALED_ORDER_NUMBER_TEMPLATE.render(order=order, pickup=pickup), parse_mode="HTML")
+    except TelegramAPIError as e:
+        # The customer may have blocked the bot; the admin still has to get the order
+        print(f"Could not send the number of journaled order #{order.id} to user {order.user_id}: {e}")
+    if not shop or not shop.admin_id:
+        return
+    drinks = "\n".join(ITEM_TEMPLATE.render(item=item, options=item_options(item)) for item in order.items)
+    builder = InlineKeyboardBuilder()
+    builder.button(text="✅ Готов", callback_data=AdminActionCallback(action="done", user_id=order.user_id, order_id=order.id).pack())
+    await bot.send_message(
+        chat_id=shop.admin_id,
+        text=JOURNALED_ORDER_SAVED_TEMPLATE.render(order=order, pickup=pickup, drinks=Markup(drinks)),
+        reply_markup=builder.as_markup(),
+        parse_mode="HTML"
+    )
+
+async def show_products(callback: types.CallbackQuery, state: FSMContext, product_service: ProductService, stop_list: StopList,
+                        notice: str | None = None):
+    await state.set_state(Order.choosing_product)
+    user_data = await state.get_data()
+    shop_id = user_data.get("shop_id")
+
+    products = await product_service.get_all_products(shop_id)
+    builder = InlineKeyboardBuilder()
+    text = "Наше текущее меню 🌿\nВыберите напиток:"
+    for product in products:
+        if not stop_list.is_available(shop_id, PRODUCT, product.id):
+            continue
+        builder.button(text=product.name, callback_data=ProductCallback(id=product.id).pack())
+    builder.adjust(2)
+    if get_cart(user_data):
+        builder.row(types.InlineKeyboardButton(text="⬅️ Назад к корзине", callback_data="show_cart"))
+    else:
+        builder.row(types.InlineKeyboardButton(text="⬅️ Назад к выбору кофейни", callback_data="place_order"))
     
-    return summary
+    await callback.message.edit_text(text, reply_markup=builder.as_markup())
+    await callback.answer(notice, show_alert=notice is not None)
+
+async def show_cart(callback: types.CallbackQuery, state: FSMContext, order_service: OrderService, shops: ShopRegistry,
+                    notice: str | None = None):
+    await state.set_state(Order.reviewing_cart)
+    summary = await build_order_summary(state, order_service, shops)
+
+    builder = InlineKeyboardBuilder()
+    builder.row(types.InlineKeyboardButton(text="➕ Добавить ещё напиток", callback_data="add_more_drinks"))
+    builder.row(types.InlineKeyboardButton(text="🕒 Выбрать время", callback_data="checkout"))
+    builder.row(types.InlineKeyboardButton(text="🗑 Очистить корзину", callback_data="clear_cart"))
+
+    await callback.message.edit_text(summary, reply_markup=builder.as_markup(), parse_mode="HTML")
+    await callback.answer(notice, show_alert=notice is not None)
+
+def pickup_time_prompt(shop: Shop) -> str:
+    min_ready_time = get_pickup_time_parser(shop.timezone).earliest()
+    return (f"На какое время приготовить ваш заказ?\nНапишите ответ сообщением, например: <b>к 08:40</b>, <b>полвосьмого</b> или <b>через 10 минут</b>."
+            f"\nНе ранее {min_ready_time:%H:%M}")
 
 # --- Handlers ---
 
 @menu_router.callback_query(F.data == "place_order")
-async def cq_place_order(callback: types.CallbackQuery, state: FSMContext, coffee_shops: list):
+async def cq_place_order(callback: types.CallbackQuery, state: FSMContext, shops: ShopRegistry):
     await state.clear()
     await state.set_state(Order.choosing_location)
     builder = InlineKeyboardBuilder()
     text = "Выберите кофейню:"
 
-    for shop in coffee_shops:
-        builder.button(text=shop["address"], callback_data=LocationCallback(admin_id=shop["admin_id"], address=shop["address"]).pack())
+    for shop in shops:
+        # Only the ID goes into the callback: addresses would not fit into Telegram's 64 bytes
+        builder.button(text=shop.address, callback_data=LocationCallback(shop_id=shop.id).pack())
     builder.adjust(1)
     builder.row(types.InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_main_menu"))
     
@@ -79,35 +188,29 @@ async def cq_place_order(callback: types.CallbackQuery, state: FSMContext, coffe
     await callback.answer()
 
 @menu_router.callback_query(Order.choosing_location, LocationCallback.filter())
-async def cq_select_location(callback: types.CallbackQuery, callback_data: LocationCallback, state: FSMContext, product_service: ProductService):
-    await state.update_data(admin_id=callback_data.admin_id, address=callback_data.address)
-    await state.set_state(Order.choosing_product)
-    
-    products = await product_service.get_all_products()
-    builder = InlineKeyboardBuilder()
-    text = "Наше текущее меню 🌿\nВыберите напиток:"
-    for product in products:
-        builder.button(text=product.name, callback_data=ProductCallback(id=product.id).pack())
-    builder.adjust(2)
-    builder.row(types.InlineKeyboardButton(text="⬅️ Назад к выбору кофейни", callback_data="place_order"))
-    
-    await callback.message.edit_text(text, reply_markup=builder.as_markup())
-    await callback.answer()
+async def cq_select_location(callback: types.CallbackQuery, callback_data: LocationCallback, state: FSMContext, product_service: ProductService,
+                             stop_list: StopList):
+    await state.update_data(shop_id=callback_data.shop_id)
+    await show_products(callback, state, product_service, stop_list)
 
 @menu_router.callback_query(Order.choosing_product, ProductCallback.filter())
-async def cq_select_product(callback: types.CallbackQuery, callback_data: ProductCallback, state: FSMContext, product_service: ProductService):
+async def cq_select_product(callback: types.CallbackQuery, callback_data: ProductCallback, state: FSMContext, product_service: ProductService,
+                            stop_list: StopList):
+    user_data = await state.get_data()
+    if not stop_list.is_available(user_data.get("shop_id"), PRODUCT, callback_data.id):
+        # The keyboard was built before the shop ran out
+        await callback.answer(OUT_OF_STOCK_TEXT, show_alert=True)
+        return
     await state.set_state(Order.choosing_volume)
     # Reset subsequent choices
     await state.update_data(
         product_id=callback_data.id,
         volume=None,
         milk_id=None,
-        syrup_id=None,
-        quantity=None,
-        pickup_time=None
+        syrup_id=None
     )
 
-    product = await product_service.get_product_by_id(callback_data.id)
+    product = await product_service.get_product_by_id(callback_data.id, user_data.get("shop_id"))
     if not product:
         await callback.answer("Напиток не найден!", show_alert=True)
         return
@@ -127,61 +230,67 @@ async def cq_select_product(callback: types.CallbackQuery, callback_data: Produc
     await callback.answer()
 
 @menu_router.callback_query(Order.choosing_volume, VolumeCallback.filter())
-async def cq_select_volume(callback: types.CallbackQuery, callback_data: VolumeCallback, state: FSMContext, option_service: OptionService):
+async def cq_select_volume(callback: types.CallbackQuery, callback_data: VolumeCallback, state: FSMContext, option_service: OptionService,
+                           stop_list: StopList):
     await state.set_state(Order.choosing_milk)
     await state.update_data(
         volume=callback_data.volume,
         milk_id=None,
-        syrup_id=None,
-        quantity=None,
-        pickup_time=None
+        syrup_id=None
     )
+    user_data = await state.get_data()
 
-    milk_options = await option_service.get_options_by_category("milk")
+    milk_options = await option_service.get_options_by_category("milk", user_data.get("shop_id"))
     builder = InlineKeyboardBuilder()
     text = "🥛 Выберите молоко:"
 
     for option in milk_options:
+        if not stop_list.is_available(user_data.get("shop_id"), OPTION, option.id):
+            continue
         builder.button(text=option.name, callback_data=OptionCallback(category="milk", item_id=option.id).pack())
     builder.adjust(2)
     builder.row(types.InlineKeyboardButton(text="Пропустить ➡️", callback_data=OptionCallback(category="milk", item_id=0).pack()))
-    user_data = await state.get_data()
     builder.row(types.InlineKeyboardButton(text="⬅️ Назад к выбору напитка", callback_data=ProductCallback(id=user_data.get("product_id")).pack()))
 
     await callback.message.edit_text(text, reply_markup=builder.as_markup())
     await callback.answer()
 
 @menu_router.callback_query(Order.choosing_milk, OptionCallback.filter(F.category == "milk"))
-async def cq_select_milk(callback: types.CallbackQuery, callback_data: OptionCallback, state: FSMContext, option_service: OptionService):
+async def cq_select_milk(callback: types.CallbackQuery, callback_data: OptionCallback, state: FSMContext, option_service: OptionService,
+                         stop_list: StopList):
+    user_data = await state.get_data()
+    shop_id = user_data.get("shop_id")
+    if callback_data.item_id and not stop_list.is_available(shop_id, OPTION, callback_data.item_id):
+        await callback.answer(OUT_OF_STOCK_TEXT, show_alert=True)
+        return
     await state.set_state(Order.choosing_syrup)
     await state.update_data(
         milk_id=callback_data.item_id if callback_data.item_id != 0 else None,
-        syrup_id=None,
-        quantity=None,
-        pickup_time=None
+        syrup_id=None
     )
 
-    syrup_options = await option_service.get_options_by_category("syrups")
+    syrup_options = await option_service.get_options_by_category("syrups", shop_id)
     builder = InlineKeyboardBuilder()
     text = "🍯 Выберите сироп:"
 
     for option in syrup_options:
+        if not stop_list.is_available(shop_id, OPTION, option.id):
+            continue
         builder.button(text=option.name, callback_data=OptionCallback(category="syrup", item_id=option.id).pack())
     builder.adjust(2)
     builder.row(types.InlineKeyboardButton(text="Пропустить ➡️", callback_data=OptionCallback(category="syrup", item_id=0).pack()))
-    user_data = await state.get_data()
     builder.row(types.InlineKeyboardButton(text="⬅️ Назад к выбору молока", callback_data=VolumeCallback(product_id=user_data.get("product_id"), volume=user_data.get("volume")).pack()))
 
     await callback.message.edit_text(text, reply_markup=builder.as_markup())
     await callback.answer()
 
 @menu_router.callback_query(Order.choosing_syrup, OptionCallback.filter(F.category == "syrup"))
-async def cq_select_syrup(callback: types.CallbackQuery, callback_data: OptionCallback, state: FSMContext):
-    await state.update_data(
-        syrup_id=callback_data.item_id if callback_data.item_id != 0 else None,
-        quantity=None,
-        pickup_time=None
-    )
+async def cq_select_syrup(callback: types.CallbackQuery, callback_data: OptionCallback, state: FSMContext, stop_list: StopList):
+    user_data = await state.get_data()
+    if callback_data.item_id and not stop_list.is_available(user_data.get("shop_id"), OPTION, callback_data.item_id):
+        await callback.answer(OUT_OF_STOCK_TEXT, show_alert=True)
+        return
+    await state.update_data(syrup_id=callback_data.item_id if callback_data.item_id != 0 else None)
     await state.set_state(Order.choosing_quantity)
 
     builder = InlineKeyboardBuilder()
@@ -196,68 +305,237 @@ async def cq_select_syrup(callback: types.CallbackQuery, callback_data: OptionCa
     await callback.answer()
 
 @menu_router.callback_query(Order.choosing_quantity, QuantityCallback.filter())
-async def cq_select_quantity(callback: types.CallbackQuery, callback_data: QuantityCallback, state: FSMContext):
-    await state.update_data(quantity=callback_data.count, pickup_time=None)
+async def cq_select_quantity(callback: types.CallbackQuery, callback_data: QuantityCallback, state: FSMContext, order_service: OrderService, shops: ShopRegistry):
+    user_data = await state.get_data()
+    cart = get_cart(user_data)
+    if drinks_count(cart) + callback_data.count > MAX_CART_DRINKS:
+        await callback.answer(f"В одном заказе можно оформить не больше {MAX_CART_DRINKS} напитков.", show_alert=True)
+        return
+
+    line = CartLine(user_data.get("product_id"), user_data.get("volume"), user_data.get("milk_id"), user_data.get("syrup_id"), callback_data.count)
+    await state.update_data(
+        cart=add_to_cart(cart, line),
+        product_id=None,
+        volume=None,
+        milk_id=None,
+        syrup_id=None
+    )
+    await show_cart(callback, state, order_service, shops)
+
+@menu_router.callback_query(F.data == "show_cart")
+async def cq_show_cart(callback: types.CallbackQuery, state: FSMContext, order_service: OrderService, shops: ShopRegistry):
+    user_data = await state.get_data()
+    if not get_cart(user_data):
+        await callback.answer("Корзина пуста.", show_alert=True)
+        return
+    await state.update_data(pickup_time=None, pickup_at=None)
+    await show_cart(callback, state, order_service, shops)
+
+@menu_router.callback_query(Order.reviewing_cart, F.data == "add_more_drinks")
+async def cq_add_more_drinks(callback: types.CallbackQuery, state: FSMContext, product_service: ProductService, stop_list: StopList):
+    await show_products(callback, state, product_service, stop_list)
+
+@menu_router.callback_query(Order.reviewing_cart, F.data == "clear_cart")
+async def cq_clear_cart(callback: types.CallbackQuery, state: FSMContext, product_service: ProductService, stop_list: StopList):
+    await state.update_data(cart=[])
+    await show_products(callback, state, product_service, stop_list)
+
+@menu_router.callback_query(Order.reviewing_cart, F.data == "checkout")
+async def cq_checkout(callback: types.CallbackQuery, state: FSMContext, shops: ShopRegistry):
+    user_data = await state.get_data()
+    shop = shops.get(user_data.get("shop_id"))
+    if not shop:
+        await callback.answer(SHOP_NOT_FOUND_TEXT, show_alert=True)
+        return
+    await state.update_data(pickup_time=None, pickup_at=None)
     await state.set_state(Order.entering_pickup_time)
-    order_time = datetime.now()
-    min_ready_time = order_time + timedelta(minutes=10)
+    await callback.message.edit_text(pickup_time_prompt(shop), parse_mode="HTML")
+    await callback.answer()
+
+@menu_router.callback_query(F.data == "repeat_order")
+async def cq_repeat_order(callback: types.CallbackQuery, state: FSMContext, order_service: OrderService, shops: ShopRegistry,
+                          recent_baskets: RecentBaskets, stop_list: StopList):
+    """
+    Puts the user's last order back into the cart, priced by the current menu, and goes straight to the pickup time.
+    """
+    user_id = callback.from_user.id
+    basket = recent_baskets.get(user_id)
+    if basket is not None:
+        shop_id, saved_cart = basket.shop_id, basket.cart
+        cart = await order_service.available_lines(saved_cart, shop_id)
+    else:
+        last_order = await order_service.get_last_order(user_id)
+        if not last_order:
+            await callback.answer("У вас ещё нет заказов. Самое время сделать первый ☕", show_alert=True)
+            return
+        shop_id, saved_cart = last_order.shop_id, last_order.items
+        cart = await order_service.cart_from_order(last_order)
+
+    shop = shops.get(shop_id)
+    if not shop:
+        await callback.answer("Кофейня вашего прошлого заказа больше не принимает заказы. Пожалуйста, сделайте новый заказ.", show_alert=True)
+        return
+    stopped = stop_list.unavailable_lines(shop.id, cart)
+    cart = [line for line in cart if line not in stopped]
+    if not cart:
+        await callback.answer("Напитков из вашего прошлого заказа сейчас нет в меню. Пожалуйста, сделайте новый заказ.", show_alert=True)
+        return
+    if drinks_count(cart) > MAX_CART_DRINKS:
+        await callback.answer(f"В одном заказе можно оформить не больше {MAX_CART_DRINKS} напитков.", show_alert=True)
+        return
 
-    text = (f"На какое время приготовить ваш напиток?\nНапишите ответ сообщением, например: <b>к 08:40</b> или <b>через 10 минут</b>."
-            f"\nне ранее {min_ready_time}")
-    await callback.message.edit_text(text, parse_mode="HTML")
+    await state.clear()
+    await state.update_data(shop_id=shop.id, cart=cart)
+    await state.set_state(Order.entering_pickup_time)
+    summary = await build_order_summary(state, order_service, shops)
+    # Drinks, not lines: identical drinks of the saved order are merged into one cart line
+    if drinks_count(cart) < sum(item.quantity for item in saved_cart):
+        summary += "\n\nНекоторых напитков из прошлого заказа сейчас нет в меню — мы их убрали."
+
+    builder = InlineKeyboardBuilder()
+    builder.row(types.InlineKeyboardButton(text="⬅️ Изменить заказ", callback_data="show_cart"))
+    await callback.message.edit_text(f"{summary}\n\n{pickup_time_prompt(shop)}", reply_markup=builder.as_markup(), parse_mode="HTML")
     await callback.answer()
 
 @menu_router.message(Order.entering_pickup_time)
-async def handle_pickup_time(message: types.Message, state: FSMContext, product_service: ProductService, option_service: OptionService, order_service: OrderService):
-    pickup_time = parse_pickup_time(message.text)
-    if not pickup_time or not is_valid_pickup_time(pickup_time):
-        await message.answer("Это слишком быстро или неверный формат! Мы не успеем.\nМинимальное время ожидания - 10 минут. Пожалуйста, выберите другое время (например, 'через 20 минут').", parse_mode="HTML")
+async def handle_pickup_time(message: types.Message, state: FSMContext, order_service: OrderService, slot_scheduler: PickupSlotScheduler,
+                             shops: ShopRegistry):
+    user_data = await state.get_data()
+    shop, quantity = shops.get(user_data.get("shop_id")), drinks_count(get_cart(user_data))
+    if not shop:
+        await state.clear()
+        await message.answer(SHOP_NOT_FOUND_TEXT)
         return
+    parser = get_pickup_time_parser(shop.timezone)
 
-    await state.update_data(pickup_time=pickup_time.strftime("%H:%M"))
+    pickup_time = parser.parse(message.text)
+    if not pickup_time:
+        await message.answer("Не получилось понять время 🤔\nНапишите, например: <b>к 08:40</b>, <b>в 8.40</b>, <b>полвосьмого</b> или <b>через 20 минут</b>.", parse_mode="HTML")
+        return
+    if not parser.is_valid(pickup_time):
+        await message.answer(f"Это слишком быстро! Мы не успеем.\nМинимальное время ожидания - 10 минут, ближайшее время — <b>{parser.earliest():%H:%M}</b>. Пожалуйста, выберите другое время (например, 'через 20 минут').", parse_mode="HTML")
+        return
+
+    if not slot_scheduler.is_available(shop.id, pickup_time, quantity):
+        min_ready_time = parser.earliest()
+        suggestion = slot_scheduler.suggest_slot(shop.id, pickup_time, quantity, not_before=min_ready_time)
+        text = f"К {pickup_time:%H:%M} у нас уже много заказов, и мы не успеем приготовить ваш заказ вовремя."
+        if suggestion:
+            text += f"\nБлижайшее свободное время — <b>{suggestion:%H:%M}</b>. Напишите его или выберите другое."
+        else:
+            text += "\nПожалуйста, выберите другое время."
+        await message.answer(text, parse_mode="HTML")
+        return
+
+    # A fresh token per basket lets the confirmation step recognise replays of its own callback
+    await state.update_data(pickup_time=pickup_time.strftime("%H:%M"), pickup_at=pickup_time.isoformat(),
+                            basket_token=IdempotencyGuard.new_token())
     await state.set_state(Order.confirming_order)
     
-    summary = await build_order_summary(state, product_service, option_service, order_service)
+    summary = await build_order_summary(state, order_service, shops)
     
     builder = InlineKeyboardBuilder()
     builder.row(types.InlineKeyboardButton(text="✅ Подтвердить заказ", callback_data="confirm_order"))
-    user_data = await state.get_data()
-    builder.row(types.InlineKeyboardButton(text="⬅️ Изменить количество", callback_data=QuantityCallback(count=user_data.get("quantity", 1)).pack()))
+    builder.row(types.InlineKeyboardButton(text="⬅️ Изменить заказ", callback_data="show_cart"))
     
     await message.answer(summary, reply_markup=builder.as_markup(), parse_mode="HTML")
 
 @menu_router.callback_query(Order.confirming_order, F.data == "confirm_order")
-async def cq_confirm_order(callback: types.CallbackQuery, state: FSMContext, bot: Bot, product_service: ProductService, option_service: OptionService, order_service: OrderService):
+async def cq_confirm_order(callback: types.CallbackQuery, state: FSMContext, bot: Bot, order_service: OrderService, product_service: ProductService,
+                           idempotency_guard: IdempotencyGuard, shops: ShopRegistry, stop_list: StopList,
+                           order_board: OrderBoard | None = None, recent_baskets: RecentBaskets | None = None):
     user_data = await state.get_data()
+    shop = shops.get(user_data.get("shop_id"))
+    if not shop:
+        await callback.answer(SHOP_NOT_FOUND_TEXT, show_alert=True)
+        return
+
+    # The shop may have run out of something since the drinks were picked
+    cart = get_cart(user_data)
+    stopped = stop_list.unavailable_lines(shop.id, cart)
+    if stopped:
+        names = "; ".join(
+            f"{item.product_name} ({item.volume})" + "".join(f", {name}" for name in (item.milk_name, item.syrup_name) if name)
+            for item in await order_service.build_items(stopped, shop.id)
+        )
+        notice = f"К сожалению, сейчас нельзя приготовить: {names}. Мы убрали это из корзины."
+        if len(notice) > 200:  # Telegram's limit for alerts
+            notice = "К сожалению, часть напитков сейчас нельзя приготовить. Мы убрали их из корзины."
+        remaining = [line for line in cart if line not in stopped]
+        await state.update_data(cart=remaining, pickup_time=None, pickup_at=None)
+        if remaining:
+            await show_cart(callback, state, order_service, shops, notice=notice)
+        else:
+            await show_products(callback, state, product_service, stop_list, notice=notice)
+        return
     
     # Add user_id to the order data
     user_data['user_id'] = callback.from_user.id
 
+    # A double tap, a Telegram retry or a slow edit can deliver this callback twice
+    basket_token = user_data.get("basket_token")
+    if basket_token and not idempotency_guard.claim(basket_token):
+        await callback.answer("Этот заказ уже оформлен 👌")
+        return
+
     # Create the order in the database
     try:
-        new_order = await order_service.create_order(user_data)
+        new_order = await order_service.create_order(user_data, shop)
         order_id_for_admin = str(new_order.id)
+    except DuplicateOrderError as e:
+        await callback.message.edit_text(f"Ваш заказ #{e.order.id} уже принят! Как только кофе будет готов - пришлём уведомление.")
+        await callback.answer()
+        await state.clear()
+        return
+    except SlotUnavailableError as e:
+        if basket_token:
+            idempotency_guard.release(basket_token)
+        # Someone took the last capacity between the summary and the confirmation
+        await state.set_state(Order.entering_pickup_time)
+        text = f"К {e.pickup_time:%H:%M} мы уже не успеваем — это время только что заняли."
+        if e.suggestion:
+            text += f"\nБлижайшее свободное время — <b>{e.suggestion:%H:%M}</b>. Напишите, к какому времени приготовить заказ."
+        else:
+            text += "\nНапишите, к какому времени приготовить заказ."
+        await callback.message.edit_text(text, parse_mode="HTML")
+        await callback.answer()
+        return
     except Exception as e:
-        # Log the error, maybe notify the user
+        if basket_token:
+            idempotency_guard.release(basket_token)
+        print(f"Failed to create order of user {callback.from_user.id}: {e}")
         await callback.answer("Произошла ошибка при создании заказа. Пожалуйста, попробуйте снова.", show_alert=True)
-        # You might want to log 'e' here
         return
 
-    admin_id = user_data.get("admin_id")
-    summary_for_admin = await build_order_summary(state, product_service, option_service, order_service)
+    if recent_baskets is not None:
+        recent_baskets.remember(callback.from_user.id, shop.id, get_cart(user_data))
+
+    admin_id = shop.admin_id
+    # Without a database the order was journaled: it has no number yet and cannot be on the board
+    journaled = new_order.id is None
     
-    if admin_id:
-        admin_keyboard = InlineKeyboardBuilder()
-        admin_keyboard.add(types.InlineKeyboardButton(text="✅ Готов", callback_data=AdminActionCallback(action="done", user_id=callback.from_user.id, order_id=order_id_for_admin).pack()))
+    # With the live board enabled the order shows up there instead of as a message of its own
+    if admin_id and (journaled or not order_board):
+        # One message per order, however many drinks it has
+        summary_for_admin = await build_order_summary(state, order_service, shops)
+        customer = f"@{callback.from_user.username}" if callback.from_user.username else callback.from_user.id
+        if journaled:
+            text, reply_markup = JOURNALED_ORDER_TEMPLATE.render(customer=customer, summary=summary_for_admin), None
+        else:
+            admin_keyboard = InlineKeyboardBuilder()
+            admin_keyboard.add(types.InlineKeyboardButton(text="✅ Готов", callback_data=AdminActionCallback(action="done", user_id=callback.from_user.id, order_id=order_id_for_admin).pack()))
+            text, reply_markup = ADMIN_ORDER_TEMPLATE.render(customer=customer, summary=summary_for_admin), admin_keyboard.as_markup()
         
         await bot.send_message(
             chat_id=admin_id,
-            text=f"Новый заказ от @{callback.from_user.username or callback.from_user.id}!\n\n{summary_for_admin}",
-            reply_markup=admin_keyboard.as_markup(),
+            text=text,
+            reply_markup=reply_markup,
             parse_mode="HTML"
         )
     
-    await callback.message.edit_text(f"Ваш заказ #{new_order.id} принят! Мы приготовим его к {user_data.get('pickup_time')}. Как только кофе будет готов - пришлём уведомление.", parse_mode="HTML")
+    number = "" if journaled else f" #{new_order.id}"
+    number_notice = " Номер заказа пришлём отдельным сообщением." if journaled else ""
+    await callback.message.edit_text(f"Ваш заказ{number} принят! Мы приготовим его к {user_data.get('pickup_time')}. Как только кофе будет готов - пришлём уведомление.{number_notice}", parse_mode="HTML")
     await callback.answer()
     await state.clear()
 
@@ -266,6 +544,8 @@ async def cq_back_to_main_menu(callback: types.CallbackQuery, state: FSMContext)
     await state.clear()
     builder = InlineKeyboardBuilder()
     builder.add(types.InlineKeyboardButton(text="Сделать заказ ☕", callback_data="place_order"))
+    builder.add(types.InlineKeyboardButton(text="Повторить заказ 🔁", callback_data="repeat_order"))
+    builder.add(types.InlineKeyboardButton(text="Мои заказы 🧾", callback_data="my_orders"))
     builder.add(types.InlineKeyboardButton(text="Меню 📖", callback_data="show_menu"))
     builder.add(types.InlineKeyboardButton(text="Режим работы ⏰", callback_data="working_hours"))
     builder.add(types.InlineKeyboardButton(text="Программа лояльности ❤️", callback_data="loyalty_program"))
@@ -278,9 +558,32 @@ async def show_menu_from_main(callback: types.CallbackQuery):
     await callback.answer("Для просмотра меню, пожалуйста, начните новый заказ через 'Сделать заказ'.", show_alert=True)
 
 @menu_router.callback_query(F.data == "working_hours")
-async def cq_working_hours(callback: types.CallbackQuery):
-    await callback.answer("Раздел 'Режим работы' в разработке.", show_alert=True)
+async def cq_working_hours(callback: types.CallbackQuery, shops: ShopRegistry):
+    lines = [WORKING_HOURS_TEMPLATE.render(shop=shop) for shop in shops if shop.hours]
+    if not lines:
+        await callback.answer("Раздел 'Режим работы' в разработке.", show_alert=True)
+        return
+    builder = InlineKeyboardBuilder()
+    builder.row(types.InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_main_menu"))
+    await callback.message.edit_text(WORKING_HOURS_HEADER_TEMPLATE.render() + "".join(lines), reply_markup=builder.as_markup(), parse_mode="HTML")
+    await callback.answer()
 
 @menu_router.callback_query(F.data == "loyalty_program")
-async def cq_loyalty_program(callback: types.CallbackQuery):
-    await callback.answer("Раздел 'Программа лояльности' в разработке.", show_alert=True)
\ No newline at end of file
+async def cq_loyalty_program(callback: types.CallbackQuery, loyalty_service: LoyaltyService, product_service: ProductService):
+    user_id = callback.from_user.id
+    balance = await loyalty_service.get_balance(user_id)
+    text = LOYALTY_HEADER_TEMPLATE.render(balance=balance)
+    text += "".join(
+        LOYALTY_PRODUCT_TEMPLATE.render(product=product) for product in await product_service.get_all_products() if product.loyalty_points
+    )
+    history = await loyalty_service.get_history(user_id)
+    if history:
+        text += LOYALTY_HISTORY_HEADER_TEMPLATE.render()
+        text += "".join(
+            LOYALTY_ENTRY_TEMPLATE.render(entry=entry, order=f" — заказ #{entry.order_id}" if entry.order_id else "")
+            for entry in history
+        )
+    builder = InlineKeyboardBuilder()
+    builder.row(types.InlineKeyboardButton(text="⬅️ Назад", callback_data="back_to_main_menu"))
+    await callback.message.edit_text(text, reply_markup=builder.as_markup(), parse_mode="HTML")
+    await callback.answer()
\ No newline at end of file
@@ -36,9 +36,9 @@ async def cmd_start(message: types.Message, user_service: UserService):
         welcome_message += "Добро пожаловать в админ-панель!"
         admin_keyboard = ReplyKeyboardMarkup(
             keyboard=[
-                [KeyboardButton(text="/orders")],
+                [KeyboardButton(text="/orders"), KeyboardButton(text="/due")],
                 [KeyboardButton(text="/done"), KeyboardButton(text="/broadcast")],
-                [KeyboardButton(text="/menu_edit")],
+                [KeyboardButton(text="/stats"), KeyboardButton(text="/menu_edit")],
             ],
             resize_keyboard=True
         )
@@ -49,6 +49,8 @@ async def cmd_start(message: types.Message, user_service: UserService):
         # Build the inline keyboard for the main menu
         builder = InlineKeyboardBuilder()
         builder.add(types.InlineKeyboardButton(text="Сделать заказ ☕", callback_data="place_order"))
+        builder.add(types.InlineKeyboardButton(text="Повторить заказ 🔁", callback_data="repeat_order"))
+        builder.add(types.InlineKeyboardButton(text="Мои заказы 🧾", callback_data="my_orders"))
         builder.add(types.InlineKeyboardButton(text="Меню 📖", callback_data="show_menu"))
         builder.add(types.InlineKeyboardButton(text="Режим работы ⏰", callback_data="working_hours"))
         builder.add(types.InlineKeyboardButton(text="Программа лояльности ❤️", callback_data="loyalty_program"))
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from src.application.metrics import metrics
+
+
+class ConcurrencyMiddleware(BaseMiddleware):
+    """
+    Bounds how many updates are processed at once and keeps each user's updates in order.
+
+    Every update first takes its user's lock, so one user's clicks run one after another, and then
+    a slot of the global semaphore. When too many updates are already waiting, or the lock and a slot
+    are not both taken within max_wait, callbacks are answered with a "busy" toast instead of queueing.
+    Register it after the throttling middleware and before the one that opens DB sessions.
+    """
+    def __init__(self, max_in_flight: int = 15, max_waiting: int = 200, max_wait: float = 5.0):
+        """
+        Args:
+            max_in_flight (int): Updates processed concurrently; keep it at or below the DB pool size.
+            max_waiting (int): Queue depth above which new callbacks are rejected right away.
+            max_wait (float): Seconds a callback may wait for a slot before it is rejected.
+        """
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._user_locks: Dict[int, List] = {}  # user_id -> [lock, number of updates holding or waiting]
+        self._in_flight = 0
+        self._waiting = 0
+
+    def _report(self) -> None:
+        metrics.set_gauge("updates_in_flight", self._in_flight)
+        metrics.set_gauge("updates_waiting", self._waiting)
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        is_callback = event.callback_query is not None
+        if is_callback and self._waiting >= self.max_waiting:
+            return await self._reject(event)
+
+        user = data.get("event_from_user")
+        user_id = user.id if user else 0
+        entry = self._user_locks.get(user_id)
+        if entry is None:
+            entry = self._user_locks[user_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+
+        self._waiting += 1
+        self._report()
+        waiting, queued_at = True, time.perf_counter()
+        # Only callbacks are shed: a typed message (e.g. the pickup time) should not get lost.
+        # One max_wait budget covers both the user's lock and the global semaphore.
+        timeout = self.max_wait if is_callback else None
+        try:
+            try:
+                await asyncio.wait_for(entry[0].acquire(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return await self._reject(event)
+            try:
+                remaining = None if timeout is None else max(0.0, timeout - (time.perf_counter() - queued_at))
+                try:
+                    await asyncio.wait_for(self._semaphore.acquire(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    return await self._reject(event)
+
+                self._waiting -= 1
+                waiting = False
+                self._in_flight += 1
+                self._report()
+                metrics.observe("update_queue_wait_ms", (time.perf_counter() - queued_at) * 1000)
+                try:
+                    return await handler(event, data)
+                finally:
+                    self._semaphore.release()
+                    self._in_flight -= 1
+                    self._report()
+            finally:
+                entry[0].release()
+        finally:
+            if waiting:
+                self._waiting -= 1
+                self._report()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._user_locks[user_id]
+
+    @staticmethod
+    async def _reject(event: Update) -> None:
+        metrics.inc("updates_rejected_total")
+        if event.callback_query:
+            await event.callback_query.answer("Сейчас очень много заказов 🙏 Попробуйте ещё раз через пару секунд.")
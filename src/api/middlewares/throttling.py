@@ -0,0 +1,98 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+from src.infrastructure.cache.ttl_cache import TTLCache
+
+
+@dataclass(frozen=True)
+class Rate:
+    """
+    Token bucket settings.
+
+    Attributes:
+        burst (int): How many events a user may send at once.
+        per_second (float): How fast the bucket refills.
+    """
+    burst: int
+    per_second: float
+
+
+DEFAULT_RATES: Dict[str, Rate] = {
+    # Plain callback data or the CallbackData prefix of the button
+    "confirm_order": Rate(burst=1, per_second=0.5),
+    "admin": Rate(burst=3, per_second=1),
+    # Fallbacks by update type
+    "callback_query": Rate(burst=5, per_second=2),
+    "message": Rate(burst=5, per_second=1),
+}
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Per-user anti-flood protection with token buckets.
+
+    Must be registered as the outermost update middleware: throttled updates are dropped before
+    a database session is opened, and throttled callbacks are only answered with a short toast.
+    Buckets are kept per (user, handler class) in a TTLCache, so idle users cost no memory.
+    """
+    def __init__(self, rates: Optional[Dict[str, Rate]] = None, idle_ttl: float = 60,
+                 max_users: int = 50_000, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rates (Optional[Dict[str, Rate]]): Rates by callback data, CallbackData prefix or update type.
+            idle_ttl (float): Seconds after which an idle bucket is forgotten (and therefore full again).
+            max_users (int): Upper bound on the number of buckets kept in memory.
+            clock (Callable[[], float]): Monotonic clock in seconds; injectable for tests.
+        """
+        self.rates = rates or DEFAULT_RATES
+        self.clock = clock
+        self._buckets: TTLCache[list] = TTLCache(ttl=idle_ttl, max_size=max_users, clock=clock)
+
+    def _classify(self, event: Update) -> Optional[str]:
+        """Returns the handler class whose rate applies to the update."""
+        if event.callback_query:
+            data = event.callback_query.data or ""
+            for key in (data, data.split(":", 1)[0]):
+                if key in self.rates:
+                    return key
+            return "callback_query"
+        if event.message:
+            return "message"
+        return None
+
+    def _allow(self, user_id: int, handler_class: str) -> bool:
+        """Takes a token from the user's bucket, refilling it for the time passed."""
+        rate = self.rates.get(handler_class)
+        if rate is None:
+            return True
+        now = self.clock()
+        key = (user_id, handler_class)
+        bucket = self._buckets.get(key)  # [tokens, last refill time]
+        if bucket is None:
+            bucket = [float(rate.burst), now]
+        else:
+            bucket[0] = min(rate.burst, bucket[0] + (now - bucket[1]) * rate.per_second)
+            bucket[1] = now
+        allowed = bucket[0] >= 1
+        if allowed:
+            bucket[0] -= 1
+        self._buckets.set(key, bucket)
+        return allowed
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        handler_class = self._classify(event)
+        if user is None or handler_class is None or self._allow(user.id, handler_class):
+            return await handler(event, data)
+
+        if event.callback_query:
+            # Stop the spinner on the button without touching the database
+            await event.callback_query.answer("Не так быстро 🙂 Подождите секунду.")
+        return None
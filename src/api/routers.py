@@ -1,6 +1,8 @@
 from aiogram import Router
 from src.api.handlers.ordering.start import start_router
 from src.api.handlers.ordering.menu import menu_router
+from src.api.handlers.ordering.history import history_router
+from src.api.handlers.ordering.inline import inline_router
 from src.api.handlers.admin.actions import admin_router
 from src.api.handlers.admin.commands import admin_commands_router
 
@@ -10,5 +12,7 @@ main_router = Router()
 # Include other routers here
 main_router.include_router(start_router)
 main_router.include_router(menu_router)
+main_router.include_router(history_router)
+main_router.include_router(inline_router)
 main_router.include_router(admin_router)
 main_router.include_router(admin_commands_router)
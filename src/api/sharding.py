@@ -0,0 +1,243 @@
+import asyncio
+import multiprocessing as mp
+import queue
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+from aiogram import Bot, Dispatcher
+from aiogram.enums import ParseMode
+from datetime import datetime
+from aiogram.types import Update
+from src.application.metrics import metrics
+from src.application.services.slot_service import SharedSlotCounters
+from src.domain.entities.order import Order as DomainOrder
+
+SetupDispatcher = Callable[[Bot, Optional[Tuple[int, int]], Optional[SharedSlotCounters]], Awaitable[Tuple[Dispatcher, Any]]]
+
+HEARTBEAT_INTERVAL = 1.0
+METRICS_INTERVAL = 5.0
+ORDER_CLOSED = "order_closed"  # Key of the message a worker sends another one instead of an update
+
+
+def shard_for(user_id: Optional[int], workers: int) -> int:
+    """
+    Returns the index of the worker that owns the user. Updates without a user go to worker 0.
+    """
+    return (user_id or 0) % workers
+
+
+def user_id_of(update: Update) -> Optional[int]:
+    """
+    Returns the ID of the user who caused the update, if there is one.
+    """
+    user = getattr(update.event, "from_user", None)
+    return user.id if user else None
+
+
+class OrderCloseForwarder:
+    """
+    Tells the worker that owns an order's customer that the order was closed in another worker.
+
+    Slot capacity and pickup timers live in the worker of the customer, but an admin's "Done", "Cancel"
+    or /done is handled in the admin's worker. The owner gets an order_closed message through its update
+    queue and releases the capacity and drops the timers there.
+    """
+    def __init__(self, index: int, queues: List["mp.Queue"]):
+        """
+        Args:
+            index (int): Index of the worker the forwarder runs in.
+            queues (List[mp.Queue]): The update queues of all workers, by index.
+        """
+        self.index = index
+        self.queues = queues
+
+    def __call__(self, order: DomainOrder) -> bool:
+        """
+        Forwards the close of an order owned by another worker.
+
+        Returns:
+            bool: True if another worker owns the order, False if it is this worker's own.
+        """
+        owner = shard_for(order.user_id, len(self.queues))
+        if owner == self.index:
+            return False
+        event = {
+            "order_id": order.id, "user_id": order.user_id, "shop_id": order.shop_id, "address": order.address,
+            "quantity": order.quantity, "pickup_time": order.pickup_time.isoformat(),
+        }
+        try:
+            self.queues[owner].put_nowait({ORDER_CLOSED: event})
+            metrics.inc("order_close_forwards_total")
+        except queue.Full:
+            # The owner is far behind; its capacity and timers catch up when it restarts
+            print(f"Could not forward the close of order #{order.id} to worker {owner}: its queue is full.")
+        return True
+
+
+def closed_order_from_event(event: dict) -> DomainOrder:
+    """
+    Rebuilds the fields of a closed order the owning worker needs to release it.
+    """
+    return DomainOrder(
+        id=event["order_id"], user_id=event["user_id"], shop_id=event["shop_id"], address=event["address"],
+        quantity=event["quantity"], pickup_time=datetime.fromisoformat(event["pickup_time"]), total_price=0,
+    )
+
+
+class Supervisor:
+    """
+    Receives updates once and routes them to worker processes by user ID.
+
+    Every worker runs its own dispatcher, FSM storage and timers, so a user's conversation always
+    stays in the same process while handler work, JSON parsing and ORM overhead spread over all cores.
+    Workers report heartbeats through shared memory and are restarted when they die or hang; their
+    metrics are published to a shared dict that /metrics in any worker aggregates. Pickup slot counters
+    live in another shared dict, so every worker checks an order against the whole capacity of its slot.
+    """
+    def __init__(self, token: str, workers: int, setup: SetupDispatcher, health_timeout: float = 30.0,
+                 queue_size: int = 10_000):
+        """
+        Args:
+            token (str): Bot token.
+            workers (int): Number of worker processes.
+            setup (SetupDispatcher): Builds a worker's dispatcher; must be a top-level (picklable) function.
+            health_timeout (float): Seconds without a heartbeat after which a worker is restarted.
+            queue_size (int): Maximum number of updates buffered per worker.
+        """
+        self.token = token
+        self.workers = workers
+        self.setup = setup
+        self.health_timeout = health_timeout
+        self._ctx = mp.get_context("spawn")
+        self._queues = [self._ctx.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._heartbeats = self._ctx.Array("d", workers)
+        self._processes: List[Optional[mp.Process]] = [None] * workers
+        self._manager = None
+        self._shared_metrics = None
+        self._slot_counts = None
+        self._slot_lock = self._ctx.Lock()
+
+    def _start_worker(self, index: int) -> None:
+        self._heartbeats[index] = time.time()
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(self.token, index, self.workers, self._queues, self._heartbeats, self._shared_metrics,
+                  SharedSlotCounters(self._slot_counts, self._slot_lock, index, self.workers), self.setup),
+            name=f"bot-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    async def run(self) -> None:
+        """
+        Starts the workers and polls Telegram until cancelled.
+        """
+        self._manager = self._ctx.Manager()
+        self._shared_metrics = self._manager.dict()
+        self._slot_counts = self._manager.dict()
+        for index in range(self.workers):
+            self._start_worker(index)
+
+        bot = Bot(token=self.token, parse_mode=ParseMode.HTML)
+        monitor = asyncio.create_task(self._monitor())
+        try:
+            await self._poll(bot)
+        finally:
+            monitor.cancel()
+            for process in self._processes:
+                if process and process.is_alive():
+                    process.terminate()
+            await bot.session.close()
+            self._manager.shutdown()
+
+    async def _poll(self, bot: Bot) -> None:
+        loop = asyncio.get_running_loop()
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=30)
+            except Exception as e:
+                print(f"Failed to fetch updates: {e}")
+                await asyncio.sleep(1)
+                continue
+            for update in updates:
+                offset = update.update_id + 1
+                index = shard_for(user_id_of(update), self.workers)
+                raw = update.model_dump(mode="json", exclude_none=True)
+                try:
+                    self._queues[index].put_nowait(raw)
+                except queue.Full:
+                    # The worker is behind; wait for room without blocking the event loop
+                    await loop.run_in_executor(None, self._queues[index].put, raw)
+                metrics.inc("updates_routed_total", worker=str(index))
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL * 5)
+            now = time.time()
+            for index, process in enumerate(self._processes):
+                hung = now - self._heartbeats[index] > self.health_timeout
+                if process.is_alive() and not hung:
+                    continue
+                reason = "hung" if process.is_alive() else f"exited with code {process.exitcode}"
+                print(f"Worker {index} {reason}, restarting...")
+                if process.is_alive():
+                    process.kill()
+                    process.join(timeout=5)
+                metrics.inc("worker_restarts_total", worker=str(index))
+                self._start_worker(index)
+            self._shared_metrics["supervisor"] = metrics.snapshot()
+
+
+def worker_main(token: str, index: int, workers: int, queues: List["mp.Queue"], heartbeats,
+                shared_metrics, slot_counters: SharedSlotCounters, setup: SetupDispatcher) -> None:
+    """
+    Entry point of a worker process.
+    """
+    try:
+        asyncio.run(_run_worker(token, index, workers, queues, heartbeats, shared_metrics, slot_counters, setup))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _run_worker(token: str, index: int, workers: int, queues: List["mp.Queue"], heartbeats,
+                      shared_metrics, slot_counters: SharedSlotCounters, setup: SetupDispatcher) -> None:
+    bot = Bot(token=token, parse_mode=ParseMode.HTML)
+    dp, timer_queue = await setup(bot, (index, workers), slot_counters)
+    dp["shared_metrics"] = shared_metrics
+    dp["forward_order_closed"] = OrderCloseForwarder(index, queues)
+    updates = queues[index]
+    timer_task = asyncio.create_task(timer_queue.run())
+    heartbeat_task = asyncio.create_task(_heartbeat(index, heartbeats, shared_metrics))
+    loop = asyncio.get_running_loop()
+    running: Set[asyncio.Task] = set()
+    print(f"Worker {index} started.")
+    try:
+        while True:
+            raw = await loop.run_in_executor(None, updates.get)
+            if ORDER_CLOSED in raw:
+                # Another worker closed one of this worker's orders
+                dp["release_closed_order"](closed_order_from_event(raw[ORDER_CLOSED]))
+                continue
+            # Updates run as tasks like in polling mode; per-user order is kept by ConcurrencyMiddleware
+            task = asyncio.create_task(dp.feed_raw_update(bot, raw))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        heartbeat_task.cancel()
+        await dp.emit_shutdown(bot=bot)
+        timer_queue.stop()
+        await timer_task
+        await bot.session.close()
+
+
+async def _heartbeat(index: int, heartbeats, shared_metrics) -> None:
+    last_published = 0.0
+    while True:
+        now = time.time()
+        heartbeats[index] = now
+        if shared_metrics is not None and now - last_published >= METRICS_INTERVAL:
+            shared_metrics[index] = metrics.snapshot()
+            last_published = now
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+
@@ -0,0 +1,171 @@
+import heapq
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from src.application.metrics import metrics
+from src.application.scheduler import TimerQueue
+from src.domain.entities.order import Order as DomainOrder, OrderStatus
+
+OrderKey = Tuple[datetime, int]  # (pickup_time, id)
+ChangeListener = Callable[[Optional[int]], None]
+
+
+class ActiveOrderIndex:
+    """
+    In-process index of the active orders, per shop and sorted by pickup time.
+
+    It is loaded once at startup and kept current by OrderService on every create and status change,
+    so "what is in the queue" is answered from memory: a shop's orders in a time window are found by
+    binary search. A periodic reconciliation against the database heals drift, e.g. from manual edits.
+    Listeners (like the order board) are told which shop changed.
+    """
+    def __init__(self):
+        self._orders: Dict[int, DomainOrder] = {}
+        self._keys: Dict[Optional[int], List[OrderKey]] = {}  # shop ID -> sorted keys of its orders
+        self._listeners: List[ChangeListener] = []
+        self._touched: Optional[Set[int]] = None  # IDs changed while a reconciliation is running
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def subscribe(self, listener: ChangeListener) -> None:
+        """
+        Registers a callback that gets the shop ID of every change.
+        """
+        self._listeners.append(listener)
+
+    def load(self, orders: List[DomainOrder]) -> None:
+        """
+        Replaces the contents with the active orders stored in the database.
+        """
+        self._orders, self._keys = {}, {}
+        for order in orders:
+            self._insert(order)
+        metrics.set_gauge("active_orders", len(self._orders))
+
+    def upsert(self, order: DomainOrder) -> None:
+        """
+        Adds a new order or applies a status change; orders that are no longer active are dropped.
+        """
+        if self._touched is not None:
+            self._touched.add(order.id)
+        if not self._apply(order):
+            return
+        metrics.set_gauge("active_orders", len(self._orders))
+        self._notify(order.shop_id)
+
+    def remove(self, order_id: int) -> None:
+        """
+        Drops a completed or cancelled order.
+        """
+        if self._touched is not None:
+            self._touched.add(order_id)
+        order = self._delete(order_id)
+        if order:
+            metrics.set_gauge("active_orders", len(self._orders))
+            self._notify(order.shop_id)
+
+    def get(self, order_id: int) -> Optional[DomainOrder]:
+        """
+        Returns an active order by ID.
+        """
+        return self._orders.get(order_id)
+
+    def all(self) -> List[DomainOrder]:
+        """
+        Returns all active orders, earliest pickup first.
+        """
+        return [self._orders[order_id] for _, order_id in heapq.merge(*self._keys.values())]
+
+    def for_shop(self, shop_id: int) -> List[DomainOrder]:
+        """
+        Returns the active orders of a shop, earliest pickup first.
+        """
+        return [self._orders[order_id] for _, order_id in self._keys.get(shop_id, [])]
+
+    def due(self, shop_id: int, start: datetime, end: datetime) -> List[DomainOrder]:
+        """
+        Returns the active orders of a shop with a pickup time in [start, end), earliest first.
+        """
+        keys = self._keys.get(shop_id, [])
+        first, last = bisect_left(keys, (start, 0)), bisect_left(keys, (end, 0))
+        return [self._orders[order_id] for _, order_id in keys[first:last]]
+
+    def overdue(self, shop_id: int, now: datetime) -> List[DomainOrder]:
+        """
+        Returns the active orders of a shop whose pickup time has passed, earliest first.
+        """
+        keys = self._keys.get(shop_id, [])
+        return [self._orders[order_id] for _, order_id in keys[:bisect_left(keys, (now, 0))]]
+
+    def start(self, timer_queue: TimerQueue, interval: timedelta, load_active: Callable[[], Awaitable[List[DomainOrder]]]) -> None:
+        """
+        Reconciles the index with the database every interval on the timer queue.
+        """
+        timer_queue.schedule_every(("reconcile_active_orders",), interval, lambda: self.reconcile(load_active))
+
+    async def reconcile(self, load_active: Callable[[], Awaitable[List[DomainOrder]]]) -> int:
+        """
+        Brings the index in line with the active orders in the database.
+        Orders changed through OrderService while the query ran are newer than its result and are kept.
+
+        Returns:
+            int: The number of orders that had drifted.
+        """
+        self._touched = set()
+        try:
+            stored = {order.id: order for order in await load_active()}
+        finally:
+            touched, self._touched = self._touched, None
+
+        drifted = 0
+        for order_id in [order_id for order_id in self._orders if order_id not in stored and order_id not in touched]:
+            order = self._delete(order_id)
+            drifted += 1
+            self._notify(order.shop_id)
+        for order in stored.values():
+            if order.id not in touched and self._state(self._orders.get(order.id)) != self._state(order):
+                self._apply(order)
+                drifted += 1
+                self._notify(order.shop_id)
+        if drifted:
+            metrics.inc("active_orders_drift_total", drifted)
+            print(f"Active order index: fixed {drifted} drifted orders.")
+        metrics.set_gauge("active_orders", len(self._orders))
+        return drifted
+
+    @staticmethod
+    def _state(order: Optional[DomainOrder]) -> Optional[tuple]:
+        # What readers of the index see; timestamps filled in by the database are left out
+        if order is None:
+            return None
+        return order.shop_id, order.pickup_time, order.status, order.quantity, order.total_price
+
+    @staticmethod
+    def _is_active(order: DomainOrder) -> bool:
+        return not order.is_completed and order.status not in (OrderStatus.COMPLETED, OrderStatus.CANCELLED)
+
+    def _apply(self, order: DomainOrder) -> bool:
+        """
+        Stores the order's current state. Returns False if nothing changed.
+        """
+        if not self._is_active(order):
+            return self._delete(order.id) is not None
+        self._delete(order.id)
+        self._insert(order)
+        return True
+
+    def _insert(self, order: DomainOrder) -> None:
+        self._orders[order.id] = order
+        insort(self._keys.setdefault(order.shop_id, []), (order.pickup_time, order.id))
+
+    def _delete(self, order_id: int) -> Optional[DomainOrder]:
+        order = self._orders.pop(order_id, None)
+        if order:
+            keys = self._keys[order.shop_id]
+            del keys[bisect_left(keys, (order.pickup_time, order.id))]
+        return order
+
+    def _notify(self, shop_id: Optional[int]) -> None:
+        for listener in self._listeners:
+            listener(shop_id)
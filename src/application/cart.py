@@ -0,0 +1,39 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+
+MAX_CART_DRINKS = 10
+
+
+class CartLine(NamedTuple):
+    """
+    One drink configuration in the cart.
+    Stored in FSM data as a plain list, e.g. [3, "350мл", 2, 0, 1], so it stays small in any storage.
+    """
+    product_id: int
+    volume: str
+    milk_id: Optional[int]
+    syrup_id: Optional[int]
+    quantity: int
+
+
+def get_cart(user_data: Dict[str, Any]) -> List[CartLine]:
+    """
+    Reads the cart from FSM data.
+    """
+    return [CartLine(*line) for line in user_data.get("cart") or []]
+
+
+def add_to_cart(cart: List[CartLine], line: CartLine) -> List[CartLine]:
+    """
+    Returns a new cart with the line added; identical drinks are merged into one line.
+    """
+    for index, existing in enumerate(cart):
+        if existing[:4] == line[:4]:
+            return cart[:index] + [existing._replace(quantity=existing.quantity + line.quantity)] + cart[index + 1:]
+    return cart + [line]
+
+
+def drinks_count(cart: List[CartLine]) -> int:
+    """
+    Returns the total number of drinks in the cart.
+    """
+    return sum(line.quantity for line in cart)
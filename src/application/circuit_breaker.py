@@ -0,0 +1,64 @@
+import time
+from typing import Callable
+from src.application.metrics import metrics
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency that keeps failing, so callers take their fallback at once
+    instead of waiting for a timeout on every request.
+
+    After failure_threshold failures in a row the breaker opens. Once reset_timeout has passed it lets
+    calls through again (half-open): the first success closes it, the first failure opens it again.
+    The state is exported as the circuit_breaker_state gauge: 0 closed, 1 half-open, 2 open.
+    """
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            name (str): Label of the breaker in the metrics.
+            failure_threshold (int): Failures in a row that open the breaker.
+            reset_timeout (float): Seconds the breaker stays open before calls are tried again.
+            clock (Callable[[], float]): Monotonic time source, replaceable in tests.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        metrics.set_gauge("circuit_breaker_state", STATE_GAUGE[CLOSED], breaker=name)
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        Checks whether a call may be made now.
+        """
+        return self.state != OPEN
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self._state != CLOSED:
+            print(f"Circuit breaker {self.name}: closed.")
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+            print(f"Circuit breaker {self.name}: open after {self._failures} failures.")
+            metrics.inc("circuit_breaker_trips_total", breaker=self.name)
+            self._opened_at = self.clock()
+            self._set_state(OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        metrics.set_gauge("circuit_breaker_state", STATE_GAUGE[state], breaker=self.name)
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Optional
+
+
+class LoyaltyBalanceCache:
+    """
+    LRU cache of loyalty balances, so showing the balance on every cart summary costs no query.
+
+    New ledger entries invalidate the user's balance after they are committed. A read that started
+    before an invalidation may have fetched the old balance, so its result is not cached: every
+    cached value was read after the last change of that user.
+    """
+    def __init__(self, capacity: int = 10000):
+        """
+        Args:
+            capacity (int): How many balances to keep; the least recently read are dropped first.
+        """
+        self.capacity = capacity
+        self._balances: "OrderedDict[int, int]" = OrderedDict()
+        self._version = 0  # Bumped by every invalidation
+
+    @property
+    def version(self) -> int:
+        """
+        Token to take before reading a balance from the database and hand back to put().
+        """
+        return self._version
+
+    def get(self, user_id: int) -> Optional[int]:
+        """
+        Returns the cached balance of a user, if any.
+        """
+        balance = self._balances.get(user_id)
+        if balance is not None:
+            self._balances.move_to_end(user_id)
+        return balance
+
+    def put(self, user_id: int, balance: int, version: int) -> None:
+        """
+        Caches a balance read from the database, unless something was invalidated since `version` was taken.
+        """
+        if version != self._version:
+            return
+        self._balances[user_id] = balance
+        self._balances.move_to_end(user_id)
+        if len(self._balances) > self.capacity:
+            self._balances.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        Drops the user's balance and keeps reads that are still in flight from caching an old one.
+        """
+        self._version += 1
+        self._balances.pop(user_id, None)
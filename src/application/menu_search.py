@@ -0,0 +1,83 @@
+import re
+from typing import Dict, List, Sequence, Tuple, Union
+from src.application.metrics import metrics
+from src.application.services.option_service import OptionService
+from src.application.services.product_service import ProductService
+from src.domain.entities.option import Option
+from src.domain.entities.product import Product
+from src.domain.entities.stop_list import OPTION, PRODUCT
+from src.infrastructure.cache.ttl_cache import TTLCache
+
+MenuEntry = Tuple[str, Union[Product, Option]]  # (PRODUCT or OPTION, item)
+
+WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase words; "ё" is searched as "е", as people usually type it.
+    """
+    return WORD_RE.findall(text.lower().replace("ё", "е"))
+
+
+class MenuSearchIndex:
+    """
+    Prefix index over the names of the drinks and options of the base menu, for inline-mode search.
+
+    Every prefix of every word of a name maps to the entries containing it, so a query word is one
+    dict lookup and a query of several words intersects a few short lists. Results are cached per
+    normalized query, so a burst of queries while the user types is answered from memory.
+    """
+    def __init__(self, products: Sequence[Product], options: Sequence[Option], cache_ttl: float = 300, max_cached: int = 5000):
+        """
+        Args:
+            products (Sequence[Product]): Drinks to index, in menu order.
+            options (Sequence[Option]): Milks and syrups to index, listed after the drinks.
+            cache_ttl (float): Seconds a query's results stay cached.
+            max_cached (int): Maximum number of cached queries.
+        """
+        self.entries: List[MenuEntry] = [(PRODUCT, product) for product in products] + [(OPTION, option) for option in options]
+        self._products_count = len(products)
+        self._prefixes: Dict[str, List[int]] = {}  # word prefix -> ascending entry positions
+        for position, (_, item) in enumerate(self.entries):
+            for word in set(tokenize(item.name)):
+                for end in range(1, len(word) + 1):
+                    positions = self._prefixes.setdefault(word[:end], [])
+                    if not positions or positions[-1] != position:
+                        positions.append(position)
+        self._cache: TTLCache[List[MenuEntry]] = TTLCache(ttl=cache_ttl, max_size=max_cached)
+
+    @classmethod
+    async def build(cls, product_service: ProductService, option_service: OptionService) -> "MenuSearchIndex":
+        """
+        Builds the index from the current catalog.
+        """
+        options = [option for category in ("milk", "syrups") for option in await option_service.get_options_by_category(category)]
+        return cls(await product_service.get_all_products(), options)
+
+    def search(self, query: str, limit: int = 50) -> List[MenuEntry]:
+        """
+        Finds the entries whose name has a word starting with each word of the query, in menu order.
+        An empty query lists the drinks.
+        """
+        words = tokenize(query)
+        key = " ".join(words)
+        cached = self._cache.get(key)
+        if cached is not None:
+            metrics.inc("menu_search_cache_hits_total")
+            return cached[:limit]
+        metrics.inc("menu_search_cache_misses_total")
+
+        if not words:
+            positions = range(self._products_count)
+        else:
+            # Start from the rarest word, so the intersection never grows
+            candidates = sorted((self._prefixes.get(word, []) for word in words), key=len)
+            matched = set(candidates[0])
+            for other in candidates[1:]:
+                matched.intersection_update(other)
+            positions = sorted(matched)
+        # The whole match is cached, so the same query with another limit is still a hit
+        results = [self.entries[position] for position in positions]
+        self._cache.set(key, results)
+        return results[:limit]
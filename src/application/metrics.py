@@ -0,0 +1,109 @@
+import bisect
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _series(name: str, labels: Dict[str, str]) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with count and sum, cheap enough to observe on every request.
+    """
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)  # The last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Returns the upper bound of the bucket that holds the q-quantile.
+        """
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """
+    In-process registry of counters, gauges and histograms.
+    Series are identified by a name and optional string labels, e.g. inc("orders_total", shop="1").
+    """
+    def __init__(self):
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = _series(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        self.gauges[_series(name, labels)] = value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels: str) -> None:
+        key = _series(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Returns all series as flat name -> value pairs; histograms are summarized by count, sum and quantiles.
+        """
+        result = dict(self.counters)
+        result.update(self.gauges)
+        for key, histogram in self.histograms.items():
+            result[f"{key}:count"] = histogram.count
+            result[f"{key}:sum"] = histogram.sum
+            for q in (0.5, 0.9, 0.99):
+                result[f"{key}:p{int(q * 100)}"] = histogram.quantile(q)
+        return result
+
+    def render(self) -> str:
+        """
+        Renders the snapshot as text, one series per line.
+        """
+        return render_snapshot(self.snapshot())
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, float]]) -> Dict[str, float]:
+    """
+    Merges snapshots of several processes: counters, gauges, counts and sums add up,
+    quantiles take the worst worker's value.
+    """
+    merged: Dict[str, float] = {}
+    for snapshot in snapshots:
+        for key, value in snapshot.items():
+            if ":p" in key:
+                merged[key] = max(merged.get(key, 0), value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def render_snapshot(snapshot: Dict[str, float]) -> str:
+    """
+    Renders a snapshot as text, one series per line.
+    """
+    return "\n".join(f"{key} {value:g}" for key, value in sorted(snapshot.items()))
+
+
+# Shared registry of the bot process
+metrics = Metrics()
@@ -0,0 +1,45 @@
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
+from src.application.cart import CartLine
+
+
+class RecentBasket(NamedTuple):
+    """
+    The cart of a user's last confirmed order and the shop it went to.
+    """
+    shop_id: int
+    cart: List[CartLine]
+
+
+class RecentBaskets:
+    """
+    LRU cache of every user's last confirmed basket, for the one-tap "repeat order".
+
+    Lookups and updates are O(1). Users are always handled by the same worker, so a per-process
+    cache is enough; users that dropped out of it are served from their last order in the database.
+    """
+    def __init__(self, capacity: int = 10000):
+        """
+        Args:
+            capacity (int): How many users to remember; the least recently active are dropped first.
+        """
+        self.capacity = capacity
+        self._baskets: "OrderedDict[int, RecentBasket]" = OrderedDict()
+
+    def remember(self, user_id: int, shop_id: int, cart: List[CartLine]) -> None:
+        """
+        Stores the basket of a just confirmed order.
+        """
+        self._baskets[user_id] = RecentBasket(shop_id, list(cart))
+        self._baskets.move_to_end(user_id)
+        if len(self._baskets) > self.capacity:
+            self._baskets.popitem(last=False)
+
+    def get(self, user_id: int) -> Optional[RecentBasket]:
+        """
+        Returns the user's last basket, if it is cached.
+        """
+        basket = self._baskets.get(user_id)
+        if basket is not None:
+            self._baskets.move_to_end(user_id)
+        return basket
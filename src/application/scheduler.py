@@ -0,0 +1,138 @@
+import asyncio
+import heapq
+import itertools
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+Job = Callable[[], Awaitable[Any]]
+
+
+class TimerQueue:
+    """
+    In-process scheduler for one-shot jobs, backed by a binary heap keyed by fire time.
+
+    Scheduling and rescheduling are O(log n). Cancelling is O(1): the heap entry is only marked
+    as dead and skipped when it reaches the top. A single background task sleeps until the earliest
+    deadline, so thousands of pending timers cost nothing while they wait.
+    """
+    def __init__(self, clock: Optional[Callable[[], datetime]] = None):
+        """
+        Args:
+            clock (Optional[Callable[[], datetime]]): Returns the current aware time; injectable for tests.
+        """
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self._heap: List[list] = []
+        self._entries: Dict[Hashable, list] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._running_jobs: Set[asyncio.Task] = set()
+        self._stopped = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def schedule(self, key: Hashable, fire_at: datetime, job: Job) -> None:
+        """
+        Schedules a job, replacing any pending job with the same key.
+
+        Args:
+            key (Hashable): Identifies the job, e.g. ("remind", order_id).
+            fire_at (datetime): When the job should run.
+            job (Job): Coroutine function to call.
+        """
+        self.cancel(key)
+        entry = [fire_at, next(self._counter), key, job]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            # The new job is now the earliest one, so the runner has to recompute its sleep
+            self._wakeup.set()
+
+    def schedule_every(self, key: Hashable, interval: timedelta, job: Job, first_at: Optional[datetime] = None) -> None:
+        """
+        Schedules a job that runs every interval until cancelled. A failing run is reported and does not stop it.
+
+        Args:
+            key (Hashable): Identifies the job.
+            interval (timedelta): Time between the end of one run and the start of the next.
+            job (Job): Coroutine function to call.
+            first_at (Optional[datetime]): When to run first; defaults to one interval from now.
+        """
+        async def run_and_reschedule():
+            try:
+                await job()
+            except Exception as e:
+                print(f"Periodic job {key} failed: {e}")
+            if not self._stopped:
+                self.schedule(key, self.clock() + interval, run_and_reschedule)
+
+        self.schedule(key, first_at or self.clock() + interval, run_and_reschedule)
+
+    def cancel(self, key: Hashable) -> bool:
+        """
+        Cancels a pending job.
+
+        Returns:
+            bool: True if a job was pending under this key.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[3] = None
+        return True
+
+    def next_fire_time(self) -> Optional[datetime]:
+        """
+        Returns the fire time of the earliest pending job, if any.
+        """
+        while self._heap and self._heap[0][3] is None:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self) -> List[Job]:
+        """
+        Removes and returns all jobs whose fire time has come.
+        """
+        now = self.clock()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, _, key, job = heapq.heappop(self._heap)
+            if job is None:
+                continue
+            del self._entries[key]
+            due.append(job)
+        return due
+
+    async def run(self) -> None:
+        """
+        Runs due jobs until stop() is called.
+        Every job runs in its own task, so a slow Telegram call never delays the other timers.
+        """
+        self._stopped = False
+        while not self._stopped:
+            for job in self.pop_due():
+                task = asyncio.create_task(self._run_job(job))
+                self._running_jobs.add(task)
+                task.add_done_callback(self._running_jobs.discard)
+
+            next_fire = self.next_fire_time()
+            timeout = None if next_fire is None else max((next_fire - self.clock()).total_seconds(), 0)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        """
+        Stops the runner loop after the current iteration.
+        """
+        self._stopped = True
+        self._wakeup.set()
+
+    @staticmethod
+    async def _run_job(job: Job) -> None:
+        try:
+            await job()
+        except Exception as e:
+            print(f"Scheduled job failed: {e}")
@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set, Tuple
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from src.application.active_orders import ActiveOrderIndex
+from src.application.metrics import metrics
+from src.application.scheduler import TimerQueue
+from src.application.shops import ShopRegistry
+from src.application.templates import ITEM_TEMPLATE, MAX_MESSAGE_LENGTH, Markup, Template
+from src.application.time_utils import to_shop_time
+from src.domain.entities.order import OrderStatus
+from src.domain.entities.shop import Shop
+
+BOARD_HEADER_TEMPLATE = Template("📋 <b>Заказы — {address}</b>\n\n")
+BOARD_ORDER_TEMPLATE = Template("<b>#{order.id}</b> {pickup:%H:%M}{status} — {drinks}\n")
+MAX_BUTTONS = 30  # "Done" buttons per board; Telegram allows 100 per keyboard, but more is unusable on a phone
+
+
+class OrderBoard:
+    """
+    Keeps one pinned "board" message per shop in its admin chat, listing the shop's active orders.
+
+    The board is rendered from the ActiveOrderIndex, which OrderService keeps current on create,
+    complete and cancel, so a change never queries the database. A change only marks its shop dirty: the message is
+    re-rendered by a timer at most once per min_interval, so a burst of orders becomes one edit,
+    and an unchanged text is never sent at all. Only one send or edit per board is in flight at a time;
+    changes that arrive meanwhile are rendered by the next one.
+    """
+    def __init__(self, bot: Bot, shops: ShopRegistry, timer_queue: TimerQueue, active_orders: ActiveOrderIndex,
+                 min_interval: timedelta = timedelta(seconds=3)):
+        """
+        Args:
+            bot (Bot): Bot used to send, pin and edit the boards.
+            shops (ShopRegistry): The shops to keep boards for.
+            timer_queue (TimerQueue): The scheduler that runs the debounced edits.
+            active_orders (ActiveOrderIndex): The active orders the boards show; every change re-renders its shop's board.
+            min_interval (timedelta): Minimum time between two edits of the same board.
+        """
+        self.bot = bot
+        self.shops = shops
+        self.timer_queue = timer_queue
+        self.active_orders = active_orders
+        self.min_interval = min_interval
+        self._messages: Dict[int, int] = {}  # shop ID -> message ID of its board
+        self._rendered: Dict[int, str] = {}  # shop ID -> text the board currently shows
+        self._last_edit: Dict[int, datetime] = {}
+        self._pending: Set[int] = set()
+        self._flushing: Set[int] = set()  # Shops whose board is being sent or edited right now
+        active_orders.subscribe(self._touch)
+
+    def start(self) -> None:
+        """
+        Posts the board of every shop.
+        """
+        for shop in self.shops:
+            self._touch(shop.id)
+
+    def is_active(self, order_id: int) -> bool:
+        """
+        Checks whether the order is still on a board.
+        """
+        return self.active_orders.get(order_id) is not None
+
+    def is_board_message(self, chat_id: int, message_id: int) -> bool:
+        """
+        Checks whether a message is one of the boards, e.g. to tell board buttons from per-order ones.
+        """
+        return any(
+            self._messages.get(shop.id) == message_id for shop in self.shops.for_admin(chat_id)
+        )
+
+    async def repost(self, shop_id: int) -> None:
+        """
+        Posts the board of a shop as a new message at the bottom of the chat and removes the old one.
+        """
+        shop = self.shops.get(shop_id)
+        old_message_id = self._messages.pop(shop_id, None)
+        self.timer_queue.cancel(("order_board", shop_id))
+        self._pending.discard(shop_id)
+        await self._flush(shop_id)
+        if shop and old_message_id:
+            try:
+                await self.bot.delete_message(chat_id=shop.admin_id, message_id=old_message_id)
+            except TelegramBadRequest:
+                pass  # Already deleted or too old to delete
+
+    def render(self, shop: Shop) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+        """
+        Builds the board text and its "Done" buttons, earliest pickup first.
+        """
+        # Imported here: the admin handlers import the services, not the other way round
+        from src.api.handlers.admin.actions import AdminActionCallback
+
+        orders = self.active_orders.for_shop(shop.id)
+        text = BOARD_HEADER_TEMPLATE.render(address=shop.address)
+        if not orders:
+            return text + "Активных заказов нет.", None
+
+        builder = InlineKeyboardBuilder()
+        for shown, order in enumerate(orders):
+            drinks = ", ".join(ITEM_TEMPLATE.render(item=item, options="") for item in order.items)
+            status = "" if order.status == OrderStatus.PENDING else f" [{order.status.value}]"
+            line = BOARD_ORDER_TEMPLATE.render(
+                order=order, pickup=to_shop_time(order.pickup_time, order.shop_id), status=status, drinks=Markup(drinks)
+            )
+            more = f"…и ещё {len(orders) - shown}"
+            if len(text) + len(line) + len(more) > MAX_MESSAGE_LENGTH:
+                text += more
+                break
+            text += line
+            if shown < MAX_BUTTONS:
+                builder.button(
+                    text=f"✅ #{order.id}",
+                    callback_data=AdminActionCallback(action="done", user_id=order.user_id, order_id=order.id).pack(),
+                )
+        builder.adjust(3)
+        return text, builder.as_markup()
+
+    def _touch(self, shop_id: Optional[int]) -> None:
+        """
+        Schedules a re-render of the shop's board unless one is already pending.
+        """
+        if shop_id is None or shop_id in self._pending:
+            return
+        self._pending.add(shop_id)
+        if shop_id in self._flushing:
+            return  # The running flush re-arms the timer when it is done
+        now = self.timer_queue.clock()
+        last_edit = self._last_edit.get(shop_id)
+        fire_at = max(now, last_edit + self.min_interval) if last_edit else now
+        self.timer_queue.schedule(("order_board", shop_id), fire_at, lambda: self._flush(shop_id))
+
+    async def _flush(self, shop_id: int) -> None:
+        if shop_id in self._flushing:
+            # One send or edit per board at a time, or a change during the await would post the board twice
+            self._pending.add(shop_id)
+            return
+        self._pending.discard(shop_id)
+        self._flushing.add(shop_id)
+        try:
+            await self._send(shop_id)
+        finally:
+            self._flushing.discard(shop_id)
+        if shop_id in self._pending:
+            # Changes came in while the board was being sent: render them after min_interval
+            self._pending.discard(shop_id)
+            self._touch(shop_id)
+
+    async def _send(self, shop_id: int) -> None:
+        shop = self.shops.get(shop_id)
+        if not shop:
+            return
+        text, markup = self.render(shop)
+        message_id = self._messages.get(shop_id)
+        if message_id and self._rendered.get(shop_id) == text:
+            return
+
+        try:
+            if message_id:
+                try:
+                    await self.bot.edit_message_text(text, chat_id=shop.admin_id, message_id=message_id, reply_markup=markup)
+                    metrics.inc("order_board_edits_total")
+                except TelegramBadRequest as e:
+                    if "message is not modified" not in e.message:
+                        # The board was deleted by hand or can no longer be edited: post a new one
+                        self._messages.pop(shop_id, None)
+                        await self._post(shop, text, markup)
+            else:
+                await self._post(shop, text, markup)
+        except TelegramRetryAfter as e:
+            # Flood control: try again when Telegram allows it; changes until then are coalesced.
+            # Pretending the last edit was just that long ago makes _touch wait exactly retry_after.
+            self._last_edit[shop_id] = self.timer_queue.clock() + timedelta(seconds=e.retry_after) - self.min_interval
+            self._pending.add(shop_id)
+            return
+        self._rendered[shop_id] = text
+        self._last_edit[shop_id] = self.timer_queue.clock()
+
+    async def _post(self, shop: Shop, text: str, markup: Optional[InlineKeyboardMarkup]) -> None:
+        message = await self.bot.send_message(chat_id=shop.admin_id, text=text, reply_markup=markup)
+        self._messages[shop.id] = message.message_id
+        metrics.inc("order_board_posts_total")
+        try:
+            await self.bot.pin_chat_message(chat_id=shop.admin_id, message_id=message.message_id, disable_notification=True)
+        except TelegramBadRequest as e:
+            print(f"Could not pin the order board of shop {shop.id}: {e.message}")
@@ -0,0 +1,118 @@
+import asyncio
+import csv
+import json
+from datetime import date, datetime, time, timedelta
+from typing import IO, Callable, List
+from zoneinfo import ZoneInfo
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.application.time_utils import get_shop_timezone, to_shop_time
+from src.domain.entities.order import Order as DomainOrder
+from src.infrastructure.database.repositories.order_repository import SQLAlchemyOrderRepository
+
+EXPORT_FORMATS = ("csv", "jsonl")
+CSV_COLUMNS = [
+    "order_id", "created_at", "pickup_time", "address", "user_id", "status",
+    "product_name", "volume", "milk_name", "syrup_name", "quantity", "unit_price", "item_total", "order_total",
+]
+
+
+def _write_csv(file: IO[str], orders: List[DomainOrder]) -> None:
+    writer = csv.writer(file, delimiter=";")
+    for order in orders:
+        pickup_time = to_shop_time(order.pickup_time, order.shop_id).strftime("%Y-%m-%d %H:%M")
+        for item in order.items:
+            writer.writerow([
+                order.id, f"{order.created_at:%Y-%m-%d %H:%M:%S}", pickup_time, order.address, order.user_id,
+                order.status.value, item.product_name, item.volume, item.milk_name or "", item.syrup_name or "",
+                item.quantity, item.unit_price, item.total_price, order.total_price,
+            ])
+
+
+def _write_jsonl(file: IO[str], orders: List[DomainOrder]) -> None:
+    for order in orders:
+        file.write(json.dumps({
+            "order_id": order.id,
+            "created_at": order.created_at.isoformat(),
+            "pickup_time": to_shop_time(order.pickup_time, order.shop_id).isoformat(),
+            "address": order.address,
+            "user_id": order.user_id,
+            "status": order.status.value,
+            "total_price": order.total_price,
+            "items": [
+                {
+                    "product_name": item.product_name,
+                    "volume": item.volume,
+                    "milk_name": item.milk_name,
+                    "syrup_name": item.syrup_name,
+                    "quantity": item.quantity,
+                    "unit_price": item.unit_price,
+                }
+                for item in order.items
+            ],
+        }, ensure_ascii=False))
+        file.write("\n")
+
+
+class OrderExportService:
+    """
+    Streams orders of a date range into a CSV (one row per drink) or JSONL (one line per order) file.
+
+    Orders are read in keyset-paginated chunks, each in its own short session, so no transaction stays
+    open for the whole export and memory holds one chunk at a time. Formatting and file writes run in
+    a worker thread, so the event loop keeps serving other users.
+    """
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], chunk_size: int = 1000):
+        """
+        Args:
+            session_factory (async_sessionmaker[AsyncSession]): Opens a session per chunk.
+            chunk_size (int): Orders read per query.
+        """
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+
+    async def export(self, file_path: str, fmt: str, shop_ids: List[int], first_day: date, last_day: date) -> int:
+        """
+        Writes the orders of the shops with a shop-local pickup date in [first_day, last_day] to a file.
+
+        Args:
+            file_path (str): Where to write the file.
+            fmt (str): "csv" or "jsonl".
+            shop_ids (List[int]): IDs of the shops to export.
+            first_day (date): First pickup date, inclusive.
+            last_day (date): Last pickup date, inclusive.
+
+        Returns:
+            int: The number of exported orders.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        write: Callable[[IO[str], List[DomainOrder]], None] = _write_csv if fmt == "csv" else _write_jsonl
+
+        # utf-8-sig lets Excel recognise the encoding of Cyrillic CSV files
+        file = await asyncio.to_thread(open, file_path, "w", encoding="utf-8-sig" if fmt == "csv" else "utf-8", newline="")
+        exported = 0
+        try:
+            if fmt == "csv":
+                await asyncio.to_thread(csv.writer(file, delimiter=";").writerow, CSV_COLUMNS)
+            for shop_id in shop_ids:
+                tz = ZoneInfo(get_shop_timezone(shop_id))
+                start = datetime.combine(first_day, time(), tzinfo=tz)
+                end = datetime.combine(last_day + timedelta(days=1), time(), tzinfo=tz)
+                # Archived orders are older, so reading history first keeps the file roughly chronological
+                for archived in (True, False):
+                    after_id = 0
+                    while True:
+                        async with self.session_factory() as session:
+                            orders = await SQLAlchemyOrderRepository(session).get_orders_page(
+                                shop_id, start, end, after_id, self.chunk_size, archived=archived
+                            )
+                        if not orders:
+                            break
+                        await asyncio.to_thread(write, file, orders)
+                        exported += len(orders)
+                        after_id = orders[-1].id
+                        if len(orders) < self.chunk_size:
+                            break
+        finally:
+            await asyncio.to_thread(file.close)
+        return exported
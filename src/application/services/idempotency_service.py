@@ -0,0 +1,48 @@
+import uuid
+from src.application.metrics import metrics
+from src.infrastructure.cache.ttl_cache import TTLCache
+
+
+class IdempotencyGuard:
+    """
+    Remembers recently claimed basket tokens, so a replayed confirmation is dropped
+    before it reaches the database or sends anything.
+
+    The in-memory set only covers this process and its lifetime; the unique constraint on
+    orders.idempotency_key catches whatever slips through (restarts, several workers).
+    """
+    def __init__(self, ttl: float = 3600, max_size: int = 100_000):
+        """
+        Args:
+            ttl (float): Seconds a claimed token is remembered.
+            max_size (int): Maximum number of remembered tokens.
+        """
+        self._claimed: TTLCache[bool] = TTLCache(ttl=ttl, max_size=max_size)
+
+    @staticmethod
+    def new_token() -> str:
+        """
+        Returns a fresh token identifying one basket.
+        """
+        return uuid.uuid4().hex
+
+    def claim(self, token: str) -> bool:
+        """
+        Claims a token for processing. The check and the write happen without awaiting,
+        so two concurrent deliveries of the same callback cannot both succeed.
+
+        Returns:
+            bool: True for the first delivery, False for a duplicate.
+        """
+        metrics.inc("order_confirm_attempts_total")
+        if token in self._claimed:
+            metrics.inc("order_confirm_duplicates_total", layer="memory")
+            return False
+        self._claimed.set(token, True)
+        return True
+
+    def release(self, token: str) -> None:
+        """
+        Forgets a token whose order was not created, so the customer can retry.
+        """
+        self._claimed.pop(token)
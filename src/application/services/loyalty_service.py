@@ -0,0 +1,83 @@
+from typing import Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.application.loyalty_balances import LoyaltyBalanceCache
+from src.application.metrics import metrics
+from src.application.services.product_service import ProductService
+from src.domain.entities.loyalty import LoyaltyEntry
+from src.domain.entities.order import Order as DomainOrder, OrderItem as DomainOrderItem
+from src.domain.repositories.loyalty_repository import AbstractLoyaltyRepository
+from src.infrastructure.database.repositories.loyalty_repository import SQLAlchemyLoyaltyRepository
+
+
+class LoyaltyService:
+    """
+    Awards loyalty points for completed orders and reports balances.
+
+    Points are appended to a ledger in the same transaction that completes the order, together with an
+    increment of the user's stored balance, so a balance is one primary key lookup and never a sum over
+    the ledger. With a balance cache it is not even that, until the next entry invalidates it.
+    How many points a drink earns is set per product in the menu ("loyalty_points").
+    """
+    def __init__(self, session: AsyncSession, product_service: ProductService,
+                 balance_cache: Optional[LoyaltyBalanceCache] = None,
+                 loyalty_repository: Optional[AbstractLoyaltyRepository] = None):
+        """
+        Initializes the LoyaltyService with an AsyncSession.
+        Args:
+            session (AsyncSession): The SQLAlchemy async session.
+            product_service (ProductService): Source of the per-product earn rules.
+            balance_cache (Optional[LoyaltyBalanceCache]): Balance cache shared between requests, if enabled.
+            loyalty_repository (Optional[AbstractLoyaltyRepository]): Repository to use instead of the SQLAlchemy one.
+        """
+        self.product_service = product_service
+        self.balance_cache = balance_cache
+        self.loyalty_repository: AbstractLoyaltyRepository = loyalty_repository or SQLAlchemyLoyaltyRepository(session)
+
+    async def points_for(self, items: List[DomainOrderItem], shop_id: Optional[int] = None) -> int:
+        """
+        Calculates the points a set of drinks earns under the shop's current menu.
+        """
+        rules: Dict[str, int] = {product.name: product.loyalty_points for product in await self.product_service.get_all_products(shop_id)}
+        return sum(rules.get(item.product_name, 0) * item.quantity for item in items)
+
+    async def record_completed(self, order: DomainOrder) -> int:
+        """
+        Adds the points of a just completed order to the ledger and the balance. The caller commits
+        and then calls invalidate().
+
+        Returns:
+            int: The points earned.
+        """
+        points = await self.points_for(order.items, order.shop_id)
+        if points:
+            await self.loyalty_repository.add(LoyaltyEntry(user_id=order.user_id, points=points, order_id=order.id))
+        return points
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        Drops a cached balance after new ledger entries of the user were committed.
+        """
+        if self.balance_cache is not None:
+            self.balance_cache.invalidate(user_id)
+
+    async def get_balance(self, user_id: int) -> int:
+        """
+        Retrieves the user's points, from the cache when possible.
+        """
+        if self.balance_cache is None:
+            return await self.loyalty_repository.get_balance(user_id)
+        balance = self.balance_cache.get(user_id)
+        if balance is not None:
+            metrics.inc("loyalty_balance_cache_hits_total")
+            return balance
+        metrics.inc("loyalty_balance_cache_misses_total")
+        version = self.balance_cache.version
+        balance = await self.loyalty_repository.get_balance(user_id)
+        self.balance_cache.put(user_id, balance, version)
+        return balance
+
+    async def get_history(self, user_id: int, limit: int = 5) -> List[LoyaltyEntry]:
+        """
+        Retrieves the user's latest ledger entries, newest first.
+        """
+        return await self.loyalty_repository.get_entries(user_id, limit)
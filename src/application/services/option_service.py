@@ -9,22 +9,24 @@ class OptionService:
     def __init__(self, option_repository: AbstractOptionRepository):
         self.option_repository = option_repository
 
-    async def get_options_by_category(self, category: str) -> List[Option]:
+    async def get_options_by_category(self, category: str, shop_id: Optional[int] = None) -> List[Option]:
         """
         Retrieves all options for a given category.
         Args:
             category (str): The category of options to retrieve.
+            shop_id (Optional[int]): The shop whose options to use; the base ones if None.
         Returns:
             List[Option]: A list of options.
         """
-        return await self.option_repository.get_all_by_category(category)
+        return await self.option_repository.get_all_by_category(category, shop_id)
 
-    async def get_option_by_id(self, option_id: int) -> Optional[Option]:
+    async def get_option_by_id(self, option_id: int, shop_id: Optional[int] = None) -> Optional[Option]:
         """
         Retrieves an option by its ID.
         Args:
             option_id (int): The unique identifier of the option.
+            shop_id (Optional[int]): The shop whose options to use; the base ones if None.
         Returns:
             Optional[Option]: The Option object if found, otherwise None.
         """
-        return await self.option_repository.get_by_id(option_id)
\ No newline at end of file
+        return await self.option_repository.get_by_id(option_id, shop_id)
\ No newline at end of file
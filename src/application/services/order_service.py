@@ -1,88 +1,302 @@
-from typing import Dict, Any, List, Optional
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.application.circuit_breaker import CircuitBreaker
+from src.application.metrics import metrics
 from src.application.services.product_service import ProductService
 from src.application.services.option_service import OptionService
-from src.domain.entities.order import Order as DomainOrder, OrderStatus
+from src.application.services.slot_service import PickupSlotScheduler, SlotUnavailableError
+from src.application.services.reminder_service import ReminderService
+from src.application.services.sales_service import SalesService
+from src.application.services.loyalty_service import LoyaltyService
+from src.application.time_utils import get_pickup_time_parser, to_shop_time
+from src.application.active_orders import ActiveOrderIndex
+from src.application.cart import CartLine, add_to_cart, get_cart
+from src.application.shops import ShopRegistry
+from src.domain.entities.order import Order as DomainOrder, OrderItem as DomainOrderItem, OrderStatus
+from src.domain.entities.shop import Shop
 from src.domain.repositories.order_repository import AbstractOrderRepository
+from src.infrastructure.database.order_journal import OrderJournal, is_db_outage
+from src.infrastructure.database.order_writer import OrderBatchWriter
 from src.infrastructure.database.repositories.order_repository import SQLAlchemyOrderRepository # Use SQLAlchemy repo
 
+@dataclass
+class OrderHistoryPage:
+    """
+    One page of a user's orders, newest first, with flags for the pages around it.
+    """
+    orders: List[DomainOrder]
+    has_newer: bool
+    has_older: bool
+
+
+class DuplicateOrderError(Exception):
+    """
+    Raised when a confirmation with an already used basket token reaches the database.
+    """
+    def __init__(self, order: DomainOrder):
+        super().__init__(f"Order #{order.id} has already been created for this basket.")
+        self.order = order
+
+
 class OrderService:
     """
     Service for calculating order details and managing orders.
     """
-    def __init__(self, session: AsyncSession, product_service: ProductService, option_service: OptionService):
+    def __init__(self, session: AsyncSession, product_service: ProductService, option_service: OptionService,
+                 slot_scheduler: Optional[PickupSlotScheduler] = None,
+                 reminder_service: Optional[ReminderService] = None,
+                 order_writer: Optional[OrderBatchWriter] = None,
+                 order_repository: Optional[AbstractOrderRepository] = None,
+                 sales_service: Optional[SalesService] = None,
+                 active_orders: Optional[ActiveOrderIndex] = None,
+                 loyalty_service: Optional[LoyaltyService] = None,
+                 order_journal: Optional[OrderJournal] = None,
+                 order_breaker: Optional[CircuitBreaker] = None,
+                 forward_closed: Optional[Callable[[DomainOrder], bool]] = None):
         """
         Initializes the OrderService with an AsyncSession and other services.
         Args:
             session (AsyncSession): The SQLAlchemy async session.
             product_service (ProductService): Service for product-related operations.
             option_service (OptionService): Service for option-related operations.
+            slot_scheduler (Optional[PickupSlotScheduler]): Pickup slot capacity tracker, if enabled.
+            reminder_service (Optional[ReminderService]): Pickup reminder and expiry timers, if enabled.
+            order_writer (Optional[OrderBatchWriter]): Group-commit writer for new orders, if enabled.
+            order_repository (Optional[AbstractOrderRepository]): Repository to use instead of the SQLAlchemy one.
+            sales_service (Optional[SalesService]): Sales rollups to update on completion; built from the session by default.
+            active_orders (Optional[ActiveOrderIndex]): In-memory index of active orders; when given, queue reads are served from it.
+            loyalty_service (Optional[LoyaltyService]): Loyalty points to award on completion; built from the session by default.
+            order_journal (Optional[OrderJournal]): Local journal that takes new orders while the database is unavailable, if enabled.
+            order_breaker (Optional[CircuitBreaker]): Breaker around order writes; required with order_journal.
+            forward_closed (Optional[Callable[[DomainOrder], bool]]): With sharded workers, hands a closed order to the
+                worker that holds its slot capacity and timers; returns False for orders of this worker.
         """
         self.session = session
         self.product_service = product_service
         self.option_service = option_service
-        self.order_repository: AbstractOrderRepository = SQLAlchemyOrderRepository(session) # Create repo inside service
+        self.slot_scheduler = slot_scheduler
+        self.reminder_service = reminder_service
+        self.order_writer = order_writer
+        self.order_repository: AbstractOrderRepository = order_repository or SQLAlchemyOrderRepository(session)
+        self.sales_service = sales_service or SalesService(session)
+        self.active_orders = active_orders
+        self.loyalty_service = loyalty_service or LoyaltyService(session, product_service)
+        self.order_journal = order_journal
+        self.order_breaker = order_breaker
+        self.forward_closed = forward_closed
 
-    async def calculate_total(self, order_data: Dict[str, Any]) -> int:
+    async def build_item(self, line: CartLine, shop_id: Optional[int] = None) -> DomainOrderItem:
+        """
+        Resolves names and the unit price of one cart line from the shop's menu.
+        """
+        product = await self.product_service.get_product_by_id(line.product_id, shop_id)
+        milk = await self.option_service.get_option_by_id(line.milk_id, shop_id) if line.milk_id else None
+        syrup = await self.option_service.get_option_by_id(line.syrup_id, shop_id) if line.syrup_id else None
+
+        unit_price = await self.product_service.get_price(line.product_id, line.volume, shop_id) or 0
+        if milk:
+            unit_price += milk.price
+        if syrup:
+            unit_price += syrup.price
+
+        return DomainOrderItem(
+            product_name=product.name if product else "Unknown Product",
+            volume=line.volume,
+            quantity=line.quantity,
+            unit_price=unit_price,
+            milk_name=milk.name if milk else None,
+            syrup_name=syrup.name if syrup else None,
+        )
+
+    async def build_items(self, cart: List[CartLine], shop_id: Optional[int] = None) -> List[DomainOrderItem]:
         """
-        Calculates the total price of an order based on the selected items.
+        Resolves all cart lines into order items, priced by the shop's menu.
         """
-        total_price = 0
-        quantity = order_data.get("quantity", 1)
+        return [await self.build_item(line, shop_id) for line in cart]
 
-        product = await self.product_service.get_product_by_id(order_data.get("product_id"))
-        if product:
-            selected_volume = order_data.get("volume")
-            for volume in product.volumes:
-                if volume.volume == selected_volume:
-                    total_price += volume.price
-                    break
-        
-        milk_id = order_data.get("milk_id")
-        if milk_id:
-            milk = await self.option_service.get_option_by_id(milk_id)
-            if milk:
-                total_price += milk.price
+    async def available_lines(self, cart: List[CartLine], shop_id: Optional[int] = None) -> List[CartLine]:
+        """
+        Drops the lines of a saved cart whose drink, volume or options are no longer on the shop's menu.
+        """
+        available = []
+        for line in cart:
+            if await self.product_service.get_price(line.product_id, line.volume, shop_id) is None:
+                continue
+            if line.milk_id and not await self.option_service.get_option_by_id(line.milk_id, shop_id):
+                continue
+            if line.syrup_id and not await self.option_service.get_option_by_id(line.syrup_id, shop_id):
+                continue
+            available.append(line)
+        return available
 
-        syrup_id = order_data.get("syrup_id")
-        if syrup_id:
-            syrup = await self.option_service.get_option_by_id(syrup_id)
-            if syrup:
-                total_price += syrup.price
-        
-        return total_price * quantity
+    async def cart_from_order(self, order: DomainOrder) -> List[CartLine]:
+        """
+        Rebuilds a cart from a stored order by matching its drinks and options against the shop's current menu by name.
+        Drinks that are no longer on the menu are left out; prices are those of the current menu.
+        """
+        products = {product.name: product for product in await self.product_service.get_all_products(order.shop_id)}
+        milks = {option.name: option.id for option in await self.option_service.get_options_by_category("milk", order.shop_id)}
+        syrups = {option.name: option.id for option in await self.option_service.get_options_by_category("syrups", order.shop_id)}
+        cart = []
+        for item in order.items:
+            product = products.get(item.product_name)
+            if not product or item.volume not in (volume.volume for volume in product.volumes):
+                continue
+            if (item.milk_name and item.milk_name not in milks) or (item.syrup_name and item.syrup_name not in syrups):
+                continue
+            cart = add_to_cart(cart, CartLine(
+                product.id, item.volume, milks.get(item.milk_name), syrups.get(item.syrup_name), item.quantity
+            ))
+        return cart
 
-    async def create_order(self, order_data: Dict[str, Any]) -> DomainOrder:
+    async def calculate_total(self, order_data: Dict[str, Any]) -> int:
         """
-        Creates and saves a new order to the database.
+        Calculates the total price of all drinks in the cart at the selected shop's prices.
         """
-        # Fetch names for summary
-        product = await self.product_service.get_product_by_id(order_data.get("product_id"))
-        milk = await self.option_service.get_option_by_id(order_data.get("milk_id")) if order_data.get("milk_id") else None
-        syrup = await self.option_service.get_option_by_id(order_data.get("syrup_id")) if order_data.get("syrup_id") else None
+        items = await self.build_items(get_cart(order_data), order_data.get("shop_id"))
+        return sum(item.total_price for item in items)
 
-        total_price = await self.calculate_total(order_data)
+    async def create_order(self, order_data: Dict[str, Any], shop: Shop) -> DomainOrder:
+        """
+        Creates and saves a new order with all cart items to the database in one transaction.
+        Reserves pickup slot capacity first and raises SlotUnavailableError if the slot is full.
+        Raises DuplicateOrderError if an order with the same basket token already exists.
+        With the journal enabled, an order the database cannot take is journaled instead and returned without an ID.
+
+        Args:
+            order_data (Dict[str, Any]): FSM data of the order with the cart, pickup time and user ID.
+            shop (Shop): The coffee shop the order is placed in.
+        """
+        items = await self.build_items(get_cart(order_data), shop.id)
+        if not items:
+            raise ValueError("Cannot create an order with an empty cart.")
+        shop_id, quantity = shop.id, sum(item.quantity for item in items)
+
+        # Whole seconds, as DATETIME stores them, so the in-memory order equals the one read back
+        pickup_at = datetime.fromisoformat(order_data["pickup_at"]).replace(microsecond=0)
+        if self.slot_scheduler:
+            if not self.slot_scheduler.reserve(shop_id, pickup_at, quantity):
+                # Only times the pickup time parser accepts, so the customer can book the suggestion
+                earliest = get_pickup_time_parser(shop.timezone).earliest()
+                suggestion = self.slot_scheduler.suggest_slot(shop_id, pickup_at, quantity, not_before=earliest)
+                raise SlotUnavailableError(shop_id, pickup_at, suggestion)
 
         new_order = DomainOrder(
             user_id=order_data["user_id"],
-            address=order_data["address"],
-            product_name=product.name if product else "Unknown Product",
-            volume=order_data["volume"],
-            quantity=order_data["quantity"],
-            milk_name=milk.name if milk else None,
-            syrup_name=syrup.name if syrup else None,
-            pickup_time=order_data["pickup_time"],
-            total_price=total_price,
+            shop_id=shop_id,
+            address=shop.address,
+            quantity=quantity,
+            items=items,
+            pickup_time=pickup_at,
+            total_price=sum(item.total_price for item in items),
+            idempotency_key=order_data.get("basket_token"),
         )
-        await self.order_repository.add(new_order)
+        # While the database is known to be down, orders go to the journal at once instead of waiting for a timeout
+        if self.order_journal and not self.order_breaker.allow():
+            return await self._journal(new_order)
+        try:
+            if self.order_writer:
+                await self.order_writer.add(new_order)
+            else:
+                await self.order_repository.add(new_order)
+        except IntegrityError:
+            if self.slot_scheduler:
+                self.slot_scheduler.release(shop_id, pickup_at, quantity)
+            if not new_order.idempotency_key:
+                raise
+            # The unique key caught a replay the in-memory guard did not see (e.g. after a restart)
+            await self.session.rollback()
+            existing = await self.order_repository.get_by_idempotency_key(new_order.idempotency_key)
+            if not existing:
+                raise
+            metrics.inc("order_confirm_duplicates_total", layer="db")
+            raise DuplicateOrderError(existing)
+        except Exception as e:
+            if self.order_journal and is_db_outage(e):
+                self.order_breaker.record_failure()
+                with suppress(Exception):
+                    await self.session.rollback()  # The session is still used for the rest of the update
+                return await self._journal(new_order)
+            if self.slot_scheduler:
+                self.slot_scheduler.release(shop_id, pickup_at, quantity)
+            raise
+        if self.order_breaker:
+            self.order_breaker.record_success()
+        if self.reminder_service:
+            self.reminder_service.track(new_order)
+        if self.active_orders is not None:
+            self.active_orders.upsert(new_order)
         return new_order
 
+    async def _journal(self, order: DomainOrder) -> DomainOrder:
+        """
+        Durably stores an order the database could not take; it is written once the database is back.
+        Its pickup slot stays reserved.
+        """
+        order.id = None
+        try:
+            await self.order_journal.append(order)
+        except Exception:
+            if self.slot_scheduler:
+                self.slot_scheduler.release(order.shop_id, order.pickup_time, order.quantity)
+            raise
+        metrics.inc("orders_journaled_total")
+        return order
+
     async def get_active_orders(self) -> List[DomainOrder]:
         """
-        Retrieves all active orders from the database.
+        Retrieves all active orders, from the in-memory index when there is one.
         """
+        if self.active_orders is not None:
+            return self.active_orders.all()
         return await self.order_repository.get_active_orders()
 
+    async def get_due_soon_orders(self, shop_id: int, within: timedelta = timedelta(minutes=15)) -> List[DomainOrder]:
+        """
+        Retrieves active orders of a shop that are due within the given time, earliest first.
+        """
+        now = datetime.now(timezone.utc)
+        if self.active_orders is not None:
+            return self.active_orders.due(shop_id, now, now + within)
+        return await self.order_repository.get_due_orders(shop_id, now, now + within)
+
+    async def get_overdue_orders(self, shop_id: int) -> List[DomainOrder]:
+        """
+        Retrieves active orders of a shop whose pickup time has already passed.
+        """
+        if self.active_orders is not None:
+            return self.active_orders.overdue(shop_id, datetime.now(timezone.utc))
+        return await self.order_repository.get_overdue_orders(shop_id, datetime.now(timezone.utc))
+
+    async def assign_shop_ids(self, shops: ShopRegistry) -> int:
+        """
+        Links orders placed before shops had IDs to their shop by address.
+        """
+        return await self.order_repository.assign_shop_ids({shop.address: shop.id for shop in shops})
+
+    async def get_last_order(self, user_id: int) -> Optional[DomainOrder]:
+        """
+        Retrieves the most recent order of a user.
+        """
+        return await self.order_repository.get_last_by_user(user_id)
+
+    async def get_order_history(self, user_id: int, cursor: Optional[Tuple[datetime, int]] = None, newer: bool = False,
+                                page_size: int = 5) -> OrderHistoryPage:
+        """
+        Retrieves a page of a user's orders next to a (created_at, id) cursor: the older ones by default,
+        the newer ones if `newer` is set, or the newest page without a cursor.
+        """
+        # One extra order tells whether there is another page in the direction of travel
+        orders = await self.order_repository.get_page_by_user(user_id, cursor, page_size + 1, newer)
+        more = len(orders) > page_size
+        if newer:
+            return OrderHistoryPage(orders[-page_size:], has_newer=more, has_older=True)
+        return OrderHistoryPage(orders[:page_size], has_newer=cursor is not None, has_older=more)
+
     async def get_order_by_id(self, order_id: int) -> Optional[DomainOrder]:
         """
         Retrieves an order by its ID.
@@ -97,17 +311,58 @@ class OrderService:
         if order:
             order.status = new_status
             await self.order_repository.update(order)
+            if self.active_orders is not None:
+                self.active_orders.upsert(order)
             return order
         return None
 
     async def complete_order(self, order_id: int) -> Optional[DomainOrder]:
         """
-        Marks an order as completed.
+        Marks an order as completed, frees its pickup slot, adds it to the sales rollups and awards its loyalty points.
         """
         order = await self.order_repository.get_by_id(order_id)
+        if order and order.is_completed:
+            # Already done (possibly archived by now), nothing to update
+            return order
         if order:
+            was_active = self._is_active(order)
             order.status = OrderStatus.COMPLETED
             order.is_completed = True
+            # The rollup increment and the loyalty points are committed together with the status change
+            await self.sales_service.record_completed(order)
+            await self.loyalty_service.record_completed(order)
             await self.order_repository.update(order)
+            self.loyalty_service.invalidate(order.user_id)
+            if was_active:
+                self._on_closed(order)
             return order
-        return None
\ No newline at end of file
+        return None
+
+    async def cancel_order(self, order_id: int) -> Optional[DomainOrder]:
+        """
+        Marks an active order as cancelled and frees its pickup slot.
+        Returns None if the order does not exist or has already been closed.
+        """
+        order = await self.order_repository.get_by_id(order_id)
+        if order and self._is_active(order):
+            order.status = OrderStatus.CANCELLED
+            await self.order_repository.update(order)
+            self._on_closed(order)
+            return order
+        return None
+
+    @staticmethod
+    def _is_active(order: DomainOrder) -> bool:
+        """Checks whether the order still holds slot capacity and timers."""
+        return not order.is_completed and order.status != OrderStatus.CANCELLED
+
+    def _on_closed(self, order: DomainOrder) -> None:
+        """Returns the order's drinks to the pickup slot, drops its timers and takes it out of the active index."""
+        if self.active_orders is not None:
+            self.active_orders.remove(order.id)
+        if self.forward_closed and self.forward_closed(order):
+            return  # Capacity and timers are held by the customer's worker, which releases them
+        if self.slot_scheduler:
+            self.slot_scheduler.release(order.shop_id, to_shop_time(order.pickup_time, order.shop_id), order.quantity)
+        if self.reminder_service:
+            self.reminder_service.forget(order.id)
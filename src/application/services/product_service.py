@@ -14,20 +14,35 @@ class ProductService:
         """
         self.product_repository = product_repository
 
-    async def get_all_products(self) -> List[Product]:
+    async def get_all_products(self, shop_id: Optional[int] = None) -> List[Product]:
         """
         Retrieves all products.
+        Args:
+            shop_id (Optional[int]): The shop whose menu to use; the base menu if None.
         Returns:
             List[Product]: A list of all products.
         """
-        return await self.product_repository.get_all()
+        return await self.product_repository.get_all(shop_id)
 
-    async def get_product_by_id(self, product_id: int) -> Optional[Product]:
+    async def get_product_by_id(self, product_id: int, shop_id: Optional[int] = None) -> Optional[Product]:
         """
         Retrieves a product by its ID.
         Args:
             product_id (int): The unique identifier of the product.
+            shop_id (Optional[int]): The shop whose menu to use; the base menu if None.
         Returns:
             Optional[Product]: The Product object if found, otherwise None.
         """
-        return await self.product_repository.get_by_id(product_id)
+        return await self.product_repository.get_by_id(product_id, shop_id)
+
+    async def get_price(self, product_id: int, volume: str, shop_id: Optional[int] = None) -> Optional[int]:
+        """
+        Retrieves the price of one volume of a product from the shop's precomputed price table.
+        Args:
+            product_id (int): The unique identifier of the product.
+            volume (str): The volume, e.g. "250мл".
+            shop_id (Optional[int]): The shop whose menu to use; the base menu if None.
+        Returns:
+            Optional[int]: The price, or None if the shop does not sell that volume.
+        """
+        return await self.product_repository.get_price(product_id, volume, shop_id)
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from typing import Awaitable, Callable, Iterable, Optional
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from src.application.scheduler import TimerQueue
+from src.application.shops import ShopRegistry
+from src.application.time_utils import to_shop_time
+from src.domain.entities.order import Order as DomainOrder
+
+
+class ReminderService:
+    """
+    Schedules pickup reminders for customers and auto-expiry of orders nobody closed.
+
+    Timers live in a TimerQueue keyed by order ID, so creating, completing or cancelling an order
+    is an O(log n) heap operation and the database is never polled per order.
+    """
+    def __init__(
+        self,
+        bot: Bot,
+        timer_queue: TimerQueue,
+        expire_order: Callable[[int], Awaitable[Optional[DomainOrder]]],
+        remind_before: timedelta = timedelta(minutes=5),
+        expire_after: timedelta = timedelta(minutes=60),
+        shops: Optional[ShopRegistry] = None,
+    ):
+        """
+        Args:
+            bot (Bot): Bot used to send reminders.
+            timer_queue (TimerQueue): The scheduler that fires the jobs.
+            expire_order (Callable[[int], Awaitable[Optional[DomainOrder]]]): Cancels a stale order by ID.
+            remind_before (timedelta): How long before the pickup time the customer is reminded.
+            expire_after (timedelta): How long after the pickup time an open order is cancelled.
+            shops (Optional[ShopRegistry]): Shops whose admins are told about expired orders.
+        """
+        self.bot = bot
+        self.timer_queue = timer_queue
+        self.expire_order = expire_order
+        self.remind_before = remind_before
+        self.expire_after = expire_after
+        self.shops = shops
+
+    def track(self, order: DomainOrder) -> None:
+        """
+        Schedules the reminder and the expiry for a new or reloaded order.
+        """
+        pickup_dt = order.pickup_time
+        remind_at = pickup_dt - self.remind_before
+        if remind_at > self.timer_queue.clock():
+            self.timer_queue.schedule(("remind", order.id), remind_at, lambda: self._remind(order))
+        self.timer_queue.schedule(("expire", order.id), pickup_dt + self.expire_after, lambda: self._expire(order.id))
+
+    def forget(self, order_id: int) -> None:
+        """
+        Drops all timers of an order that has been completed or cancelled.
+        """
+        self.timer_queue.cancel(("remind", order_id))
+        self.timer_queue.cancel(("expire", order_id))
+
+    def load(self, orders: Iterable[DomainOrder]) -> None:
+        """
+        Rebuilds timers from the active orders stored in the database.
+        Expiry jobs that are already overdue fire on the first scheduler tick.
+        """
+        for order in orders:
+            self.track(order)
+
+    async def _remind(self, order: DomainOrder) -> None:
+        await self.bot.send_message(
+            chat_id=order.user_id,
+            text=f"Напоминаем: ваш заказ #{order.id} будет ждать вас к {to_shop_time(order.pickup_time, order.shop_id):%H:%M} по адресу {order.address} ☕️"
+        )
+
+    async def _expire(self, order_id: int) -> None:
+        order = await self.expire_order(order_id)
+        if not order:
+            return
+        print(f"Order #{order_id} expired: nobody closed it after the pickup time.")
+        pickup = f"{to_shop_time(order.pickup_time, order.shop_id):%H:%M}"
+        await self._notify(
+            order.user_id,
+            f"Ваш заказ #{order.id} к {pickup} по адресу {order.address} отменён: его не забрали вовремя. "
+            f"Если вы всё ещё хотите кофе, оформите, пожалуйста, новый заказ ☕️",
+        )
+        shop = self.shops.get(order.shop_id) if self.shops else None
+        if shop and shop.admin_id:
+            await self._notify(shop.admin_id, f"Заказ #{order.id} к {pickup} автоматически отменён: его не забрали вовремя.")
+
+    async def _notify(self, chat_id: int, text: str) -> None:
+        # One recipient failing (e.g. a customer who blocked the bot) must not keep the other from being told
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=text)
+        except TelegramAPIError as e:
+            print(f"Could not notify chat {chat_id} about an expired order: {e}")
@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.application.time_utils import to_shop_time
+from src.domain.entities.order import Order as DomainOrder
+from src.domain.entities.sales import ProductSales, SalesRollup
+from src.domain.repositories.sales_repository import AbstractSalesRepository
+from src.infrastructure.database.repositories.sales_repository import SQLAlchemySalesRepository
+
+
+@dataclass
+class ShopSalesReport:
+    """
+    Sales of one shop for today and for the last `days` days.
+    """
+    shop_id: int
+    days: int
+    drinks: int
+    revenue: int
+    today_drinks: int
+    today_revenue: int
+    top_products: List[ProductSales]
+    peak_hour: Optional[Tuple[int, int]]  # (hour, drinks) of today's busiest hour
+
+
+class SalesService:
+    """
+    Maintains hourly sales rollups per shop and product and builds reports from them.
+
+    Completed orders are added to their rollup rows in the same transaction that completes them;
+    refresh() periodically recomputes recent days from the orders themselves to correct any drift.
+    Reports read only the rollups, so their cost does not grow with the order history.
+    """
+    def __init__(self, session: AsyncSession, sales_repository: Optional[AbstractSalesRepository] = None):
+        """
+        Initializes the SalesService with an AsyncSession.
+        Args:
+            session (AsyncSession): The SQLAlchemy async session.
+            sales_repository (Optional[AbstractSalesRepository]): Repository to use instead of the SQLAlchemy one.
+        """
+        self.sales_repository: AbstractSalesRepository = sales_repository or SQLAlchemySalesRepository(session)
+
+    @staticmethod
+    def rollups_for(order: DomainOrder) -> List[SalesRollup]:
+        """
+        Splits an order into rollup increments, one per product.
+        """
+        local = to_shop_time(order.pickup_time, order.shop_id)
+        rollups: Dict[str, SalesRollup] = {}
+        for item in order.items:
+            rollup = rollups.get(item.product_name)
+            if rollup is None:
+                rollup = rollups[item.product_name] = SalesRollup(
+                    order.shop_id, local.date(), local.hour, item.product_name, orders_count=1
+                )
+            rollup.drinks += item.quantity
+            rollup.revenue += item.total_price
+        return list(rollups.values())
+
+    async def record_completed(self, order: DomainOrder) -> None:
+        """
+        Adds a just completed order to the rollups. The caller commits.
+        """
+        await self.sales_repository.add(self.rollups_for(order))
+
+    async def refresh(self, days: Optional[int] = 2) -> int:
+        """
+        Recomputes the rollups of the last `days` days, or of the whole history if days is None.
+
+        Returns:
+            int: The number of rollup rows written.
+        """
+        since, since_day = None, None
+        if days is not None:
+            now = datetime.now(timezone.utc)
+            since_day = now.date() - timedelta(days=days)
+            # Two extra days cover the start of since_day in any shop time zone
+            since = now - timedelta(days=days + 2)
+
+        # The database groups by UTC hour; shift each group into its shop's local day and hour.
+        # This assumes whole-hour UTC offsets, which holds for every Russian time zone.
+        rollups: Dict[tuple, SalesRollup] = {}
+        for utc_rollup in await self.sales_repository.aggregate_completed_orders(since):
+            moment = datetime.combine(utc_rollup.day, time(utc_rollup.hour), tzinfo=timezone.utc)
+            local = to_shop_time(moment, utc_rollup.shop_id)
+            if since_day and local.date() < since_day:
+                continue
+            key = (utc_rollup.shop_id, local.date(), local.hour, utc_rollup.product_name)
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = SalesRollup(*key)
+            rollup.orders_count += utc_rollup.orders_count
+            rollup.drinks += utc_rollup.drinks
+            rollup.revenue += utc_rollup.revenue
+
+        await self.sales_repository.replace_since(since_day, list(rollups.values()))
+        return len(rollups)
+
+    async def refresh_if_empty(self) -> None:
+        """
+        Builds the rollups from the whole history on the first start.
+        """
+        if await self.sales_repository.is_empty():
+            await self.refresh(days=None)
+
+    async def get_shop_report(self, shop_id: int, days: int = 7, top: int = 5) -> ShopSalesReport:
+        """
+        Builds the sales report of a shop from the rollups.
+        """
+        today = to_shop_time(datetime.now(timezone.utc), shop_id).date()
+        products = await self.sales_repository.get_product_sales(shop_id, today - timedelta(days=days - 1), today)
+        today_products = await self.sales_repository.get_product_sales(shop_id, today, today)
+        hourly = await self.sales_repository.get_hourly_drinks(shop_id, today)
+        return ShopSalesReport(
+            shop_id=shop_id,
+            days=days,
+            drinks=sum(product.drinks for product in products),
+            revenue=sum(product.revenue for product in products),
+            today_drinks=sum(product.drinks for product in today_products),
+            today_revenue=sum(product.revenue for product in today_products),
+            top_products=products[:top],
+            peak_hour=max(hourly, key=lambda pair: pair[1]) if hourly else None,
+        )
@@ -0,0 +1,249 @@
+from datetime import datetime, timedelta
+from typing import ContextManager, Dict, Iterable, List, MutableMapping, Optional, Tuple
+from src.domain.entities.order import Order as DomainOrder
+from src.application.time_utils import to_shop_time
+
+
+class SlotUnavailableError(Exception):
+    """
+    Raised when the requested pickup slot has no capacity left.
+    """
+    def __init__(self, shop_id: int, pickup_time: datetime, suggestion: Optional[datetime]):
+        super().__init__(f"Pickup slot {pickup_time:%H:%M} at shop {shop_id} is full.")
+        self.shop_id = shop_id
+        self.pickup_time = pickup_time
+        self.suggestion = suggestion
+
+
+SlotKey = Tuple[int, datetime]  # (shop ID, start of the slot in shop time)
+
+
+class SlotCounters:
+    """
+    Drinks reserved per pickup slot, counted in this process.
+    """
+    def __init__(self):
+        self._slots: Dict[int, Dict[datetime, int]] = {}
+
+    def used(self, shop_id: int, slot: datetime) -> int:
+        return self._slots.get(shop_id, {}).get(slot, 0)
+
+    def reserve(self, shop_id: int, slot: datetime, quantity: int, capacity: int) -> bool:
+        """
+        Adds quantity to the slot if it stays within capacity.
+        """
+        if self.used(shop_id, slot) + quantity > capacity:
+            return False
+        shop_slots = self._slots.setdefault(shop_id, {})
+        shop_slots[slot] = shop_slots.get(slot, 0) + quantity
+        return True
+
+    def release(self, shop_id: int, slot: datetime, quantity: int) -> None:
+        shop_slots = self._slots.get(shop_id)
+        if not shop_slots:
+            return
+        remaining = shop_slots.get(slot, 0) - quantity
+        if remaining > 0:
+            shop_slots[slot] = remaining
+        else:
+            shop_slots.pop(slot, None)
+
+    def prune(self, cutoff: datetime) -> None:
+        """
+        Drops the counters of slots that started at or before cutoff.
+        """
+        for shop_slots in self._slots.values():
+            for slot in [slot for slot in shop_slots if slot <= cutoff]:
+                del shop_slots[slot]
+
+    def replace(self, counts: Dict[SlotKey, int]) -> None:
+        """
+        Replaces all counters with the given ones.
+        """
+        self._slots = {}
+        for (shop_id, slot), quantity in counts.items():
+            self._slots.setdefault(shop_id, {})[slot] = quantity
+
+
+class SharedSlotCounters(SlotCounters):
+    """
+    Slot counters shared by all sharded workers, so a slot's capacity is checked against every worker's orders.
+
+    The store maps a slot to a list with the drinks every worker reserved in it; a worker only changes its own
+    entry, so after a restart it can rebuild its reservations without touching the others'. The store is
+    typically a multiprocessing.Manager dict and the lock a multiprocessing lock: every call is a short
+    blocking round trip to the manager process, which keeps a check and its reservation atomic across workers.
+    """
+    def __init__(self, store: MutableMapping[SlotKey, List[int]], lock: ContextManager, index: int, workers: int):
+        """
+        Args:
+            store (MutableMapping[SlotKey, List[int]]): The counters shared by all workers.
+            lock (ContextManager): Lock shared by all workers that guards the store.
+            index (int): Index of the worker using these counters.
+            workers (int): Number of workers.
+        """
+        self.store = store
+        self.lock = lock
+        self.index = index
+        self.workers = workers
+
+    def used(self, shop_id: int, slot: datetime) -> int:
+        return sum(self.store.get((shop_id, slot), ()))
+
+    def reserve(self, shop_id: int, slot: datetime, quantity: int, capacity: int) -> bool:
+        with self.lock:
+            counts = self.store.get((shop_id, slot)) or [0] * self.workers
+            if sum(counts) + quantity > capacity:
+                return False
+            counts[self.index] += quantity
+            self.store[(shop_id, slot)] = counts
+            return True
+
+    def release(self, shop_id: int, slot: datetime, quantity: int) -> None:
+        with self.lock:
+            counts = self.store.get((shop_id, slot))
+            if not counts:
+                return
+            counts[self.index] = max(0, counts[self.index] - quantity)
+            if any(counts):
+                self.store[(shop_id, slot)] = counts
+            else:
+                self.store.pop((shop_id, slot), None)
+
+    def prune(self, cutoff: datetime) -> None:
+        with self.lock:
+            for key in [key for key in self.store.keys() if key[1] <= cutoff]:
+                self.store.pop(key, None)
+
+    def replace(self, counts: Dict[SlotKey, int]) -> None:
+        """
+        Replaces this worker's reservations; those of the other workers are kept.
+        """
+        with self.lock:
+            for key in list(self.store.keys()):
+                shared = self.store.get(key)
+                if shared and shared[self.index]:
+                    shared[self.index] = 0
+                    if any(shared):
+                        self.store[key] = shared
+                    else:
+                        self.store.pop(key, None)
+            for key, quantity in counts.items():
+                shared = self.store.get(key) or [0] * self.workers
+                shared[self.index] += quantity
+                self.store[key] = shared
+
+
+class PickupSlotScheduler:
+    """
+    Keeps track of how many drinks every coffee shop has promised for each pickup interval.
+
+    Capacity is counted in drinks per interval. Counters live in a dict per shop keyed by the
+    start of the interval, so checks and reservations are O(1). All methods are synchronous,
+    which makes a reservation atomic with respect to other handlers running on the event loop.
+    Sharded workers pass SharedSlotCounters, so the whole capacity is counted in one place.
+    """
+    def __init__(
+        self,
+        interval_minutes: int = 10,
+        default_capacity: int = 6,
+        capacities: Optional[Dict[int, int]] = None,
+        search_horizon: int = 12,
+        counters: Optional[SlotCounters] = None,
+    ):
+        """
+        Args:
+            interval_minutes (int): Length of one pickup slot in minutes.
+            default_capacity (int): Drinks a shop can prepare per slot unless configured otherwise.
+            capacities (Optional[Dict[int, int]]): Per-shop capacity overrides keyed by shop ID.
+            search_horizon (int): How many slots to look around when suggesting a free one.
+            counters (Optional[SlotCounters]): Where reservations are counted; in this process by default.
+        """
+        self.interval = timedelta(minutes=interval_minutes)
+        self.default_capacity = default_capacity
+        self.capacities = capacities or {}
+        self.search_horizon = search_horizon
+        self.counters = counters or SlotCounters()
+
+    def slot_for(self, pickup_time: datetime) -> datetime:
+        """
+        Returns the start of the interval the given pickup time falls into.
+        """
+        start_of_day = pickup_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        return start_of_day + ((pickup_time - start_of_day) // self.interval) * self.interval
+
+    def capacity_for(self, shop_id: int) -> int:
+        """
+        Returns how many drinks the shop can prepare per slot.
+        """
+        return self.capacities.get(shop_id, self.default_capacity)
+
+    def used(self, shop_id: int, pickup_time: datetime) -> int:
+        """
+        Returns how many drinks are already reserved for the slot of the given time.
+        """
+        return self.counters.used(shop_id, self.slot_for(pickup_time))
+
+    def is_available(self, shop_id: int, pickup_time: datetime, quantity: int = 1) -> bool:
+        """
+        Checks whether the slot of the given time can take `quantity` more drinks.
+        """
+        return self.used(shop_id, pickup_time) + quantity <= self.capacity_for(shop_id)
+
+    def reserve(self, shop_id: int, pickup_time: datetime, quantity: int = 1) -> bool:
+        """
+        Reserves capacity for an order.
+
+        Returns:
+            bool: True if the capacity was reserved, False if the slot is full.
+        """
+        return self.counters.reserve(shop_id, self.slot_for(pickup_time), quantity, self.capacity_for(shop_id))
+
+    def release(self, shop_id: int, pickup_time: datetime, quantity: int = 1) -> None:
+        """
+        Returns capacity of a completed or cancelled order back to its slot.
+        """
+        self.counters.release(shop_id, self.slot_for(pickup_time), quantity)
+
+    def suggest_slot(self, shop_id: int, pickup_time: datetime, quantity: int = 1,
+                     not_before: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        Finds the free slot nearest to the requested time.
+        Later slots win over earlier ones at the same distance, since a customer can always wait a bit longer.
+
+        Args:
+            shop_id (int): The coffee shop ID.
+            pickup_time (datetime): The requested pickup time.
+            quantity (int): Number of drinks in the order.
+            not_before (Optional[datetime]): Earliest acceptable time (e.g. now + preparation time).
+
+        Returns:
+            Optional[datetime]: A pickup time inside a free slot, or None if nothing is free within the horizon.
+        """
+        requested = self.slot_for(pickup_time)
+        for step in range(self.search_horizon + 1):
+            for candidate in (requested + step * self.interval, requested - step * self.interval):
+                if not_before and candidate < not_before:
+                    # The slot started earlier, but its tail may still be usable
+                    if candidate + self.interval <= not_before:
+                        continue
+                    candidate = not_before
+                if self.is_available(shop_id, candidate, quantity):
+                    return max(candidate, pickup_time) if step == 0 else candidate
+        return None
+
+    def prune(self, before: datetime) -> None:
+        """
+        Drops counters of slots that ended before the given moment.
+        """
+        self.counters.prune(before - self.interval)
+
+    def load(self, orders: Iterable[DomainOrder]) -> None:
+        """
+        Rebuilds all counters from the active orders stored in the database.
+        """
+        counts: Dict[SlotKey, int] = {}
+        for order in orders:
+            key = (order.shop_id, self.slot_for(to_shop_time(order.pickup_time, order.shop_id)))
+            counts[key] = counts.get(key, 0) + order.quantity
+        self.counters.replace(counts)
@@ -0,0 +1,45 @@
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.application.stop_list import StopList
+from src.domain.entities.stop_list import StopListItem
+from src.domain.repositories.stop_list_repository import AbstractStopListRepository
+from src.infrastructure.database.repositories.stop_list_repository import SQLAlchemyStopListRepository
+
+
+class StopListService:
+    """
+    Service for putting products and options of a shop on the stop-list and taking them off.
+    """
+    def __init__(self, session: AsyncSession, stop_list: StopList,
+                 stop_list_repository: Optional[AbstractStopListRepository] = None):
+        """
+        Initializes the StopListService with an AsyncSession.
+        Args:
+            session (AsyncSession): The SQLAlchemy async session.
+            stop_list (StopList): The in-memory stop-list the ordering handlers read.
+            stop_list_repository (Optional[AbstractStopListRepository]): Repository to use instead of the SQLAlchemy one.
+        """
+        self.stop_list = stop_list
+        self.stop_list_repository: AbstractStopListRepository = stop_list_repository or SQLAlchemyStopListRepository(session)
+
+    async def get_all(self) -> List[StopListItem]:
+        """
+        Retrieves the stored stop-list of all shops.
+        """
+        return await self.stop_list_repository.get_all()
+
+    async def toggle(self, shop_id: int, item_type: str, item_id: int) -> bool:
+        """
+        Stops an available item or makes a stopped one available again.
+
+        Returns:
+            bool: True if the item is now stopped.
+        """
+        item = StopListItem(shop_id, item_type, item_id)
+        stopped = self.stop_list.is_available(shop_id, item_type, item_id)
+        if stopped:
+            await self.stop_list_repository.add(item)
+        else:
+            await self.stop_list_repository.remove(item)
+        self.stop_list.set(item, stopped)
+        return stopped
@@ -1,7 +1,9 @@
 from datetime import datetime
+from typing import Optional
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.domain.entities.user import User as DomainUser
+from src.domain.repositories.user_repository import AbstractUserRepository
 from src.infrastructure.database.repositories.user_repository import SQLAlchemyUserRepository # Use SQLAlchemy repo
 
 class UserService:
@@ -9,13 +11,15 @@ class UserService:
     Service layer for managing user-related business logic.
     """
 
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, user_repository: Optional[AbstractUserRepository] = None):
         """
         Initializes the UserService with an AsyncSession.
         Args:
             session (AsyncSession): The SQLAlchemy async session.
+            user_repository (Optional[AbstractUserRepository]): Repository to use instead of the SQLAlchemy one.
         """
-        self.user_repository = SQLAlchemyUserRepository(session) # Create repo inside service
+        self.session = session
+        self.user_repository: AbstractUserRepository = user_repository or SQLAlchemyUserRepository(session)
 
     async def get_or_create_user(
         self,
@@ -56,7 +60,7 @@ class UserService:
                 # This handles a race condition: if another process created the user
                 # between our initial check and our 'add' call, the 'add' will fail.
                 # We need to rollback the session to clear the failed transaction.
-                await self.user_repository.session.rollback()
+                await self.session.rollback()
                 # In this case, we just fetch the user that was created.
                 return await self.user_repository.get_by_id(user_id)
 
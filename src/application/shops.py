@@ -0,0 +1,70 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+from src.domain.entities.shop import Shop
+from src.application.time_utils import DEFAULT_TIMEZONE
+
+
+class ShopRegistry:
+    """
+    The configured coffee shops, indexed by ID, admin chat and address for O(1) lookups.
+    Built once at startup and never changed, so handlers can share it without locking.
+    """
+    def __init__(self, shops: Iterable[Shop]):
+        self._shops: Dict[int, Shop] = {}
+        self._by_admin: Dict[int, List[Shop]] = {}
+        self._by_address: Dict[str, Shop] = {}
+        for shop in shops:
+            if shop.id in self._shops:
+                raise ValueError(f"Duplicate coffee shop id {shop.id}.")
+            self._shops[shop.id] = shop
+            self._by_admin.setdefault(shop.admin_id, []).append(shop)
+            self._by_address[shop.address] = shop
+
+    @classmethod
+    def from_config(cls, coffee_shops: List[dict]) -> "ShopRegistry":
+        """
+        Builds the registry from the COFFEE_SHOPS JSON list.
+
+        Shops without an "id" are numbered by their position, starting at 1. Orders store the ID,
+        so give shops explicit IDs before reordering or removing entries of the list.
+        """
+        return cls(
+            Shop(
+                id=int(shop.get("id", position)),
+                address=shop["address"],
+                admin_id=int(shop["admin_id"]),
+                timezone=shop.get("timezone", DEFAULT_TIMEZONE),
+                capacity=shop.get("capacity"),
+                hours=shop.get("hours"),
+            )
+            for position, shop in enumerate(coffee_shops, 1)
+        )
+
+    def get(self, shop_id: Optional[int]) -> Optional[Shop]:
+        """
+        Returns the shop with the given ID, or None if there is none.
+        """
+        return self._shops.get(shop_id)
+
+    def by_address(self, address: str) -> Optional[Shop]:
+        """
+        Returns the shop at the given address, or None if there is none.
+        """
+        return self._by_address.get(address)
+
+    def for_admin(self, admin_id: int) -> List[Shop]:
+        """
+        Returns the shops whose orders go to the given admin chat.
+        """
+        return self._by_admin.get(admin_id, [])
+
+    def managed_by(self, admin_id: int) -> List[Shop]:
+        """
+        Returns the admin's own shops, or all shops for admins without one (e.g. the owner).
+        """
+        return self.for_admin(admin_id) or list(self)
+
+    def __iter__(self) -> Iterator[Shop]:
+        return iter(self._shops.values())
+
+    def __len__(self) -> int:
+        return len(self._shops)
@@ -10,6 +10,7 @@ class Order(StatesGroup):
     choosing_milk = State()
     choosing_syrup = State()
     choosing_quantity = State()
+    reviewing_cart = State()
     entering_pickup_time = State()
     choosing_payment_method = State()
     confirming_order = State()
@@ -0,0 +1,65 @@
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Set, Tuple
+from src.application.cart import CartLine
+from src.application.scheduler import TimerQueue
+from src.domain.entities.stop_list import OPTION, PRODUCT, StopListItem
+
+StopKey = Tuple[str, int]  # (item_type, item_id)
+
+
+class StopList:
+    """
+    In-memory copy of the per-shop stop-list, so keyboards and the confirmation check availability
+    with a set lookup instead of a query.
+
+    Toggles write the database first (see StopListService) and then update this copy. Workers that
+    did not handle the toggle pick it up on the next periodic reload.
+    """
+    def __init__(self):
+        self._stopped: Dict[int, Set[StopKey]] = {}  # shop ID -> stopped items
+
+    def load(self, items: Iterable[StopListItem]) -> None:
+        """
+        Replaces the contents with the stop-list stored in the database.
+        """
+        stopped: Dict[int, Set[StopKey]] = {}
+        for item in items:
+            stopped.setdefault(item.shop_id, set()).add((item.item_type, item.item_id))
+        self._stopped = stopped
+
+    def set(self, item: StopListItem, stopped: bool) -> None:
+        """
+        Puts an item on the stop-list or takes it off.
+        """
+        keys = self._stopped.setdefault(item.shop_id, set())
+        if stopped:
+            keys.add((item.item_type, item.item_id))
+        else:
+            keys.discard((item.item_type, item.item_id))
+
+    def is_available(self, shop_id: int, item_type: str, item_id: int) -> bool:
+        """
+        Checks in O(1) whether a shop sells a product or option right now.
+        """
+        keys = self._stopped.get(shop_id)
+        return not keys or (item_type, item_id) not in keys
+
+    def unavailable_lines(self, shop_id: int, cart: List[CartLine]) -> List[CartLine]:
+        """
+        Returns the cart lines with a drink, milk or syrup the shop has run out of.
+        """
+        return [
+            line for line in cart
+            if not self.is_available(shop_id, PRODUCT, line.product_id)
+            or (line.milk_id and not self.is_available(shop_id, OPTION, line.milk_id))
+            or (line.syrup_id and not self.is_available(shop_id, OPTION, line.syrup_id))
+        ]
+
+    def start(self, timer_queue: TimerQueue, interval: timedelta, load_items: Callable[[], Awaitable[List[StopListItem]]]) -> None:
+        """
+        Reloads the stop-list from the database every interval on the timer queue.
+        """
+        async def reload():
+            self.load(await load_items())
+
+        timer_queue.schedule_every(("reload_stop_list",), interval, reload)
@@ -0,0 +1,112 @@
+from html import escape
+from operator import attrgetter
+from string import Formatter
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+MAX_MESSAGE_LENGTH = 4096  # Telegram limit for the text of one message
+
+
+class Markup(str):
+    """
+    HTML that is already safe, e.g. a rendered template; it is inserted into other templates as is.
+    """
+
+
+class Template:
+    """
+    Message template with str.format syntax that is parsed once and escapes every value for Telegram HTML.
+
+    Fields are names of render() arguments with an optional attribute path and format spec,
+    e.g. "{order.pickup_time:%H:%M}". Values are escaped unless they are Markup, so a product or user
+    name can never break the markup of a message.
+    """
+    def __init__(self, source: str):
+        """
+        Args:
+            source (str): The template, with the HTML markup it needs and {fields} for the values.
+
+        Raises:
+            ValueError: If a field is positional, indexed, uses a conversion or a nested format spec.
+        """
+        self.source = source
+        self._parts: List[Tuple[str, Optional[str], Optional[Callable[[Any], Any]], str]] = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if field is None:
+                self._parts.append((literal, None, None, ""))
+                continue
+            if not field or field[0].isdigit() or "[" in field or conversion or "{" in spec:
+                raise ValueError(f"Unsupported field {{{field}}} in template {source!r}")
+            name, _, path = field.partition(".")
+            self._parts.append((literal, name, attrgetter(path) if path else None, spec))
+
+    def render(self, **values: Any) -> Markup:
+        """
+        Fills in the fields, escaping every value that is not Markup.
+        """
+        chunks = []
+        for literal, name, path, spec in self._parts:
+            chunks.append(literal)
+            if name is None:
+                continue
+            value = values[name]
+            if path:
+                value = path(value)
+            if isinstance(value, Markup) and not spec:
+                chunks.append(value)
+            else:
+                chunks.append(escape(format(value, spec), quote=False))
+        return Markup("".join(chunks))
+
+
+# One drink of an order, as the customer, the admin and the board see it
+ITEM_TEMPLATE = Template("{item.product_name} ({item.volume}){options} × {item.quantity}")
+
+
+def item_options(item: Any) -> str:
+    """
+    The milk and syrup of an order item as ", milk, syrup"; empty for a drink without them.
+    """
+    return "".join(f", {name}" for name in (item.milk_name, item.syrup_name) if name)
+
+
+def paginate(records: Iterable[str], header: str = "", limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    Packs rendered records into as few messages as possible, breaking only between records,
+    so the markup of every message stays balanced.
+
+    Args:
+        records (Iterable[str]): The rendered records, in order.
+        header (str): Text that starts the first message.
+        limit (int): Maximum length of a message.
+
+    Returns:
+        List[str]: The messages; empty if there is nothing to send.
+    """
+    pages, current = [], header
+    for record in records:
+        for piece in _fit(record, limit):
+            if current and len(current) + len(piece) > limit:
+                pages.append(current)
+                current = ""
+            current += piece
+    if current:
+        pages.append(current)
+    return pages
+
+
+def _fit(record: str, limit: int) -> Iterator[str]:
+    """
+    Splits a record longer than the limit at line boundaries; tags in the templates never span lines.
+    """
+    if len(record) <= limit:
+        yield record
+        return
+    piece = ""
+    for line in record.splitlines(keepends=True):
+        if piece and len(piece) + len(line) > limit:
+            yield piece
+            piece = ""
+        # A single line over the limit cannot happen with the name lengths the database allows
+        piece += line[:limit]
+    if piece:
+        yield piece
@@ -1,49 +1,230 @@
+import os
 import re
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+from zoneinfo import ZoneInfo
+from src.domain.entities.shop import Shop
 
-def parse_pickup_time(text: str) -> datetime | None:
+DEFAULT_TIMEZONE = os.getenv("SHOP_TIMEZONE", "Europe/Moscow")
+MIN_PREPARATION_TIME = timedelta(minutes=10)
+
+Clock = Callable[[], datetime]
+
+# --- Grammar ---
+_NUMBER_WORDS = {
+    "одну": 1, "минуту": 1, "две": 2, "три": 3, "пять": 5, "десять": 10, "пятнадцать": 15,
+    "двадцать": 20, "двадцать пять": 25, "тридцать": 30, "сорок": 40, "сорок пять": 45,
+}
+_HOUR_ORDINALS = {
+    "первого": 1, "второго": 2, "третьего": 3, "четвертого": 4, "пятого": 5, "шестого": 6,
+    "седьмого": 7, "восьмого": 8, "девятого": 9, "десятого": 10, "одиннадцатого": 11, "двенадцатого": 12,
+}
+
+
+def _alternation(words: Iterable[str]) -> str:
+    # Longest first, so "двадцать пять" wins over "двадцать"
+    return "|".join(sorted(words, key=len, reverse=True))
+
+
+def _in_minutes(minutes: int) -> Callable[[re.Match, datetime], Optional[Tuple[datetime, bool]]]:
+    return lambda match, now: (now + timedelta(minutes=minutes), True)
+
+
+def _in_number(match: re.Match, now: datetime) -> Optional[Tuple[datetime, bool]]:
+    amount = int(match.group(1))
+    is_hours = match.group(2) is not None
+    return now + timedelta(hours=amount) if is_hours else now + timedelta(minutes=amount), True
+
+
+def _in_words(match: re.Match, now: datetime) -> Optional[Tuple[datetime, bool]]:
+    return now + timedelta(minutes=_NUMBER_WORDS[match.group(1)]), True
+
+
+def _at_clock(match: re.Match, now: datetime) -> Optional[Tuple[datetime, bool]]:
+    groups = match.groups()
+    hours, minutes = int(groups[0]), int(groups[1]) if len(groups) > 1 else 0
+    if hours > 23 or minutes > 59:
+        return None
+    return now.replace(hour=hours, minute=minutes, second=0, microsecond=0), False
+
+
+def _at_hour(match: re.Match, now: datetime) -> Optional[Tuple[datetime, bool]]:
+    # "в 8" / "к 2 часам": a bare 12-hour clock. Said after that hour has passed it means the evening one,
+    # e.g. "к 2" at 13:00 is 14:00. Zero-padded ("к 08") and minute-precise inputs are taken literally.
+    digits = match.group(1)
+    hours = int(digits)
+    if hours > 23:
+        return None
+    pickup_dt = now.replace(hour=hours, minute=0, second=0, microsecond=0)
+    if not digits.startswith("0") and 1 <= hours <= 11 and pickup_dt < now < pickup_dt + timedelta(hours=12):
+        pickup_dt += timedelta(hours=12)
+    return pickup_dt, False
+
+
+def _at_half_past(match: re.Match, now: datetime) -> Optional[Tuple[datetime, bool]]:
+    # "полвосьмого" is half an hour before eight, i.e. 7:30
+    hours = _HOUR_ORDINALS[match.group(1)] - 1
+    return now.replace(hour=hours, minute=30, second=0, microsecond=0), False
+
+
+# Each entry maps a precompiled pattern to a handler returning (pickup time, is_relative).
+# Patterns are tried in order on normalized text; relative ones go first so "через 10"
+# is never read as a clock time.
+_GRAMMAR: List[Tuple[Pattern, Callable[[re.Match, datetime], Optional[Tuple[datetime, bool]]]]] = [
+    (re.compile(r"через\s+полчаса"), _in_minutes(30)),
+    (re.compile(r"через\s+пол(?:тора|утора)\s+часа"), _in_minutes(90)),
+    (re.compile(r"через\s+четверть\s+часа"), _in_minutes(15)),
+    (re.compile(r"через\s+час\b"), _in_minutes(60)),
+    (re.compile(r"через\s+(\d{1,3})\s*(ч\b|час)?"), _in_number),
+    (re.compile(rf"через\s+({_alternation(_NUMBER_WORDS)})\b"), _in_words),
+    (re.compile(rf"\bпол[\s-]?({_alternation(_HOUR_ORDINALS)})\b"), _at_half_past),
+    (re.compile(r"(?<!\d)(\d{1,2})\s*[:.\-]\s*(\d{2})(?!\d)"), _at_clock),
+    (re.compile(r"(?:^|\b)(?:в|к|на)\s+(\d{1,2})(?:\s*(?:час\w*|ч))?\s*$"), _at_hour),
+]
+
+
+def _normalize(text: str) -> str:
+    return text.strip().lower().replace("ё", "е")
+
+
+class PickupTimeParser:
+    """
+    Parses free-text pickup times in the coffee shop's local timezone.
+
+    Understands relative times ("через 10 минут", "через полчаса", "через 2 часа") and clock
+    times ("к 08:40", "в 8.40", "к 9", "полвосьмого"). The grammar is compiled once at import,
+    so parsing a message is a handful of regex scans. Times that have already passed today are
+    returned as is, neither moved to tomorrow nor to the evening, and fail validation. The one exception
+    is a bare hour like "к 2" said after 2:00, which means 14:00.
+    """
+    def __init__(self, tz: str = DEFAULT_TIMEZONE, clock: Optional[Clock] = None,
+                 min_preparation_time: timedelta = MIN_PREPARATION_TIME):
+        """
+        Args:
+            tz (str): IANA name of the shop's timezone, e.g. "Europe/Moscow".
+            clock (Optional[Clock]): Returns the current aware time; injectable for tests.
+            min_preparation_time (timedelta): Minimum time the baristas need for an order.
+        """
+        self.tz = ZoneInfo(tz)
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self.min_preparation_time = min_preparation_time
+
+    def now(self) -> datetime:
+        """
+        Returns the current time in the shop's timezone.
+        """
+        return self.clock().astimezone(self.tz)
+
+    def parse(self, text: str) -> Optional[datetime]:
+        """
+        Parses user input into an aware pickup datetime in the shop's timezone.
+
+        Args:
+            text (str): The user's input text.
+
+        Returns:
+            Optional[datetime]: The parsed datetime, or None if the text is not a pickup time.
+        """
+        if not text:
+            return None
+        normalized = _normalize(text)
+        now = self.now()
+        for pattern, handler in _GRAMMAR:
+            match = pattern.search(normalized)
+            if not match:
+                continue
+            result = handler(match, now)
+            if result is None:
+                return None
+            pickup_dt, is_relative = result
+            # Round up to a whole minute, so "через 10 минут" always passes the 10 minute check
+            if is_relative and (pickup_dt.second or pickup_dt.microsecond):
+                pickup_dt = pickup_dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+            return pickup_dt
+        return None
+
+    def is_valid(self, pickup_time: datetime) -> bool:
+        """
+        Checks if the pickup time leaves the baristas enough time to prepare the order.
+        """
+        return pickup_time >= self.now() + self.min_preparation_time
+
+    def earliest(self) -> datetime:
+        """
+        Returns the earliest whole-minute pickup time that passes validation.
+        """
+        earliest = self.now() + self.min_preparation_time
+        if earliest.second or earliest.microsecond:
+            earliest = earliest.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        return earliest
+
+
+@lru_cache(maxsize=None)
+def get_pickup_time_parser(tz: Optional[str] = None) -> PickupTimeParser:
+    """
+    Returns a shared parser for the given timezone, falling back to the default shop timezone.
+    """
+    return PickupTimeParser(tz or DEFAULT_TIMEZONE)
+
+
+# --- Shop timezones ---
+_shop_timezones: Dict[int, str] = {}
+
+
+def configure_shop_timezones(shops: Iterable[Shop]) -> None:
+    """
+    Registers the timezone of every coffee shop of the registry by ID, for orders and rollups that only know the ID.
+    """
+    _shop_timezones.clear()
+    for shop in shops:
+        _shop_timezones[shop.id] = shop.timezone
+
+
+def get_shop_timezone(shop_id: Optional[int]) -> str:
+    """
+    Returns the IANA timezone name of the shop with the given ID.
+    """
+    return _shop_timezones.get(shop_id, DEFAULT_TIMEZONE)
+
+
+def parse_pickup_time(text: str, tz: Optional[str] = None) -> datetime | None:
     """
     Parses user input to determine the pickup time.
-    Handles formats like "к 08:40" and "через 10 минут".
+    Handles formats like "к 08:40", "в 8.40", "полвосьмого", "через 10 минут" and "через полчаса".
 
     Args:
         text (str): The user's input text.
+        tz (Optional[str]): The shop's timezone; the default shop timezone if omitted.
 
     Returns:
-        datetime | None: The parsed datetime object, or None if parsing fails.
-    """
-    now = datetime.now()
-
-    # Case 1: "через N минут" (in N minutes)
-    match = re.search(r"через (\d+)", text, re.IGNORECASE)
-    if match:
-        minutes = int(match.group(1))
-        return now + timedelta(minutes=minutes)
-
-    # Case 2: "к HH:MM" (at HH:MM)
-    match = re.search(r"(\d{1,2}):(\d{2})", text)
-    if match:
-        hours, minutes = int(match.group(1)), int(match.group(2))
-        try:
-            pickup_dt = now.replace(hour=hours, minute=minutes, second=0, microsecond=0)
-            if pickup_dt < now:
-                # If the specified time is in the past, assume it's for the next day
-                pickup_dt += timedelta(days=1)
-            return pickup_dt
-        except ValueError:
-            return None
+        datetime | None: The parsed aware datetime object, or None if parsing fails.
+    """
+    return get_pickup_time_parser(tz).parse(text)
 
-    return None
 
 def is_valid_pickup_time(pickup_time: datetime) -> bool:
     """
     Checks if the pickup time is at least 10 minutes from now.
 
     Args:
-        pickup_time (datetime): The proposed pickup time.
+        pickup_time (datetime): The proposed aware pickup time.
 
     Returns:
         bool: True if the time is valid, False otherwise.
     """
-    return pickup_time >= (datetime.now() + timedelta(minutes=10))
+    return pickup_time >= (datetime.now(timezone.utc) + MIN_PREPARATION_TIME)
 
+
+def to_shop_time(moment: datetime, shop_id: Optional[int]) -> datetime:
+    """
+    Converts an aware datetime to the local time of the shop with the given ID.
+
+    Args:
+        moment (datetime): An aware datetime, e.g. a stored pickup time in UTC.
+        shop_id (Optional[int]): The coffee shop ID.
+
+    Returns:
+        datetime: The same moment in the shop's timezone.
+    """
+    return moment.astimezone(ZoneInfo(get_shop_timezone(shop_id)))
@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+@dataclass
+class LoyaltyEntry:
+    """
+    One change of a user's loyalty points. Entries are never updated or deleted.
+
+    Attributes:
+        user_id (int): Telegram ID of the user.
+        points (int): Points earned (positive) or spent (negative).
+        reason (str): What the points are for, e.g. "order".
+        order_id (int | None): The order the points came from, if any.
+        id (int | None): Database ID; None until stored.
+        created_at (datetime | None): When the entry was stored.
+    """
+    user_id: int
+    points: int
+    reason: str = "order"
+    order_id: Optional[int] = None
+    id: Optional[int] = None
+    created_at: Optional[datetime] = None
@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from typing import List
 
 class OrderStatus(Enum):
     PENDING = "pending"
@@ -11,22 +12,40 @@ class OrderStatus(Enum):
     CANCELLED = "cancelled"
 
 @dataclass
-class Order:
+class OrderItem:
     """
-    Represents an order in the domain layer.
+    Represents one drink line of an order.
     """
-    user_id: int
-    address: str
     product_name: str
     volume: str
     quantity: int
-    pickup_time: str
-    total_price: int
-    
+    unit_price: int  # Price of one drink including options
+
     milk_name: str | None = None
     syrup_name: str | None = None
-    
+
+    id: int | None = None
+    order_id: int | None = None
+
+    @property
+    def total_price(self) -> int:
+        return self.unit_price * self.quantity
+
+@dataclass
+class Order:
+    """
+    Represents an order in the domain layer.
+    """
+    user_id: int
+    address: str  # As shown when the order was placed; the shop itself is shop_id
+    quantity: int  # Total number of drinks over all items
+    pickup_time: datetime  # Aware, normalized to UTC when loaded from storage
+    total_price: int
+    items: List[OrderItem] = field(default_factory=list)
+
     id: int | None = None
+    shop_id: int | None = None  # None only for orders placed before shops had IDs
+    idempotency_key: str | None = None
     status: OrderStatus = OrderStatus.PENDING
     is_completed: bool = False
     created_at: datetime = field(default_factory=datetime.now)
@@ -22,10 +22,12 @@ class Product:
         id (int): Unique identifier for the product.
         name (str): The name of the product (e.g., "Капучино").
         volumes (List[Volume]): A list of available volumes and their prices.
+        loyalty_points (int): Loyalty points earned per drink of this product.
     """
     id: int
     name: str
     volumes: List[Volume]
+    loyalty_points: int = 0
 
     def to_dict(self):
         """Converts the Product object to a dictionary."""
@@ -33,6 +35,7 @@ class Product:
             "id": self.id,
             "name": self.name,
             "volumes": [{"volume": v.volume, "price": v.price} for v in self.volumes],
+            "loyalty_points": self.loyalty_points,
         }
 
     @staticmethod
@@ -42,4 +45,5 @@ class Product:
             id=data["id"],
             name=data["name"],
             volumes=[Volume(volume=v["volume"], price=v["price"]) for v in data["volumes"]],
+            loyalty_points=data.get("loyalty_points", 0),
         )
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+from datetime import date
+
+@dataclass
+class SalesRollup:
+    """
+    Pre-aggregated sales of one product in one shop during one hour.
+
+    Attributes:
+        shop_id (int): The coffee shop ID.
+        day (date): Shop-local date of the pickup time.
+        hour (int): Shop-local hour of the pickup time, 0-23.
+        product_name (str): The product sold.
+        orders_count (int): Number of completed orders containing the product.
+        drinks (int): Number of drinks sold.
+        revenue (int): Revenue in rubles, options included.
+    """
+    shop_id: int
+    day: date
+    hour: int
+    product_name: str
+    orders_count: int = 0
+    drinks: int = 0
+    revenue: int = 0
+
+@dataclass
+class ProductSales:
+    """
+    Sales of one product summed over a period.
+    """
+    product_name: str
+    drinks: int
+    revenue: int
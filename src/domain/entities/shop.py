@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass(frozen=True)
+class Shop:
+    """
+    A coffee shop as configured in COFFEE_SHOPS.
+
+    Attributes:
+        id (int): Small stable ID; callbacks, FSM data and orders refer to the shop by it.
+        address (str): Address shown to customers.
+        admin_id (int): Chat new orders of the shop are sent to.
+        timezone (str): IANA timezone name of the shop.
+        capacity (Optional[int]): Drinks per pickup slot, if it differs from the default.
+        hours (Optional[str]): Opening hours shown to customers, e.g. "08:00–21:00".
+    """
+    id: int
+    address: str
+    admin_id: int
+    timezone: str
+    capacity: Optional[int] = None
+    hours: Optional[str] = None
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+PRODUCT = "product"
+OPTION = "option"  # Milk and syrup IDs do not overlap, so options share one kind
+
+@dataclass(frozen=True)
+class StopListItem:
+    """
+    A product or option a shop has run out of and does not sell until it is taken off the list.
+
+    Attributes:
+        shop_id (int): The shop that ran out.
+        item_type (str): PRODUCT or OPTION.
+        item_id (int): ID of the product or option.
+    """
+    shop_id: int
+    item_type: str
+    item_id: int
@@ -0,0 +1,29 @@
+from abc import ABC, abstractmethod
+from typing import List
+from src.domain.entities.loyalty import LoyaltyEntry
+
+class AbstractLoyaltyRepository(ABC):
+    """
+    Abstract base class for the loyalty points ledger and balances.
+    """
+
+    @abstractmethod
+    async def add(self, entry: LoyaltyEntry) -> None:
+        """
+        Appends an entry to the ledger and adds its points to the user's balance. Does not commit.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_balance(self, user_id: int) -> int:
+        """
+        Retrieves the stored balance of a user; 0 if they have never earned points.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_entries(self, user_id: int, limit: int) -> List[LoyaltyEntry]:
+        """
+        Retrieves the latest ledger entries of a user, newest first.
+        """
+        raise NotImplementedError
@@ -8,20 +8,22 @@ class AbstractOptionRepository(ABC):
     """
 
     @abstractmethod
-    async def get_all_by_category(self, category: str) -> List[Option]:
+    async def get_all_by_category(self, category: str, shop_id: Optional[int] = None) -> List[Option]:
         """
         Retrieves all options for a given category.
         Args:
             category (str): The category of options to retrieve (e.g., "milk", "syrup").
+            shop_id (Optional[int]): The shop whose options to use; the base ones if None.
         Returns:
             List[Option]: A list of all Option objects for the category.
         """
     @abstractmethod
-    async def get_by_id(self, option_id: int) -> Optional[Option]:
+    async def get_by_id(self, option_id: int, shop_id: Optional[int] = None) -> Optional[Option]:
         """
         Retrieves an option by its unique ID.
         Args:
             option_id (int): The unique identifier of the option.
+            shop_id (Optional[int]): The shop whose options to use; the base ones if None.
         Returns:
             Optional[Option]: The Option object if found, otherwise None.
         """
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
 from src.domain.entities.order import Order
 
 class AbstractOrderRepository(ABC):
@@ -14,10 +15,47 @@ class AbstractOrderRepository(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_by_idempotency_key(self, idempotency_key: str) -> Optional[Order]:
+        """
+        Retrieves the order created by the confirmation with the given basket token.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_existing_idempotency_keys(self, idempotency_keys: List[str]) -> Set[str]:
+        """
+        Returns which of the given basket tokens already have an order, live or archived.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_last_by_user(self, user_id: int) -> Optional[Order]:
+        """
+        Retrieves the most recent order of a user, live or archived.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_page_by_user(self, user_id: int, cursor: Optional[Tuple[datetime, int]], limit: int,
+                               newer: bool = False) -> List[Order]:
+        """
+        Retrieves up to `limit` orders of a user, live or archived, newest first.
+        Only orders older than the (created_at, id) cursor are returned, or newer ones if `newer` is set.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def add(self, order: Order) -> None:
         """
-        Adds a new order to the storage.
+        Adds a new order with its items to the storage in one transaction.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_many(self, orders: List[Order]) -> None:
+        """
+        Adds several new orders in one transaction and sets their IDs.
         """
         raise NotImplementedError
 
@@ -34,3 +72,34 @@ class AbstractOrderRepository(ABC):
         Retrieves all active (not completed or cancelled) orders.
         """
         raise NotImplementedError
+
+    @abstractmethod
+    async def get_due_orders(self, shop_id: int, start: datetime, end: datetime) -> List[Order]:
+        """
+        Retrieves active orders of a shop with a pickup time in [start, end), earliest first.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_overdue_orders(self, shop_id: int, now: datetime) -> List[Order]:
+        """
+        Retrieves active orders of a shop whose pickup time has already passed, earliest first.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def assign_shop_ids(self, shop_ids: Dict[str, int]) -> int:
+        """
+        Sets the shop ID of live and archived orders placed before shops had IDs, matching them by address.
+        Returns the number of updated orders.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_orders_page(self, shop_id: int, start: datetime, end: datetime, after_id: int, limit: int,
+                              archived: bool = False) -> List[Order]:
+        """
+        Retrieves up to `limit` orders of a shop with a pickup time in [start, end) and an ID above `after_id`,
+        ordered by ID, from the live or the history table.
+        """
+        raise NotImplementedError
@@ -9,21 +9,37 @@ class AbstractProductRepository(ABC):
     """
 
     @abstractmethod
-    async def get_all(self) -> List[Product]:
+    async def get_all(self, shop_id: Optional[int] = None) -> List[Product]:
         """
         Retrieves all products from the storage.
+        Args:
+            shop_id (Optional[int]): The shop whose menu to use; the base menu if None.
         Returns:
             List[Product]: A list of all Product objects.
         """
         raise NotImplementedError
 
     @abstractmethod
-    async def get_by_id(self, product_id: int) -> Optional[Product]:
+    async def get_by_id(self, product_id: int, shop_id: Optional[int] = None) -> Optional[Product]:
         """
         Retrieves a product by its unique ID.
         Args:
             product_id (int): The unique identifier of the product.
+            shop_id (Optional[int]): The shop whose menu to use; the base menu if None.
         Returns:
             Optional[Product]: The Product object if found, otherwise None.
         """
         raise NotImplementedError
+
+    @abstractmethod
+    async def get_price(self, product_id: int, volume: str, shop_id: Optional[int] = None) -> Optional[int]:
+        """
+        Retrieves the price of one volume of a product.
+        Args:
+            product_id (int): The unique identifier of the product.
+            volume (str): The volume, e.g. "250мл".
+            shop_id (Optional[int]): The shop whose menu to use; the base menu if None.
+        Returns:
+            Optional[int]: The price, or None if the shop does not sell that volume.
+        """
+        raise NotImplementedError
@@ -0,0 +1,52 @@
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import List, Optional
+from src.domain.entities.sales import ProductSales, SalesRollup
+
+class AbstractSalesRepository(ABC):
+    """
+    Abstract base class for the sales rollup repository.
+    """
+
+    @abstractmethod
+    async def add(self, rollups: List[SalesRollup]) -> None:
+        """
+        Adds the counts to the matching rollup rows, creating missing ones. Does not commit.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def replace_since(self, day: Optional[date], rollups: List[SalesRollup]) -> None:
+        """
+        Replaces all rollup rows from the given day on (or all rows if day is None) and commits.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def aggregate_completed_orders(self, since: Optional[datetime]) -> List[SalesRollup]:
+        """
+        Aggregates completed orders, live and archived, with a pickup time at or after `since`.
+        Days and hours of the returned rows are in UTC; orders without a shop ID are left out.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_product_sales(self, shop_id: int, start: date, end: date) -> List[ProductSales]:
+        """
+        Retrieves per-product totals of a shop for the days in [start, end], best sellers first.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_hourly_drinks(self, shop_id: int, day: date) -> List[tuple]:
+        """
+        Retrieves (hour, drinks) pairs of a shop for one day.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def is_empty(self) -> bool:
+        """
+        Checks whether no rollups have been built yet.
+        """
+        raise NotImplementedError
@@ -0,0 +1,29 @@
+from abc import ABC, abstractmethod
+from typing import List
+from src.domain.entities.stop_list import StopListItem
+
+class AbstractStopListRepository(ABC):
+    """
+    Abstract base class for the per-shop stop-list.
+    """
+
+    @abstractmethod
+    async def get_all(self) -> List[StopListItem]:
+        """
+        Retrieves the stop-listed items of all shops.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add(self, item: StopListItem) -> None:
+        """
+        Puts an item on the stop-list, if it is not there yet, and commits.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def remove(self, item: StopListItem) -> None:
+        """
+        Takes an item off the stop-list and commits.
+        """
+        raise NotImplementedError
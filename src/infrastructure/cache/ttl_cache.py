@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Iterator, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Bounded in-memory mapping whose entries expire after a period without writes.
+
+    Entries are kept in write order, so expired ones are always at the front and are dropped
+    in O(1) amortized time on every write. When the cache is full, the least recently written
+    entry is evicted.
+    """
+    def __init__(self, ttl: float, max_size: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl (float): Seconds an entry lives after its last write.
+            max_size (int): Maximum number of entries.
+            clock (Callable[[], float]): Monotonic clock in seconds; injectable for tests.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._data))
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        """
+        Returns the value stored under the key, or the default if it is missing or expired.
+        """
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= self.clock():
+            del self._data[key]
+            return default
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        """
+        Stores a value and restarts its time to live.
+        """
+        now = self.clock()
+        self._data[key] = (now + self.ttl, value)
+        self._data.move_to_end(key)
+        self._expire(now)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        """
+        Removes the key and returns its value if it has not expired.
+        """
+        item = self._data.pop(key, None)
+        if item is None or item[0] <= self.clock():
+            return default
+        return item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def _expire(self, now: float) -> None:
+        while self._data:
+            expires_at, _ = next(iter(self._data.values()))
+            if expires_at > now:
+                break
+            self._data.popitem(last=False)
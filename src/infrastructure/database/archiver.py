@@ -0,0 +1,150 @@
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.application.metrics import metrics
+from src.application.scheduler import TimerQueue
+from src.infrastructure.database.models.order import Order as ORMOrder
+from src.infrastructure.database.models.order_history import OrderHistory, OrderItemHistory
+from src.infrastructure.database.models.order_item import OrderItem as ORMOrderItem
+from src.infrastructure.database.repositories.order_repository import FINISHED_STATUSES
+
+ORDER_COLUMNS = ["id", "user_id", "shop_id", "address", "quantity", "pickup_time", "total_price", "status",
+                 "is_completed", "idempotency_key", "created_at", "updated_at"]
+ITEM_COLUMNS = ["id", "order_id", "product_name", "volume", "quantity", "unit_price", "milk_name", "syrup_name"]
+HISTORY_TABLES = (OrderHistory.__tablename__, OrderItemHistory.__tablename__)
+
+
+def _next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+class OrderArchiver:
+    """
+    Moves finished orders older than min_age from orders/order_items into the history tables.
+
+    Work is done in chunks of chunk_size orders, each in its own short transaction that locks
+    only the rows it moves, with a pause in between, so the live table stays available.
+    On MySQL the monthly partitions of the history tables are added on demand.
+    """
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], min_age: timedelta = timedelta(days=30),
+                 chunk_size: int = 500, pause: float = 0.2):
+        """
+        Args:
+            session_factory (async_sessionmaker[AsyncSession]): Opens the sessions chunks are moved with.
+            min_age (timedelta): How long a finished order stays in the live table.
+            chunk_size (int): Orders moved per transaction.
+            pause (float): Seconds to wait between chunks.
+        """
+        self.session_factory = session_factory
+        self.min_age = min_age
+        self.chunk_size = chunk_size
+        self.pause = pause
+        self._partition_bounds: Dict[str, Optional[date]] = {}  # table -> upper bound of its last monthly partition
+
+    def start(self, timer_queue: TimerQueue, interval: timedelta) -> None:
+        """
+        Runs the archiver every interval on the timer queue.
+        """
+        timer_queue.schedule_every(("archive_orders",), interval, self.run)
+
+    async def run(self) -> int:
+        """
+        Archives everything that is old enough.
+
+        Returns:
+            int: The number of archived orders.
+        """
+        # created_at/updated_at are filled by the database clock, which runs in server-local time
+        cutoff = datetime.now() - self.min_age
+        archived = 0
+        while True:
+            moved = await self._move_chunk(cutoff)
+            archived += moved
+            if moved < self.chunk_size:
+                break
+            await asyncio.sleep(self.pause)
+        if archived:
+            print(f"Archived {archived} finished orders.")
+        return archived
+
+    async def _move_chunk(self, cutoff: datetime) -> int:
+        started = time.perf_counter()
+        async with self.session_factory() as session:
+            stmt = select(ORMOrder.id, ORMOrder.created_at).where(
+                ORMOrder.status.in_(FINISHED_STATUSES),
+                ORMOrder.updated_at < cutoff
+            ).order_by(ORMOrder.id).limit(self.chunk_size)
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                return 0
+            await self._ensure_partitions(session, max(created_at for _, created_at in rows))
+
+            ids: List[int] = [order_id for order_id, _ in rows]
+            orders, items = ORMOrder.__table__, ORMOrderItem.__table__
+            await session.execute(
+                insert(OrderHistory).from_select(
+                    ORDER_COLUMNS,
+                    select(*[orders.c[name] for name in ORDER_COLUMNS]).where(orders.c.id.in_(ids))
+                )
+            )
+            await session.execute(
+                insert(OrderItemHistory).from_select(
+                    ITEM_COLUMNS + ["order_created_at"],
+                    select(*[items.c[name] for name in ITEM_COLUMNS], orders.c.created_at)
+                    .join(orders, orders.c.id == items.c.order_id)
+                    .where(items.c.order_id.in_(ids))
+                )
+            )
+            await session.execute(delete(ORMOrderItem).where(ORMOrderItem.order_id.in_(ids)))
+            await session.execute(delete(ORMOrder).where(ORMOrder.id.in_(ids)))
+            await session.commit()
+
+        metrics.inc("orders_archived_total", len(ids))
+        metrics.observe("order_archive_chunk_ms", (time.perf_counter() - started) * 1000)
+        return len(ids)
+
+    async def _ensure_partitions(self, session: AsyncSession, newest: datetime) -> None:
+        """
+        Makes sure every history table has a monthly partition covering `newest`.
+        Older rows simply land in the first partition whose bound is above them.
+        """
+        if session.bind.dialect.name != "mysql":
+            return
+        needed = _next_month(newest.date().replace(day=1))
+        for table in HISTORY_TABLES:
+            if table not in self._partition_bounds:
+                self._partition_bounds[table] = await self._last_partition_bound(session, table)
+            bound = self._partition_bounds[table]
+            if bound and bound >= needed:
+                continue
+            new_bounds = []
+            month = bound or needed
+            while month <= needed:
+                if month != bound:
+                    new_bounds.append(month)
+                month = _next_month(month)
+            partitions = ", ".join(
+                f"PARTITION p{upper - timedelta(days=1):%Y%m} VALUES LESS THAN ('{upper:%Y-%m-%d}')" for upper in new_bounds
+            )
+            # DDL commits implicitly in MySQL, so it runs on its own connection before the chunk transaction
+            async with self.session_factory() as ddl_session:
+                await ddl_session.execute(text(
+                    f"ALTER TABLE {table} REORGANIZE PARTITION p_future INTO "
+                    f"({partitions}, PARTITION p_future VALUES LESS THAN (MAXVALUE))"
+                ))
+            self._partition_bounds[table] = needed
+
+    @staticmethod
+    async def _last_partition_bound(session: AsyncSession, table: str) -> Optional[date]:
+        stmt = text(
+            "SELECT PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_DESCRIPTION <> 'MAXVALUE'"
+        )
+        bounds = [
+            date.fromisoformat(description.strip("'"))
+            for description in (await session.execute(stmt, {"table": table})).scalars()
+        ]
+        return max(bounds, default=None)
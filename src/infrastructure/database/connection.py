@@ -1,5 +1,13 @@
 import os
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+from sqlalchemy.pool import StaticPool
+
+# "mysql" (default) for production, "sqlite" for local runs, tests and benchmarks
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+# SQLite database file; ":memory:" keeps everything in-process
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/brucup.sqlite3")
 
 # Get database credentials from environment variables
 DB_HOST = os.getenv("DB_HOST", "localhost")
@@ -8,22 +16,74 @@ DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 DB_NAME = os.getenv("DB_NAME")
 
-# Check if essential database variables are set
-if not all([DB_USER, DB_PASSWORD, DB_NAME]):
-    raise ValueError("Database credentials (DB_USER, DB_PASSWORD, DB_NAME) must be set in .env file.")
+# Sessions are configured up front and bound to the engine once it is created,
+# so importing this module never needs a database or credentials
+async_session_maker = async_sessionmaker(expire_on_commit=False, class_=AsyncSession)
+_engine: Optional[AsyncEngine] = None
+
+
+def database_url(backend: str = DB_BACKEND) -> str:
+    """Builds the SQLAlchemy URL of the configured backend."""
+    if backend == "sqlite":
+        return f"sqlite+aiosqlite:///{SQLITE_PATH}"
+    if backend != "mysql":
+        raise ValueError(f"Unknown DB_BACKEND '{backend}', expected 'mysql' or 'sqlite'.")
+
+    # Check if essential database variables are set
+    if not all([DB_USER, DB_PASSWORD, DB_NAME]):
+        raise ValueError("Database credentials (DB_USER, DB_PASSWORD, DB_NAME) must be set in .env file.")
+    # Construct the database URL for SQLAlchemy using the aiomysql driver
+    return f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
+
+
+def _configure_sqlite(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # SQLite has a single writer; concurrent sessions wait for it instead of failing with "database is locked"
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.close()
+
+
+def get_engine(url: Optional[str] = None) -> AsyncEngine:
+    """
+    Returns the engine, creating it on first use.
+
+    Args:
+        url (Optional[str]): Overrides the configured URL; only used when the engine is created.
+    """
+    global _engine
+    if _engine is None:
+        url = url or database_url()
+        if url.startswith("sqlite"):
+            # An in-memory database exists per connection, so all sessions have to share one
+            pool = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}} if ":memory:" in url else {}
+            _engine = create_async_engine(url, echo=False, **pool)
+            event.listen(_engine.sync_engine, "connect", _configure_sqlite)
+        else:
+            # `echo=True` is useful for debugging to see the generated SQL
+            _engine = create_async_engine(url, echo=False)
+        async_session_maker.configure(bind=_engine)
+    return _engine
 
-# Construct the database URL for SQLAlchemy
-# Using mysql+mysqlconnector driver
-DATABASE_URL = f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
 
-# Create an async engine
-# `echo=True` is useful for debugging to see the generated SQL
-engine = create_async_engine(DATABASE_URL, echo=False)
+async def init_database(url: Optional[str] = None) -> AsyncEngine:
+    """
+    Creates the engine and, on SQLite, the schema from the ORM models.
+    MySQL schemas are managed by Alembic migrations.
+    """
+    engine = get_engine(url)
+    if engine.dialect.name == "sqlite":
+        # Importing the models registers their tables on Base.metadata
+        from src.infrastructure.database.models import loyalty, order, order_history, order_item, sales_rollup, stop_list, user
+        from src.infrastructure.database.models.base import Base
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+    return engine
 
-# Create a configured "Session" class
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 async def get_session() -> AsyncSession:
     """Dependency provider for getting a database session."""
+    get_engine()
     async with async_session_maker() as session:
         yield session
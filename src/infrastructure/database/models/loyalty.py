@@ -0,0 +1,33 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Integer, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class LoyaltyLedgerEntry(Base):
+    __tablename__ = "loyalty_ledger"
+    __table_args__ = (
+        # An order earns its points once, however often its completion is replayed
+        UniqueConstraint("order_id", "reason", name="uq_loyalty_ledger_order_id_reason"),
+    )
+
+    # Append-only: rows are inserted together with the balance change and never updated
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    order_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    points: Mapped[int] = mapped_column(Integer, nullable=False)
+    reason: Mapped[str] = mapped_column(String(32), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<LoyaltyLedgerEntry(id={self.id}, user_id={self.user_id}, points={self.points})>"
+
+class LoyaltyBalance(Base):
+    __tablename__ = "loyalty_balances"
+
+    # The sum of the user's ledger entries, kept current by every insert into the ledger
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    points: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self) -> str:
+        return f"<LoyaltyBalance(user_id={self.user_id}, points={self.points})>"
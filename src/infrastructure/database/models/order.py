@@ -1,27 +1,40 @@
-from sqlalchemy import BigInteger, String, Integer, Enum as SAEnum, Boolean
-from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import List
+from sqlalchemy import BigInteger, String, Integer, Enum as SAEnum, Boolean, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base, TimestampMixin
+from .order_item import OrderItem
 from src.domain.entities.order import OrderStatus
 
 class Order(Base, TimestampMixin):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Due-soon and overdue lookups and exports per shop are range scans on this index
+        Index("ix_orders_shop_id_pickup_time", "shop_id", "pickup_time"),
+        UniqueConstraint("idempotency_key", name="uq_orders_idempotency_key"),
+        # The archiver picks finished orders by status and age
+        Index("ix_orders_status_updated_at", "status", "updated_at"),
+        # A customer's order history is paged by (created_at, id) with a keyset; InnoDB appends the id itself
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     
+    shop_id: Mapped[int] = mapped_column(Integer, nullable=True)
     address: Mapped[str] = mapped_column(String(255))
-    product_name: Mapped[str] = mapped_column(String(100))
-    volume: Mapped[str] = mapped_column(String(50))
-    quantity: Mapped[int] = mapped_column(Integer)
+    quantity: Mapped[int] = mapped_column(Integer) # Total drinks over all items
     
-    milk_name: Mapped[str] = mapped_column(String(100), nullable=True)
-    syrup_name: Mapped[str] = mapped_column(String(100), nullable=True)
-    
-    pickup_time: Mapped[str] = mapped_column(String(5)) # Storing as "HH:MM"
+    pickup_time: Mapped[datetime] = mapped_column(DateTime) # Naive UTC
     total_price: Mapped[int] = mapped_column(Integer)
 
     status: Mapped[OrderStatus] = mapped_column(SAEnum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
     is_completed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # Basket token of the confirmation; a replayed confirmation violates the unique index
+    idempotency_key: Mapped[str] = mapped_column(String(32), nullable=True)
+
+    # Drinks live in order_items; they are loaded with one extra IN query per batch of orders
+    items: Mapped[List[OrderItem]] = relationship(lazy="selectin", order_by=OrderItem.id)
 
     def __repr__(self) -> str:
         return f"<Order(id={self.id}, user_id={self.user_id}, status='{self.status.value}')>"
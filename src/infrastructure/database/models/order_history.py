@@ -0,0 +1,64 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy import BigInteger, String, Integer, Enum as SAEnum, Boolean, DateTime, Index, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship, foreign
+from .base import Base
+from src.domain.entities.order import OrderStatus
+
+# Both tables are RANGE COLUMNS partitioned by month of the order's created_at on MySQL (see the migration),
+# so the partition key is part of every primary key and there are no foreign keys.
+# IDs are copied from the live tables and stay unique, so the mappers identify rows by id alone.
+
+class OrderItemHistory(Base):
+    __tablename__ = "order_items_history"
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    order_created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+
+    product_name: Mapped[str] = mapped_column(String(100))
+    volume: Mapped[str] = mapped_column(String(50))
+    quantity: Mapped[int] = mapped_column(Integer)
+    unit_price: Mapped[int] = mapped_column(Integer)
+
+    milk_name: Mapped[str] = mapped_column(String(100), nullable=True)
+    syrup_name: Mapped[str] = mapped_column(String(100), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<OrderItemHistory(id={self.id}, order_id={self.order_id})>"
+
+class OrderHistory(Base):
+    __tablename__ = "orders_history"
+    __table_args__ = (
+        Index("ix_orders_history_user_id_created_at", "user_id", "created_at"),
+        # Exports read a shop's archived orders by pickup time
+        Index("ix_orders_history_shop_id_pickup_time", "shop_id", "pickup_time"),
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    shop_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    address: Mapped[str] = mapped_column(String(255))
+    quantity: Mapped[int] = mapped_column(Integer)
+    pickup_time: Mapped[datetime] = mapped_column(DateTime) # Naive UTC
+    total_price: Mapped[int] = mapped_column(Integer)
+
+    status: Mapped[OrderStatus] = mapped_column(SAEnum(OrderStatus), nullable=False)
+    is_completed: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    idempotency_key: Mapped[str] = mapped_column(String(32), nullable=True, index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    items: Mapped[List[OrderItemHistory]] = relationship(
+        primaryjoin=lambda: OrderHistory.id == foreign(OrderItemHistory.order_id),
+        lazy="selectin",
+        order_by=lambda: OrderItemHistory.id,
+        viewonly=True,
+    )
+
+    def __repr__(self) -> str:
+        return f"<OrderHistory(id={self.id}, user_id={self.user_id}, status='{self.status.value}')>"
@@ -0,0 +1,20 @@
+from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class OrderItem(Base):
+    __tablename__ = "order_items"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    product_name: Mapped[str] = mapped_column(String(100))
+    volume: Mapped[str] = mapped_column(String(50))
+    quantity: Mapped[int] = mapped_column(Integer)
+    unit_price: Mapped[int] = mapped_column(Integer)
+
+    milk_name: Mapped[str] = mapped_column(String(100), nullable=True)
+    syrup_name: Mapped[str] = mapped_column(String(100), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<OrderItem(id={self.id}, order_id={self.order_id}, product_name='{self.product_name}')>"
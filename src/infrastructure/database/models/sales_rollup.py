@@ -0,0 +1,20 @@
+from datetime import date
+from sqlalchemy import Date, Integer, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class SalesRollup(Base):
+    __tablename__ = "sales_rollups"
+
+    # The primary key doubles as the index for per-shop day ranges
+    shop_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True) # Shop-local
+    hour: Mapped[int] = mapped_column(SmallInteger, primary_key=True) # Shop-local
+    product_name: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    orders_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    drinks: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<SalesRollup(shop_id={self.shop_id}, day={self.day}, hour={self.hour}, product_name='{self.product_name}')>"
@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class StopListItem(Base):
+    __tablename__ = "stop_list_items"
+
+    # A row means "out of stock"; it is deleted when the item is back
+    shop_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    item_type: Mapped[str] = mapped_column(String(16), primary_key=True)
+    item_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<StopListItem(shop_id={self.shop_id}, item_type='{self.item_type}', item_id={self.item_id})>"
@@ -0,0 +1,277 @@
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.application.circuit_breaker import CircuitBreaker
+from src.application.metrics import metrics
+from src.application.scheduler import TimerQueue
+from src.domain.entities.order import Order as DomainOrder, OrderItem as DomainOrderItem
+from src.infrastructure.database.repositories.order_repository import SQLAlchemyOrderRepository
+
+SavedListener = Callable[[DomainOrder], Awaitable[None]]
+
+
+def is_db_outage(error: BaseException) -> bool:
+    """
+    Tells a database that cannot be reached (connection refused or lost, timeouts) from an error in the
+    statement itself, like a violated constraint, which retrying later would not fix.
+    """
+    if isinstance(error, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, DBAPIError) and error.connection_invalidated
+
+
+def _encode(order: DomainOrder) -> Dict[str, Any]:
+    return {
+        "idempotency_key": order.idempotency_key,
+        "user_id": order.user_id,
+        "shop_id": order.shop_id,
+        "address": order.address,
+        "quantity": order.quantity,
+        "pickup_time": order.pickup_time.isoformat(),
+        "total_price": order.total_price,
+        "items": [
+            {"product_name": item.product_name, "volume": item.volume, "quantity": item.quantity, "unit_price": item.unit_price,
+             "milk_name": item.milk_name, "syrup_name": item.syrup_name}
+            for item in order.items
+        ],
+    }
+
+
+def _decode(entry: Dict[str, Any]) -> DomainOrder:
+    return DomainOrder(
+        idempotency_key=entry["idempotency_key"],
+        user_id=entry["user_id"],
+        shop_id=entry["shop_id"],
+        address=entry["address"],
+        quantity=entry["quantity"],
+        pickup_time=datetime.fromisoformat(entry["pickup_time"]),
+        total_price=entry["total_price"],
+        items=[DomainOrderItem(**item) for item in entry["items"]],
+    )
+
+
+class OrderJournal:
+    """
+    Local write-ahead journal for orders confirmed while the database is unavailable.
+
+    Every order is appended as one JSON line and fsynced before the customer is told it was accepted,
+    so it survives a crash or a restart. Once the database is back the orders are written in batches
+    and dropped from the journal. Each of them carries its basket token: an order that did reach the
+    database (a commit whose reply was lost) or a replay cut short by a crash is never inserted twice.
+    """
+    def __init__(self, path: str, session_factory: async_sessionmaker[AsyncSession], batch_size: int = 100):
+        """
+        Args:
+            path (str): The journal file; created with its directory if missing. Give every worker its own.
+            session_factory (async_sessionmaker[AsyncSession]): Opens the sessions orders are replayed with.
+            batch_size (int): Orders written per transaction on replay.
+        """
+        self.path = path
+        self.rejected_path = f"{path}.rejected"
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self._lock = asyncio.Lock()  # Appends and compactions of the file never interleave
+        self._replaying = False
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._depth = len(self.pending())
+        metrics.set_gauge("order_journal_depth", self._depth)
+
+    @property
+    def depth(self) -> int:
+        """
+        The number of orders waiting to be written to the database.
+        """
+        return self._depth
+
+    def pending(self) -> List[DomainOrder]:
+        """
+        Reads the orders waiting in the journal, oldest first.
+        """
+        return [order for _, order in self._read()[0]]
+
+    async def append(self, order: DomainOrder) -> None:
+        """
+        Durably appends an order; it gets a basket token first if it has none, to make the replay idempotent.
+        """
+        if not order.idempotency_key:
+            order.idempotency_key = uuid.uuid4().hex
+        line = json.dumps(_encode(order), ensure_ascii=False) + "\n"
+        async with self._lock:
+            await asyncio.to_thread(self._append_line, self.path, line)
+            self._depth += 1
+        metrics.inc("order_journal_appends_total")
+        metrics.set_gauge("order_journal_depth", self._depth)
+
+    def start(self, timer_queue: TimerQueue, interval: timedelta, breaker: CircuitBreaker, on_saved: SavedListener) -> None:
+        """
+        Tries to replay the journal every interval on the timer queue, whenever the breaker lets calls through.
+        """
+        timer_queue.schedule_every(("replay_order_journal",), interval, lambda: self.replay_when_available(breaker, on_saved))
+
+    async def replay_when_available(self, breaker: CircuitBreaker, on_saved: SavedListener) -> int:
+        """
+        Replays the journal unless it is empty or the breaker is open, and reports the outcome to the breaker.
+
+        Returns:
+            int: The number of orders written to the database.
+        """
+        if not self._depth or not breaker.allow():
+            return 0
+        try:
+            saved = await self.replay(on_saved)
+        except Exception as e:
+            if not is_db_outage(e):
+                raise
+            breaker.record_failure()
+            print(f"Order journal replay stopped, the database is still unavailable: {e}")
+            return 0
+        breaker.record_success()
+        return saved
+
+    async def replay(self, on_saved: SavedListener) -> int:
+        """
+        Writes the journaled orders to the database in batches of batch_size and drops every written batch from the journal.
+        on_saved gets each order that was inserted, with its new ID; orders that were already in the database are only dropped.
+        Raises the outage that stopped the replay; the orders not written yet stay journaled.
+
+        Returns:
+            int: The number of orders inserted.
+        """
+        if self._replaying:
+            return 0
+        self._replaying = True
+        try:
+            async with self._lock:
+                orders = self.pending()
+            saved = 0
+            for start in range(0, len(orders), self.batch_size):
+                saved += await self._replay_batch(orders[start:start + self.batch_size], on_saved)
+            return saved
+        finally:
+            self._replaying = False
+
+    async def _replay_batch(self, batch: List[DomainOrder], on_saved: SavedListener) -> int:
+        if len(batch) > 1:
+            try:
+                return await self._commit(batch, on_saved)
+            except Exception as e:
+                if is_db_outage(e):
+                    raise
+                print(f"Order journal batch of {len(batch)} failed ({type(e).__name__}), replaying orders one by one...")
+        saved = 0
+        for order in batch:
+            try:
+                saved += await self._commit([order], on_saved)
+            except Exception as e:
+                if is_db_outage(e):
+                    raise
+                await self._reject(order, e)
+        return saved
+
+    async def _commit(self, batch: List[DomainOrder], on_saved: SavedListener) -> int:
+        async with self.session_factory() as session:
+            repository = SQLAlchemyOrderRepository(session)
+            existing = await repository.get_existing_idempotency_keys([order.idempotency_key for order in batch])
+            fresh = []
+            for order in batch:
+                if order.idempotency_key not in existing:
+                    existing.add(order.idempotency_key)
+                    fresh.append(order)
+            if fresh:
+                try:
+                    await repository.add_many(fresh)
+                except Exception:
+                    for order in fresh:
+                        order.id = None
+                    raise
+        await self._drop({order.idempotency_key for order in batch})
+        metrics.inc("order_journal_replayed_total", len(fresh))
+        for order in fresh:
+            try:
+                await on_saved(order)
+            except Exception as e:
+                print(f"Follow-up of journaled order #{order.id} failed: {e}")
+        return len(fresh)
+
+    async def _reject(self, order: DomainOrder, error: Exception) -> None:
+        # The database refuses the order itself: set it aside for a manual look instead of retrying it forever
+        print(f"Journaled order of user {order.user_id} was rejected by the database and moved to {self.rejected_path}: {error}")
+        metrics.inc("order_journal_rejected_total")
+        line = json.dumps(_encode(order), ensure_ascii=False) + "\n"
+        await asyncio.to_thread(self._append_line, self.rejected_path, line)
+        await self._drop({order.idempotency_key})
+
+    async def _drop(self, keys: Set[str]) -> None:
+        async with self._lock:
+            self._depth = await asyncio.to_thread(self._rewrite_without, keys)
+        metrics.set_gauge("order_journal_depth", self._depth)
+
+    def _read(self) -> Tuple[List[Tuple[str, DomainOrder]], List[str]]:
+        """
+        Returns the entries of the journal with their raw lines, and the lines that could not be parsed.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return [], []
+        entries, unreadable = [], []
+        for number, line in enumerate(lines, 1):
+            try:
+                entries.append((line, _decode(json.loads(line))))
+            except (ValueError, KeyError, TypeError):
+                # A crash in the middle of an append leaves a torn line; it is moved aside on the next rewrite
+                print(f"Skipping unreadable line {number} of the order journal {self.path}.")
+                unreadable.append(line if line.endswith("\n") else line + "\n")
+        return entries, unreadable
+
+    def _rewrite_without(self, keys: Set[str]) -> int:
+        """
+        Atomically replaces the journal with the entries whose basket token is not in keys.
+        Unreadable lines are moved to the rejected file rather than lost. Returns the number of entries left.
+        """
+        entries, unreadable = self._read()
+        kept = [line for line, order in entries if order.idempotency_key not in keys]
+        if unreadable:
+            # Kept for a manual look before the journal is rewritten without them
+            self._append_line(self.rejected_path, "".join(unreadable))
+            metrics.inc("order_journal_rejected_total", len(unreadable))
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.writelines(kept)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, self.path)
+        self._fsync_directory()
+        return len(kept)
+
+    def _append_line(self, path: str, line: str) -> None:
+        created = not os.path.exists(path)
+        if not created:
+            with open(path, "rb") as file:
+                size = file.seek(0, os.SEEK_END)
+                if size:
+                    file.seek(size - 1)
+                    if file.read(1) != b"\n":
+                        # The file ends in a line torn by a crash: keep the new entry on a line of its own
+                        line = "\n" + line
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(line)
+            file.flush()
+            os.fsync(file.fileno())
+        if created:
+            self._fsync_directory()
+
+    def _fsync_directory(self) -> None:
+        # Makes a new or replaced file itself survive a power loss, not just its contents
+        descriptor = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from typing import List, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from src.application.metrics import metrics
+from src.domain.entities.order import Order as DomainOrder
+from src.infrastructure.database.repositories.order_repository import SQLAlchemyOrderRepository
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+PendingOrder = Tuple[DomainOrder, asyncio.Future, float]
+
+
+class OrderBatchWriter:
+    """
+    Write-behind order inserts with group commit.
+
+    Orders confirmed within a few milliseconds of each other are inserted in one transaction,
+    so the whole group pays for a single commit instead of one each. Every caller still waits
+    for its own order: it gets the generated ID on success and its own exception on failure.
+    When a batch fails, its orders are retried one by one so one bad row (e.g. a replayed
+    basket token) does not fail the others.
+    """
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], max_batch: int = 50, max_delay: float = 0.005):
+        """
+        Args:
+            session_factory (async_sessionmaker[AsyncSession]): Opens the sessions batches are written with.
+            max_batch (int): Batch size that is written right away without waiting.
+            max_delay (float): Seconds the first order of a batch waits for others to join.
+        """
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[PendingOrder] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._writes: Set[asyncio.Task] = set()
+
+    async def add(self, order: DomainOrder) -> None:
+        """
+        Queues the order for the next batch and waits until it is committed; sets order.id.
+        Raises the exception the order's insert failed with.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((order, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        # The write goes on even if the caller stops waiting, so shield it from cancellation
+        await asyncio.shield(future)
+
+    async def close(self) -> None:
+        """
+        Writes whatever is still queued and waits for running batches.
+        """
+        self._flush()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def _flush(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._write(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: List[PendingOrder]) -> None:
+        metrics.observe("order_write_batch_size", len(batch), buckets=BATCH_SIZE_BUCKETS)
+        started = time.perf_counter()
+        try:
+            await self._insert([order for order, _, _ in batch])
+        except Exception as e:
+            metrics.inc("order_write_batch_failures_total")
+            if len(batch) == 1:
+                self._settle(batch[0], e)
+                return
+            print(f"Order batch of {len(batch)} failed ({type(e).__name__}), retrying orders one by one...")
+            for item in batch:
+                try:
+                    await self._insert([item[0]])
+                except Exception as item_error:
+                    self._settle(item, item_error)
+                else:
+                    self._settle(item)
+            return
+        metrics.observe("order_write_commit_ms", (time.perf_counter() - started) * 1000)
+        for item in batch:
+            self._settle(item)
+
+    async def _insert(self, orders: List[DomainOrder]) -> None:
+        async with self.session_factory() as session:
+            try:
+                await SQLAlchemyOrderRepository(session).add_many(orders)
+            except Exception:
+                for order in orders:
+                    order.id = None
+                raise
+
+    @staticmethod
+    def _settle(item: PendingOrder, error: Optional[Exception] = None) -> None:
+        _, future, queued_at = item
+        metrics.observe("order_write_latency_ms", (time.perf_counter() - queued_at) * 1000)
+        if future.done():
+            return
+        if error:
+            future.set_exception(error)
+        else:
+            future.set_result(None)
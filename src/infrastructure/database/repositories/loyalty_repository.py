@@ -0,0 +1,53 @@
+from typing import List
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.domain.entities.loyalty import LoyaltyEntry
+from src.domain.repositories.loyalty_repository import AbstractLoyaltyRepository
+from src.infrastructure.database.models.loyalty import LoyaltyBalance, LoyaltyLedgerEntry
+
+
+class SQLAlchemyLoyaltyRepository(AbstractLoyaltyRepository):
+    """
+    SQLAlchemy implementation of the loyalty repository.
+    """
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def _dialect(self) -> str:
+        return self.session.bind.dialect.name
+
+    async def add(self, entry: LoyaltyEntry) -> None:
+        await self.session.execute(insert(LoyaltyLedgerEntry).values(
+            user_id=entry.user_id, order_id=entry.order_id, points=entry.points, reason=entry.reason
+        ))
+        # The balance row is incremented in place, so concurrent entries of one user cannot lose an update
+        if self._dialect == "sqlite":
+            stmt = sqlite_insert(LoyaltyBalance).values(user_id=entry.user_id, points=entry.points)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[LoyaltyBalance.user_id],
+                set_={"points": LoyaltyBalance.points + stmt.excluded.points},
+            )
+        else:
+            stmt = mysql_insert(LoyaltyBalance).values(user_id=entry.user_id, points=entry.points)
+            stmt = stmt.on_duplicate_key_update(points=LoyaltyBalance.points + stmt.inserted.points)
+        await self.session.execute(stmt)
+
+    async def get_balance(self, user_id: int) -> int:
+        stmt = select(LoyaltyBalance.points).where(LoyaltyBalance.user_id == user_id)
+        return (await self.session.scalar(stmt)) or 0
+
+    async def get_entries(self, user_id: int, limit: int) -> List[LoyaltyEntry]:
+        stmt = select(LoyaltyLedgerEntry).where(
+            LoyaltyLedgerEntry.user_id == user_id
+        ).order_by(LoyaltyLedgerEntry.id.desc()).limit(limit)
+        result = await self.session.execute(stmt)
+        return [
+            LoyaltyEntry(
+                user_id=row.user_id, points=row.points, reason=row.reason, order_id=row.order_id,
+                id=row.id, created_at=row.created_at,
+            )
+            for row in result.scalars().all()
+        ]
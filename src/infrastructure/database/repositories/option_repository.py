@@ -1,15 +1,21 @@
 import json
-from typing import List, Dict, Optional
+from typing import List, Dict, Mapping, Optional
 from src.domain.entities.option import Option
 from src.domain.repositories.option_repository import AbstractOptionRepository
+from src.infrastructure.database.repositories.overlay import Overlay, load_shop_overrides
 
 class InMemoryOptionRepository(AbstractOptionRepository):
     """
     In-memory implementation of the Option Repository that loads data from a JSON file.
+    Shops with their own options get an overlay of the base ones, like their products.
     """
-    def __init__(self, file_path: str):
-        self._options: Dict[str, List[Option]] = {}
+    def __init__(self, file_path: str, overrides_path: Optional[str] = None):
+        self._options: Dict[int, Option] = {}
+        self._by_category: Dict[str, List[Option]] = {}
+        self._shop_options: Dict[int, Mapping[int, Option]] = {}
+        self._shop_by_category: Dict[int, Dict[str, List[Option]]] = {}
         self._load_data(file_path)
+        self._load_overrides(overrides_path)
 
     def _load_data(self, file_path: str):
         """Loads option data from a JSON file into memory."""
@@ -17,23 +23,37 @@ class InMemoryOptionRepository(AbstractOptionRepository):
             with open(file_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 for category, items in data.items():
-                    self._options[category] = [Option.from_dict(item, category) for item in items]
+                    self._by_category[category] = [Option.from_dict(item, category) for item in items]
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Error loading options data: {e}")
-            self._options = {}
+            self._by_category = {}
+        self._options = {option.id: option for options in self._by_category.values() for option in options}
 
-    async def get_all_by_category(self, category: str) -> List[Option]:
+    def _load_overrides(self, overrides_path: Optional[str]):
+        """Builds the option overlays of the shops with their own options."""
+        for shop_id, changes in load_shop_overrides(overrides_path, "options").items():
+            options: Dict[int, Optional[Option]] = {}
+            for option_id, fields in changes.items():
+                base = self._options.get(option_id)
+                if fields is None:
+                    options[option_id] = None
+                    continue
+                fields = {**(base.to_dict() if base else {}), **fields, "id": option_id}
+                options[option_id] = Option.from_dict(fields, fields["category"])
+            self._shop_options[shop_id] = overlay = Overlay(self._options, options)
+            by_category: Dict[str, List[Option]] = {}
+            for option in overlay.values():
+                by_category.setdefault(option.category, []).append(option)
+            self._shop_by_category[shop_id] = by_category
+
+    async def get_all_by_category(self, category: str, shop_id: Optional[int] = None) -> List[Option]:
         """
         Retrieves all options for a given category from in-memory storage.
         """
-        return self._options.get(category, [])
+        return self._shop_by_category.get(shop_id, self._by_category).get(category, [])
 
-    async def get_by_id(self, option_id: int) -> Optional[Option]:
+    async def get_by_id(self, option_id: int, shop_id: Optional[int] = None) -> Optional[Option]:
         """
         Retrieves an option by its unique ID from in-memory storage.
         """
-        for category_options in self._options.values():
-            for option in category_options:
-                if option.id == option_id:
-                    return option
-        return None
\ No newline at end of file
+        return self._shop_options.get(shop_id, self._options).get(option_id)
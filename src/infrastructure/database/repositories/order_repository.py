@@ -1,9 +1,26 @@
-from typing import List, Optional
-from sqlalchemy import select
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import String, and_, insert, literal, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.domain.entities.order import Order as DomainOrder, OrderStatus
+from src.domain.entities.order import Order as DomainOrder, OrderItem as DomainOrderItem, OrderStatus
 from src.domain.repositories.order_repository import AbstractOrderRepository
 from src.infrastructure.database.models.order import Order as ORMOrder
+from src.infrastructure.database.models.order_item import OrderItem as ORMOrderItem
+from src.infrastructure.database.models.order_history import OrderHistory
+
+ACTIVE_STATUSES = [OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.IN_PROGRESS]
+FINISHED_STATUSES = [OrderStatus.COMPLETED, OrderStatus.CANCELLED]
+
+
+def to_db_time(moment: datetime) -> datetime:
+    """Normalizes an aware datetime to the naive UTC value stored in DATETIME columns."""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def from_db_time(moment: datetime) -> datetime:
+    """Marks a naive UTC value read from a DATETIME column as aware."""
+    return moment.replace(tzinfo=timezone.utc)
+
 
 class SQLAlchemyOrderRepository(AbstractOrderRepository):
     """
@@ -12,62 +29,167 @@ class SQLAlchemyOrderRepository(AbstractOrderRepository):
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    @staticmethod
+    def _to_domain(orm_order: ORMOrder | OrderHistory) -> DomainOrder:
+        return DomainOrder(
+            id=orm_order.id,
+            idempotency_key=orm_order.idempotency_key,
+            user_id=orm_order.user_id,
+            shop_id=orm_order.shop_id,
+            address=orm_order.address,
+            quantity=orm_order.quantity,
+            items=[
+                DomainOrderItem(
+                    id=item.id,
+                    order_id=item.order_id,
+                    product_name=item.product_name,
+                    volume=item.volume,
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                    milk_name=item.milk_name,
+                    syrup_name=item.syrup_name
+                )
+                for item in orm_order.items
+            ],
+            pickup_time=from_db_time(orm_order.pickup_time),
+            total_price=orm_order.total_price,
+            status=orm_order.status,
+            is_completed=orm_order.is_completed,
+            created_at=orm_order.created_at,
+            updated_at=orm_order.updated_at
+        )
+
     async def get_by_id(self, order_id: int) -> Optional[DomainOrder]:
         stmt = select(ORMOrder).where(ORMOrder.id == order_id)
         orm_order = (await self.session.execute(stmt)).scalar_one_or_none()
+        if not orm_order:
+            # Finished orders are moved to the history table by the archiver
+            stmt = select(OrderHistory).where(OrderHistory.id == order_id).limit(1)
+            orm_order = (await self.session.execute(stmt)).scalar_one_or_none()
         if orm_order:
-            return DomainOrder(
-                id=orm_order.id,
-                user_id=orm_order.user_id,
-                address=orm_order.address,
-                product_name=orm_order.product_name,
-                volume=orm_order.volume,
-                quantity=orm_order.quantity,
-                milk_name=orm_order.milk_name,
-                syrup_name=orm_order.syrup_name,
-                pickup_time=orm_order.pickup_time,
-                total_price=orm_order.total_price,
-                status=orm_order.status,
-                is_completed=orm_order.is_completed,
-                created_at=orm_order.created_at,
-                updated_at=orm_order.updated_at
-            )
+            return self._to_domain(orm_order)
         return None
 
-    async def add(self, order: DomainOrder) -> None:
-        orm_order = ORMOrder(
+    async def get_by_idempotency_key(self, idempotency_key: str) -> Optional[DomainOrder]:
+        stmt = select(ORMOrder).where(ORMOrder.idempotency_key == idempotency_key)
+        orm_order = (await self.session.execute(stmt)).scalar_one_or_none()
+        if not orm_order:
+            stmt = select(OrderHistory).where(OrderHistory.idempotency_key == idempotency_key).limit(1)
+            orm_order = (await self.session.execute(stmt)).scalar_one_or_none()
+        if orm_order:
+            return self._to_domain(orm_order)
+        return None
+
+    async def get_existing_idempotency_keys(self, idempotency_keys: List[str]) -> Set[str]:
+        existing = set()
+        if not idempotency_keys:
+            return existing
+        for model in (ORMOrder, OrderHistory):
+            stmt = select(model.idempotency_key).where(model.idempotency_key.in_(idempotency_keys))
+            existing.update((await self.session.execute(stmt)).scalars().all())
+        return existing
+
+    async def get_last_by_user(self, user_id: int) -> Optional[DomainOrder]:
+        # Reads one entry of the (user_id, created_at) index backwards instead of sorting the user's orders
+        for model in (ORMOrder, OrderHistory):
+            stmt = select(model).where(model.user_id == user_id).order_by(model.created_at.desc(), model.id.desc()).limit(1)
+            orm_order = (await self.session.execute(stmt)).scalar_one_or_none()
+            if orm_order:
+                return self._to_domain(orm_order)
+        return None
+
+    async def get_page_by_user(self, user_id: int, cursor: Optional[Tuple[datetime, int]], limit: int,
+                               newer: bool = False) -> List[DomainOrder]:
+        # Keyset paging: each query is a range scan of at most `limit` entries of the (user_id, created_at)
+        # index, which InnoDB orders by id within equal times, so deep pages cost the same as the first.
+        # An order is in only one of the tables; the archiver may move one between the two reads, hence the dict.
+        orders: Dict[int, DomainOrder] = {}
+        for model in (ORMOrder, OrderHistory):
+            stmt = select(model).where(model.user_id == user_id)
+            if cursor:
+                created_at, order_id = self._cursor_time(cursor[0]), cursor[1]
+                if newer:
+                    stmt = stmt.where(or_(model.created_at > created_at, and_(model.created_at == created_at, model.id > order_id)))
+                else:
+                    stmt = stmt.where(or_(model.created_at < created_at, and_(model.created_at == created_at, model.id < order_id)))
+            if newer:
+                stmt = stmt.order_by(model.created_at, model.id)
+            else:
+                stmt = stmt.order_by(model.created_at.desc(), model.id.desc())
+            result = await self.session.execute(stmt.limit(limit))
+            for orm_order in result.scalars().all():
+                orders[orm_order.id] = self._to_domain(orm_order)
+        page = sorted(orders.values(), key=lambda order: (order.created_at, order.id), reverse=not newer)[:limit]
+        return page[::-1] if newer else page
+
+    @property
+    def _dialect(self) -> str:
+        return self.session.bind.dialect.name
+
+    def _cursor_time(self, created_at: datetime):
+        # created_at is written by the database clock. SQLite keeps it as "YYYY-MM-DD HH:MM:SS" text,
+        # which a bound DATETIME (rendered with microseconds) would never compare equal to.
+        if self._dialect == "sqlite":
+            return literal(created_at.strftime("%Y-%m-%d %H:%M:%S"), String)
+        return created_at
+
+    @staticmethod
+    def _to_orm(order: DomainOrder) -> ORMOrder:
+        return ORMOrder(
             user_id=order.user_id,
+            shop_id=order.shop_id,
             address=order.address,
-            product_name=order.product_name,
-            volume=order.volume,
             quantity=order.quantity,
-            milk_name=order.milk_name,
-            syrup_name=order.syrup_name,
-            pickup_time=order.pickup_time,
+            pickup_time=to_db_time(order.pickup_time),
             total_price=order.total_price,
             status=order.status,
-            is_completed=order.is_completed
+            is_completed=order.is_completed,
+            idempotency_key=order.idempotency_key,
+            items=[] # Written below with one bulk INSERT; marks the collection as loaded
         )
-        self.session.add(orm_order)
-        await self.session.flush() # Flush to get the new ID
-        order.id = orm_order.id # Update the domain object with the new ID
-        await self.session.commit()
 
+    async def _insert_items(self, orders: List[DomainOrder]) -> None:
+        rows = []
+        for order in orders:
+            for item in order.items:
+                item.order_id = order.id
+                rows.append({
+                    "order_id": order.id,
+                    "product_name": item.product_name,
+                    "volume": item.volume,
+                    "quantity": item.quantity,
+                    "unit_price": item.unit_price,
+                    "milk_name": item.milk_name,
+                    "syrup_name": item.syrup_name,
+                })
+        if rows:
+            # executemany: the driver sends all items as one multi-row INSERT
+            await self.session.execute(insert(ORMOrderItem), rows)
+
+    async def add(self, order: DomainOrder) -> None:
+        await self.add_many([order])
+
+    async def add_many(self, orders: List[DomainOrder]) -> None:
+        orm_orders = [self._to_orm(order) for order in orders]
+        self.session.add_all(orm_orders)
+        await self.session.flush() # Flush to get the new IDs
+        for order, orm_order in zip(orders, orm_orders):
+            order.id = orm_order.id # Update the domain objects with the new IDs
+        await self._insert_items(orders)
+        await self.session.commit()
 
     async def update(self, order: DomainOrder) -> None:
         orm_order = await self.session.get(ORMOrder, order.id)
         if orm_order:
             orm_order.user_id = order.user_id
+            orm_order.shop_id = order.shop_id
             orm_order.address = order.address
-            orm_order.product_name = order.product_name
-            orm_order.volume = order.volume
             orm_order.quantity = order.quantity
-            orm_order.milk_name = order.milk_name
-            orm_order.syrup_name = order.syrup_name
-            orm_order.pickup_time = order.pickup_time
+            orm_order.pickup_time = to_db_time(order.pickup_time)
             orm_order.total_price = order.total_price
             orm_order.status = order.status
             orm_order.is_completed = order.is_completed
+            # Items are immutable once the order is placed
             # updated_at is handled by TimestampMixin
             await self.session.commit()
         else:
@@ -75,27 +197,55 @@ class SQLAlchemyOrderRepository(AbstractOrderRepository):
 
     async def get_active_orders(self) -> List[DomainOrder]:
         stmt = select(ORMOrder).where(
-            ORMOrder.status.in_([OrderStatus.PENDING, OrderStatus.CONFIRMED, OrderStatus.IN_PROGRESS]),
+            ORMOrder.status.in_(ACTIVE_STATUSES),
             ORMOrder.is_completed == False
-        )
+        ).order_by(ORMOrder.pickup_time)
+        result = await self.session.execute(stmt)
+        return [self._to_domain(orm_order) for orm_order in result.scalars().all()]
+
+    async def get_due_orders(self, shop_id: int, start: datetime, end: datetime) -> List[DomainOrder]:
+        # Equality on shop_id plus a range on pickup_time: an index range scan on ix_orders_shop_id_pickup_time
+        stmt = select(ORMOrder).where(
+            ORMOrder.shop_id == shop_id,
+            ORMOrder.pickup_time >= to_db_time(start),
+            ORMOrder.pickup_time < to_db_time(end),
+            ORMOrder.status.in_(ACTIVE_STATUSES),
+            ORMOrder.is_completed == False
+        ).order_by(ORMOrder.pickup_time)
+        result = await self.session.execute(stmt)
+        return [self._to_domain(orm_order) for orm_order in result.scalars().all()]
+
+    async def get_overdue_orders(self, shop_id: int, now: datetime) -> List[DomainOrder]:
+        stmt = select(ORMOrder).where(
+            ORMOrder.shop_id == shop_id,
+            ORMOrder.pickup_time < to_db_time(now),
+            ORMOrder.status.in_(ACTIVE_STATUSES),
+            ORMOrder.is_completed == False
+        ).order_by(ORMOrder.pickup_time)
+        result = await self.session.execute(stmt)
+        return [self._to_domain(orm_order) for orm_order in result.scalars().all()]
+
+    async def assign_shop_ids(self, shop_ids: Dict[str, int]) -> int:
+        assigned = 0
+        for address, shop_id in shop_ids.items():
+            # Archived orders too: rollups and exports select them by shop ID
+            for model in (ORMOrder, OrderHistory):
+                result = await self.session.execute(
+                    update(model).where(model.address == address, model.shop_id.is_(None)).values(shop_id=shop_id)
+                )
+                assigned += result.rowcount
+        await self.session.commit()
+        return assigned
+
+    async def get_orders_page(self, shop_id: int, start: datetime, end: datetime, after_id: int, limit: int,
+                              archived: bool = False) -> List[DomainOrder]:
+        # Keyset pagination: each page starts after the last seen ID instead of an OFFSET, so late pages cost the same
+        model = OrderHistory if archived else ORMOrder
+        stmt = select(model).where(
+            model.shop_id == shop_id,
+            model.pickup_time >= to_db_time(start),
+            model.pickup_time < to_db_time(end),
+            model.id > after_id
+        ).order_by(model.id).limit(limit)
         result = await self.session.execute(stmt)
-        orm_orders = result.scalars().all()
-        return [
-            DomainOrder(
-                id=orm_order.id,
-                user_id=orm_order.user_id,
-                address=orm_order.address,
-                product_name=orm_order.product_name,
-                volume=orm_order.volume,
-                quantity=orm_order.quantity,
-                milk_name=orm_order.milk_name,
-                syrup_name=orm_order.syrup_name,
-                pickup_time=orm_order.pickup_time,
-                total_price=orm_order.total_price,
-                status=orm_order.status,
-                is_completed=orm_order.is_completed,
-                created_at=orm_order.created_at,
-                updated_at=orm_order.updated_at
-            )
-            for orm_order in orm_orders
-        ]
+        return [self._to_domain(orm_order) for orm_order in result.scalars().all()]
@@ -0,0 +1,69 @@
+import json
+from typing import Dict, Iterator, Mapping, Optional, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class Overlay(Mapping[K, V]):
+    """
+    Read-only view of a base mapping with some keys replaced, added or removed (mapped to None).
+
+    Only the changes are stored and lookups are two dict probes, so any number of shop catalogs
+    can share one base menu without copying it.
+    """
+    def __init__(self, base: Mapping[K, V], changes: Dict[K, Optional[V]]):
+        self._base = base
+        self._changes = changes
+        self._len = sum(1 for key in base if changes.get(key, base[key]) is not None) + sum(
+            1 for key, value in changes.items() if key not in base and value is not None
+        )
+
+    def __getitem__(self, key: K) -> V:
+        if key in self._changes:
+            value = self._changes[key]
+            if value is None:
+                raise KeyError(key)
+            return value
+        return self._base[key]
+
+    def __iter__(self) -> Iterator[K]:
+        # Base order first, so a replaced item keeps its place in the menu; added items go last
+        for key in self._base:
+            if self._changes.get(key, self._base[key]) is not None:
+                yield key
+        for key, value in self._changes.items():
+            if key not in self._base and value is not None:
+                yield key
+
+    def __len__(self) -> int:
+        return self._len
+
+
+def load_shop_overrides(file_path: Optional[str], section: str) -> Dict[int, Dict[int, Optional[dict]]]:
+    """
+    Reads one section ("products" or "options") of the per-shop menu overrides file.
+
+    The file maps shop IDs to the changes of their catalog; an item ID maps to the fields that differ
+    from the base menu, to a complete new item, or to null if the shop does not sell it:
+        {"2": {"products": {"6": null, "3": {"volumes": [{"volume": "250мл", "price": 180}]}},
+               "options": {"102": {"price": 40}}}}
+    A missing file means every shop sells the base menu.
+
+    Returns:
+        Dict[int, Dict[int, Optional[dict]]]: Shop ID -> item ID -> changed fields or None.
+    """
+    if not file_path:
+        return {}
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"Error loading shop menu overrides: {e}")
+        return {}
+    return {
+        int(shop_id): {int(item_id): fields for item_id, fields in changes.get(section, {}).items()}
+        for shop_id, changes in data.items()
+    }
@@ -1,21 +1,33 @@
 import json
-from typing import List, Optional, Dict
+from typing import List, Mapping, Optional, Dict, Tuple
 from src.domain.entities.product import Product
 from src.domain.repositories.product_repository import AbstractProductRepository
+from src.infrastructure.database.repositories.overlay import Overlay, load_shop_overrides
+
+PriceKey = Tuple[int, str]  # (product ID, volume)
 
 class InMemoryProductRepository(AbstractProductRepository):
     """
     In-memory implementation of the Product Repository that loads data from a JSON file.
     This is suitable for menus that do not change often.
+
+    Shops can sell a different menu, described as overrides of the base one (see load_shop_overrides).
+    A shop's catalog and price table are overlays that store only the shop's changes and share everything
+    else with the base, and both are built at load time, so a price is a dict lookup for any shop.
     """
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, overrides_path: Optional[str] = None):
         """
         Initializes the repository and loads the menu from the specified JSON file.
         Args:
             file_path (str): The path to the menu.json file.
+            overrides_path (Optional[str]): The path to the per-shop overrides file, if any.
         """
         self._products: Dict[int, Product] = {}
+        self._prices: Dict[PriceKey, int] = {}
+        self._shop_products: Dict[int, Mapping[int, Product]] = {}
+        self._shop_prices: Dict[int, Mapping[PriceKey, int]] = {}
         self._load_data(file_path)
+        self._load_overrides(overrides_path)
 
     def _load_data(self, file_path: str):
         """Loads product data from a JSON file into memory."""
@@ -29,16 +41,40 @@ class InMemoryProductRepository(AbstractProductRepository):
             # In a real application, you'd want better error handling/logging
             print(f"Error loading menu data: {e}")
             self._products = {}
+        self._prices = {(product.id, v.volume): v.price for product in self._products.values() for v in product.volumes}
+
+    def _load_overrides(self, overrides_path: Optional[str]):
+        """Builds the catalog and price table overlays of the shops with their own menu."""
+        for shop_id, changes in load_shop_overrides(overrides_path, "products").items():
+            products: Dict[int, Optional[Product]] = {}
+            prices: Dict[PriceKey, Optional[int]] = {}
+            for product_id, fields in changes.items():
+                base = self._products.get(product_id)
+                if base:
+                    prices.update({(product_id, v.volume): None for v in base.volumes})
+                if fields is None:
+                    products[product_id] = None
+                    continue
+                product = Product.from_dict({**(base.to_dict() if base else {}), **fields, "id": product_id})
+                products[product_id] = product
+                prices.update({(product_id, v.volume): v.price for v in product.volumes})
+            self._shop_products[shop_id] = Overlay(self._products, products)
+            self._shop_prices[shop_id] = Overlay(self._prices, prices)
 
-    async def get_all(self) -> List[Product]:
+    async def get_all(self, shop_id: Optional[int] = None) -> List[Product]:
         """
-        Retrieves all products from in-memory storage.
+        Retrieves all products of a shop, or of the base menu, from in-memory storage.
         """
-        return list(self._products.values())
+        return list(self._shop_products.get(shop_id, self._products).values())
 
-    async def get_by_id(self, product_id: int) -> Optional[Product]:
+    async def get_by_id(self, product_id: int, shop_id: Optional[int] = None) -> Optional[Product]:
         """
         Retrieves a product by its unique ID from in-memory storage.
         """
-        return self._products.get(product_id)
+        return self._shop_products.get(shop_id, self._products).get(product_id)
 
+    async def get_price(self, product_id: int, volume: str, shop_id: Optional[int] = None) -> Optional[int]:
+        """
+        Looks up the price of a product volume in the precomputed price table of a shop.
+        """
+        return self._shop_prices.get(shop_id, self._prices).get((product_id, volume))
@@ -0,0 +1,119 @@
+from dataclasses import asdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Integer, Table, cast, delete, exists, func, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.domain.entities.order import OrderStatus
+from src.domain.entities.sales import ProductSales, SalesRollup as DomainSalesRollup
+from src.domain.repositories.sales_repository import AbstractSalesRepository
+from src.infrastructure.database.models.order import Order as ORMOrder
+from src.infrastructure.database.models.order_history import OrderHistory, OrderItemHistory
+from src.infrastructure.database.models.order_item import OrderItem as ORMOrderItem
+from src.infrastructure.database.models.sales_rollup import SalesRollup as ORMSalesRollup
+from src.infrastructure.database.repositories.order_repository import to_db_time
+
+RollupKey = Tuple[int, date, int, str]
+
+
+class SQLAlchemySalesRepository(AbstractSalesRepository):
+    """
+    SQLAlchemy implementation of the sales rollup repository.
+    """
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def _dialect(self) -> str:
+        return self.session.bind.dialect.name
+
+    async def add(self, rollups: List[DomainSalesRollup]) -> None:
+        if not rollups:
+            return
+        rows = [asdict(rollup) for rollup in rollups]
+        if self._dialect == "sqlite":
+            stmt = sqlite_insert(ORMSalesRollup).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ORMSalesRollup.shop_id, ORMSalesRollup.day, ORMSalesRollup.hour, ORMSalesRollup.product_name],
+                set_={
+                    "orders_count": ORMSalesRollup.orders_count + stmt.excluded.orders_count,
+                    "drinks": ORMSalesRollup.drinks + stmt.excluded.drinks,
+                    "revenue": ORMSalesRollup.revenue + stmt.excluded.revenue,
+                },
+            )
+        else:
+            stmt = mysql_insert(ORMSalesRollup).values(rows)
+            stmt = stmt.on_duplicate_key_update(
+                orders_count=ORMSalesRollup.orders_count + stmt.inserted.orders_count,
+                drinks=ORMSalesRollup.drinks + stmt.inserted.drinks,
+                revenue=ORMSalesRollup.revenue + stmt.inserted.revenue,
+            )
+        await self.session.execute(stmt)
+
+    async def replace_since(self, day: Optional[date], rollups: List[DomainSalesRollup]) -> None:
+        stmt = delete(ORMSalesRollup)
+        if day:
+            stmt = stmt.where(ORMSalesRollup.day >= day)
+        await self.session.execute(stmt)
+        if rollups:
+            await self.session.execute(insert(ORMSalesRollup), [asdict(rollup) for rollup in rollups])
+        await self.session.commit()
+
+    async def aggregate_completed_orders(self, since: Optional[datetime]) -> List[DomainSalesRollup]:
+        totals: Dict[RollupKey, DomainSalesRollup] = {}
+        for orders, items in ((ORMOrder.__table__, ORMOrderItem.__table__),
+                              (OrderHistory.__table__, OrderItemHistory.__table__)):
+            for row in await self._aggregate(orders, items, since):
+                shop_id, day, hour, product_name, orders_count, drinks, revenue = row
+                day = date.fromisoformat(str(day))
+                rollup = totals.get((shop_id, day, hour, product_name))
+                if rollup is None:
+                    rollup = totals[(shop_id, day, hour, product_name)] = DomainSalesRollup(shop_id, day, hour, product_name)
+                rollup.orders_count += orders_count
+                rollup.drinks += int(drinks)
+                rollup.revenue += int(revenue)
+        return list(totals.values())
+
+    async def _aggregate(self, orders: Table, items: Table, since: Optional[datetime]) -> list:
+        # Grouped in the database by UTC hour, so only a few rows per shop and hour come back
+        day = func.date(orders.c.pickup_time)
+        if self._dialect == "sqlite":
+            hour = cast(func.strftime("%H", orders.c.pickup_time), Integer)
+        else:
+            hour = func.hour(orders.c.pickup_time)
+        stmt = select(
+            orders.c.shop_id, day, hour, items.c.product_name,
+            func.count(func.distinct(orders.c.id)),
+            func.sum(items.c.quantity),
+            func.sum(items.c.quantity * items.c.unit_price),
+        ).join(
+            items, items.c.order_id == orders.c.id
+        ).where(
+            orders.c.status == OrderStatus.COMPLETED,
+            orders.c.shop_id.is_not(None)
+        ).group_by(orders.c.shop_id, day, hour, items.c.product_name)
+        if since:
+            stmt = stmt.where(orders.c.pickup_time >= to_db_time(since))
+        return (await self.session.execute(stmt)).all()
+
+    async def get_product_sales(self, shop_id: int, start: date, end: date) -> List[ProductSales]:
+        drinks = func.sum(ORMSalesRollup.drinks)
+        stmt = select(ORMSalesRollup.product_name, drinks, func.sum(ORMSalesRollup.revenue)).where(
+            ORMSalesRollup.shop_id == shop_id,
+            ORMSalesRollup.day >= start,
+            ORMSalesRollup.day <= end
+        ).group_by(ORMSalesRollup.product_name).order_by(drinks.desc())
+        result = await self.session.execute(stmt)
+        return [ProductSales(product_name, int(drinks), int(revenue)) for product_name, drinks, revenue in result.all()]
+
+    async def get_hourly_drinks(self, shop_id: int, day: date) -> List[tuple]:
+        stmt = select(ORMSalesRollup.hour, func.sum(ORMSalesRollup.drinks)).where(
+            ORMSalesRollup.shop_id == shop_id,
+            ORMSalesRollup.day == day
+        ).group_by(ORMSalesRollup.hour).order_by(ORMSalesRollup.hour)
+        result = await self.session.execute(stmt)
+        return [(hour, int(drinks)) for hour, drinks in result.all()]
+
+    async def is_empty(self) -> bool:
+        return not await self.session.scalar(select(exists().select_from(ORMSalesRollup)))
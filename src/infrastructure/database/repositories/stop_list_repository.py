@@ -0,0 +1,41 @@
+from typing import List
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.domain.entities.stop_list import StopListItem as DomainStopListItem
+from src.domain.repositories.stop_list_repository import AbstractStopListRepository
+from src.infrastructure.database.models.stop_list import StopListItem as ORMStopListItem
+
+
+class SQLAlchemyStopListRepository(AbstractStopListRepository):
+    """
+    SQLAlchemy implementation of the stop-list repository.
+    """
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def _dialect(self) -> str:
+        return self.session.bind.dialect.name
+
+    async def get_all(self) -> List[DomainStopListItem]:
+        result = await self.session.execute(select(ORMStopListItem.shop_id, ORMStopListItem.item_type, ORMStopListItem.item_id))
+        return [DomainStopListItem(shop_id, item_type, item_id) for shop_id, item_type, item_id in result.all()]
+
+    async def add(self, item: DomainStopListItem) -> None:
+        # Two admins stopping the same item at once must not fail on the primary key
+        if self._dialect == "sqlite":
+            stmt = sqlite_insert(ORMStopListItem).on_conflict_do_nothing()
+        else:
+            stmt = mysql_insert(ORMStopListItem).prefix_with("IGNORE")
+        await self.session.execute(stmt.values(shop_id=item.shop_id, item_type=item.item_type, item_id=item.item_id))
+        await self.session.commit()
+
+    async def remove(self, item: DomainStopListItem) -> None:
+        await self.session.execute(delete(ORMStopListItem).where(
+            ORMStopListItem.shop_id == item.shop_id,
+            ORMStopListItem.item_type == item.item_type,
+            ORMStopListItem.item_id == item.item_id
+        ))
+        await self.session.commit()
@@ -0,0 +1,17 @@
+import asyncio
+
+import pytest
+
+from src.infrastructure.database import connection
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """
+    A fresh DB_BACKEND=sqlite database in a temporary file, with the schema created from the models.
+    """
+    monkeypatch.setattr(connection, "SQLITE_PATH", str(tmp_path / "brucup.sqlite3"))
+    monkeypatch.setattr(connection, "_engine", None)
+    engine = asyncio.run(connection.init_database(connection.database_url("sqlite")))
+    yield connection.async_session_maker
+    asyncio.run(engine.dispose())
@@ -0,0 +1,108 @@
+import asyncio
+import csv
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.application.services.export_service import OrderExportService
+from src.application.services.option_service import OptionService
+from src.application.services.order_service import DuplicateOrderError, OrderService
+from src.application.services.product_service import ProductService
+from src.application.services.sales_service import SalesService
+from src.application.services.slot_service import PickupSlotScheduler
+from src.application.time_utils import to_shop_time
+from src.domain.entities.order import OrderStatus
+from src.domain.entities.shop import Shop
+from src.infrastructure.database.archiver import OrderArchiver
+from src.infrastructure.database.repositories.option_repository import InMemoryOptionRepository
+from src.infrastructure.database.repositories.order_repository import SQLAlchemyOrderRepository
+from src.infrastructure.database.repositories.product_repository import InMemoryProductRepository
+
+SHOP = Shop(id=1, address="ул. Ленина, 1", admin_id=1, timezone="Europe/Moscow")
+
+
+def make_services(session, slot_scheduler=None):
+    product_service = ProductService(product_repository=InMemoryProductRepository(file_path="data/menu.json"))
+    option_service = OptionService(option_repository=InMemoryOptionRepository(file_path="data/options.json"))
+    return OrderService(session, product_service, option_service, slot_scheduler)
+
+
+async def place_and_complete(session_factory) -> int:
+    pickup_at = datetime.now(timezone.utc) + timedelta(minutes=30)
+    order_data = {
+        "user_id": 1001,
+        "pickup_at": pickup_at.isoformat(),
+        "cart": [[2, "350мл", None, None, 1], [3, "250мл", None, None, 2]],
+        "basket_token": "a" * 32,
+    }
+    async with session_factory() as session:
+        order = await make_services(session).create_order(order_data, SHOP)
+    async with session_factory() as session:
+        await make_services(session).complete_order(order.id)
+    return order.id
+
+
+def test_order_flow_on_sqlite(database, tmp_path):
+    order_id = asyncio.run(place_and_complete(database))
+
+    async def check_completed():
+        async with database() as session:
+            order = await SQLAlchemyOrderRepository(session).get_by_id(order_id)
+            report = await SalesService(session).get_shop_report(SHOP.id, days=1)
+        return order, report
+
+    order, report = asyncio.run(check_completed())
+    assert order.status == OrderStatus.COMPLETED and order.is_completed
+    assert [item.quantity for item in order.items] == [1, 2]
+    assert order.quantity == 3
+    # The rollup was updated on completion, in the same transaction as the status
+    assert report.drinks == 3
+    assert report.revenue == order.total_price
+
+    # A negative age makes every finished order old enough to archive
+    archived = asyncio.run(OrderArchiver(database, min_age=timedelta(days=-1), pause=0).run())
+    assert archived == 1
+
+    async def check_history():
+        async with database() as session:
+            repository = SQLAlchemyOrderRepository(session)
+            return await repository.get_active_orders(), await repository.get_by_id(order_id), await repository.get_last_by_user(1001)
+
+    active, archived_order, last_order = asyncio.run(check_history())
+    assert active == []
+    assert archived_order.id == order_id and archived_order.status == OrderStatus.COMPLETED
+    assert last_order.id == order_id
+    assert len(archived_order.items) == 2
+
+    pickup_day = to_shop_time(order.pickup_time, SHOP.id).date()
+    export_path = tmp_path / "orders.csv"
+    exported = asyncio.run(OrderExportService(database).export(str(export_path), "csv", [SHOP.id], pickup_day, pickup_day))
+    assert exported == 1
+    with open(export_path, encoding="utf-8-sig", newline="") as file:
+        rows = list(csv.reader(file, delimiter=";"))
+    assert len(rows) == 1 + 2  # Header and one row per drink
+    assert all(str(order_id) in row for row in rows[1:])
+
+
+def test_replayed_basket_is_caught_by_the_unique_key(database):
+    slot_scheduler = PickupSlotScheduler(default_capacity=6)
+    order_data = {
+        "user_id": 1002,
+        "pickup_at": (datetime.now(timezone.utc) + timedelta(minutes=30)).isoformat(),
+        "cart": [[2, "350мл", None, None, 2]],
+        "basket_token": "b" * 32,
+    }
+
+    async def confirm_twice():
+        async with database() as session:
+            first = await make_services(session, slot_scheduler).create_order(order_data, SHOP)
+        # A second delivery the in-memory guard did not see, e.g. after a restart
+        async with database() as session:
+            with pytest.raises(DuplicateOrderError) as error:
+                await make_services(session, slot_scheduler).create_order(order_data, SHOP)
+        return first, error.value.order
+
+    first, existing = asyncio.run(confirm_twice())
+    assert existing.id == first.id
+    # The capacity taken by the replay was given back
+    assert slot_scheduler.used(SHOP.id, first.pickup_time) == 2
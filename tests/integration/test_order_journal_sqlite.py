@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from src.domain.entities.order import Order, OrderItem
+from src.infrastructure.database.order_journal import OrderJournal
+from src.infrastructure.database.repositories.order_repository import SQLAlchemyOrderRepository
+
+
+def make_order(number: int) -> Order:
+    pickup_time = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(minutes=30)
+    return Order(
+        user_id=3000 + number, shop_id=1, address="ул. Ленина, 1", quantity=1, pickup_time=pickup_time,
+        total_price=260, items=[OrderItem("Латте", "350мл", 1, 260, milk_name="Овсяное")],
+    )
+
+
+def stored_keys(session_factory, keys) -> set:
+    async def query():
+        async with session_factory() as session:
+            return await SQLAlchemyOrderRepository(session).get_existing_idempotency_keys(keys)
+    return asyncio.run(query())
+
+
+def test_replay_writes_journaled_orders_once(database, tmp_path):
+    journal = OrderJournal(str(tmp_path / "journal" / "orders.jsonl"), database, batch_size=2)
+    orders = [make_order(number) for number in range(3)]
+    for order in orders:
+        asyncio.run(journal.append(order))
+    assert journal.depth == 3 and all(order.idempotency_key for order in orders)
+
+    saved = []
+
+    async def on_saved(order):
+        saved.append(order)
+
+    assert asyncio.run(journal.replay(on_saved)) == 3
+    assert all(order.id for order in saved) and [order.user_id for order in saved] == [3000, 3001, 3002]
+    assert saved[0].items[0].milk_name == "Овсяное"
+    assert journal.depth == 0 and journal.pending() == []
+    assert stored_keys(database, [order.idempotency_key for order in orders]) == {order.idempotency_key for order in orders}
+
+    # An order whose commit reached the database before a crash is dropped without a second insert
+    asyncio.run(journal.append(orders[0]))
+    saved.clear()
+    assert asyncio.run(journal.replay(on_saved)) == 0
+    assert saved == [] and journal.depth == 0
+
+
+def test_a_torn_line_is_moved_aside_and_the_rest_replayed(database, tmp_path):
+    path = tmp_path / "orders.jsonl"
+    journal = OrderJournal(str(path), database)
+    asyncio.run(journal.append(make_order(1)))
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"idempotency_key": "torn", "user_')  # A crash in the middle of an append
+
+    # A new entry starts on its own line instead of being glued to the torn one
+    asyncio.run(journal.append(make_order(2)))
+    reopened = OrderJournal(str(path), database)
+    assert [order.user_id for order in reopened.pending()] == [3001, 3002]
+
+    async def on_saved(order):
+        pass
+
+    assert asyncio.run(reopened.replay(on_saved)) == 2
+    assert path.read_text(encoding="utf-8") == ""
+    assert (tmp_path / "orders.jsonl.rejected").read_text(encoding="utf-8") == '{"idempotency_key": "torn", "user_\n'
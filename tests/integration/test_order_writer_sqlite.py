@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from src.domain.entities.order import Order, OrderItem
+from src.infrastructure.database.order_writer import OrderBatchWriter
+from src.infrastructure.database.repositories.order_repository import SQLAlchemyOrderRepository
+
+
+class CountingSessions:
+    """
+    Wraps the session factory to count the transactions the writer opens.
+    """
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return self.session_factory()
+
+
+def make_order(number: int, key: str | None = None) -> Order:
+    pickup_time = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(minutes=30)
+    return Order(
+        user_id=2000 + number, shop_id=1, address="ул. Ленина, 1", quantity=1, pickup_time=pickup_time,
+        total_price=260, items=[OrderItem("Латте", "350мл", 1, 260)], idempotency_key=key or f"{number:032d}",
+    )
+
+
+def test_concurrent_orders_share_one_commit(database):
+    sessions = CountingSessions(database)
+    orders = [make_order(number) for number in range(5)]
+
+    async def confirm_all():
+        writer = OrderBatchWriter(sessions, max_batch=50, max_delay=0.05)
+        await asyncio.gather(*(writer.add(order) for order in orders))
+
+    asyncio.run(confirm_all())
+    assert sessions.opened == 1
+    assert all(order.id for order in orders) and len({order.id for order in orders}) == 5
+
+
+def test_a_full_batch_is_written_without_waiting(database):
+    sessions = CountingSessions(database)
+    orders = [make_order(number) for number in range(5)]
+
+    async def confirm_all():
+        # With a long delay only the size limit can flush the first batches in time
+        writer = OrderBatchWriter(sessions, max_batch=2, max_delay=10)
+        adds = [asyncio.create_task(writer.add(order)) for order in orders]
+        await asyncio.wait(adds[:4], timeout=5)
+        assert all(add.done() for add in adds[:4]) and not adds[4].done()
+        await writer.close()
+        await asyncio.gather(*adds)
+
+    asyncio.run(confirm_all())
+    assert sessions.opened == 3
+    assert all(order.id for order in orders)
+
+
+def test_one_bad_order_does_not_fail_its_batch(database):
+    replayed = make_order(0, key="r" * 32)
+
+    async def confirm():
+        writer = OrderBatchWriter(database, max_batch=50, max_delay=0.05)
+        await writer.add(replayed)
+        batch = [make_order(1), make_order(2, key="r" * 32), make_order(3)]
+        results = await asyncio.gather(*(writer.add(order) for order in batch), return_exceptions=True)
+        async with database() as session:
+            stored = await SQLAlchemyOrderRepository(session).get_active_orders()
+        return batch, results, stored
+
+    batch, results, stored = asyncio.run(confirm())
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], IntegrityError) and batch[1].id is None
+    assert sorted(order.id for order in stored) == sorted([replayed.id, batch[0].id, batch[2].id])
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from src.application.active_orders import ActiveOrderIndex
+from src.domain.entities.order import Order, OrderStatus
+
+NOW = datetime(2025, 12, 11, 6, 0, tzinfo=timezone.utc)
+
+
+def make_order(order_id: int, minutes: int, shop_id: int = 1, status: OrderStatus = OrderStatus.PENDING) -> Order:
+    return Order(id=order_id, user_id=1000 + order_id, shop_id=shop_id, address="ул. Ленина, 1", quantity=1,
+                 pickup_time=NOW + timedelta(minutes=minutes), total_price=200, status=status)
+
+
+def test_orders_are_kept_per_shop_by_pickup_time():
+    index = ActiveOrderIndex()
+    index.load([make_order(1, 30), make_order(2, 10), make_order(3, 20, shop_id=2)])
+    index.upsert(make_order(4, 5))
+    assert [order.id for order in index.for_shop(1)] == [4, 2, 1]
+    assert [order.id for order in index.for_shop(2)] == [3]
+    assert [order.id for order in index.all()] == [4, 2, 3, 1]
+    assert len(index) == 4
+
+
+def test_due_and_overdue_windows():
+    index = ActiveOrderIndex()
+    index.load([make_order(1, -10), make_order(2, 0), make_order(3, 15), make_order(4, 40)])
+    assert [order.id for order in index.overdue(1, NOW)] == [1]
+    assert [order.id for order in index.due(1, NOW, NOW + timedelta(minutes=30))] == [2, 3]
+
+
+def test_finished_orders_are_removed_and_listeners_told():
+    index = ActiveOrderIndex()
+    changes = []
+    index.subscribe(changes.append)
+    index.upsert(make_order(1, 10))
+    index.upsert(make_order(2, 20, shop_id=2))
+    # A status change keeps the order; completing or cancelling it drops it
+    index.upsert(make_order(1, 10, status=OrderStatus.READY))
+    assert index.get(1).status == OrderStatus.READY
+    index.upsert(make_order(1, 10, status=OrderStatus.COMPLETED))
+    index.remove(2)
+    index.remove(2)  # Unknown IDs are ignored
+    assert index.get(1) is None and index.get(2) is None and len(index) == 0
+    assert changes == [1, 2, 1, 1, 2]
+
+
+def test_a_moved_pickup_time_reorders_the_shop():
+    index = ActiveOrderIndex()
+    index.load([make_order(1, 10), make_order(2, 20)])
+    index.upsert(make_order(1, 30))
+    assert [order.id for order in index.for_shop(1)] == [2, 1]
+
+
+def test_reconcile_fixes_drift_but_keeps_changes_made_meanwhile():
+    index = ActiveOrderIndex()
+    index.load([make_order(1, 10), make_order(2, 20)])
+
+    async def load_active():
+        # While the query runs, order 3 is created and order 2 completed through the service
+        index.upsert(make_order(3, 30))
+        index.remove(2)
+        # The database still has order 2 and never had order 1, which was closed by hand
+        return [make_order(2, 20), make_order(4, 40)]
+
+    drifted = asyncio.run(index.reconcile(load_active))
+    assert drifted == 2
+    assert [order.id for order in index.for_shop(1)] == [3, 4]
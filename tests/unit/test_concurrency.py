@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.api.middlewares.concurrency import ConcurrencyMiddleware
+
+
+class FakeCallback:
+    def __init__(self):
+        self.answers = []
+
+    async def answer(self, text: str):
+        self.answers.append(text)
+
+
+def callback() -> SimpleNamespace:
+    return SimpleNamespace(callback_query=FakeCallback(), message=None)
+
+
+def message() -> SimpleNamespace:
+    return SimpleNamespace(callback_query=None, message=object())
+
+
+def user(user_id: int) -> dict:
+    return {"event_from_user": SimpleNamespace(id=user_id)}
+
+
+def blocking_handler(release: asyncio.Event, log: list):
+    async def handler(event, data):
+        log.append(data["event_from_user"].id)
+        await release.wait()
+        return "handled"
+    return handler
+
+
+def test_callback_waiting_for_its_users_lock_is_rejected_after_max_wait():
+    async def scenario():
+        middleware = ConcurrencyMiddleware(max_in_flight=5, max_wait=0.05)
+        release, log = asyncio.Event(), []
+        handler = blocking_handler(release, log)
+        first = asyncio.create_task(middleware(handler, callback(), user(1)))
+        await asyncio.sleep(0.01)
+        second_event = callback()
+        second = await middleware(handler, second_event, user(1))
+        release.set()
+        return await first, second, second_event, log, middleware
+
+    first, second, second_event, log, middleware = asyncio.run(scenario())
+    assert first == "handled"
+    assert second is None and len(second_event.callback_query.answers) == 1
+    assert log == [1]
+    # Nothing is left behind by the rejected update
+    assert middleware._user_locks == {} and middleware._waiting == 0 and middleware._in_flight == 0
+
+
+def test_callback_waiting_for_a_global_slot_is_rejected_after_max_wait():
+    async def scenario():
+        middleware = ConcurrencyMiddleware(max_in_flight=1, max_wait=0.05)
+        release, log = asyncio.Event(), []
+        handler = blocking_handler(release, log)
+        first = asyncio.create_task(middleware(handler, callback(), user(1)))
+        await asyncio.sleep(0.01)
+        second = await middleware(handler, callback(), user(2))
+        release.set()
+        return await first, second, log
+
+    first, second, log = asyncio.run(scenario())
+    assert (first, second, log) == ("handled", None, [1])
+
+
+def test_messages_wait_instead_of_being_rejected():
+    async def scenario():
+        middleware = ConcurrencyMiddleware(max_in_flight=5, max_wait=0.01)
+        release, log = asyncio.Event(), []
+        handler = blocking_handler(release, log)
+        first = asyncio.create_task(middleware(handler, message(), user(1)))
+        second = asyncio.create_task(middleware(handler, message(), user(1)))
+        await asyncio.sleep(0.05)
+        assert log == [1]  # The user's second message waits for the first one
+        release.set()
+        return await asyncio.gather(first, second), log
+
+    results, log = asyncio.run(scenario())
+    assert results == ["handled", "handled"] and log == [1, 1]
+
+
+def test_callbacks_are_rejected_at_once_when_too_many_are_waiting():
+    async def scenario():
+        middleware = ConcurrencyMiddleware(max_in_flight=1, max_waiting=1, max_wait=5)
+        release, log = asyncio.Event(), []
+        handler = blocking_handler(release, log)
+        running = asyncio.create_task(middleware(handler, callback(), user(1)))
+        await asyncio.sleep(0.01)
+        waiting = asyncio.create_task(middleware(handler, callback(), user(2)))
+        await asyncio.sleep(0.01)
+        rejected = await middleware(handler, callback(), user(3))
+        release.set()
+        return rejected, await asyncio.gather(running, waiting)
+
+    rejected, results = asyncio.run(scenario())
+    assert rejected is None and results == ["handled", "handled"]
@@ -0,0 +1,24 @@
+from src.application.services.idempotency_service import IdempotencyGuard
+
+
+def test_a_token_is_claimed_once():
+    guard = IdempotencyGuard()
+    token = guard.new_token()
+    assert guard.claim(token)
+    assert not guard.claim(token)
+    assert guard.claim(guard.new_token())
+
+
+def test_a_released_token_can_be_claimed_again():
+    guard = IdempotencyGuard()
+    token = guard.new_token()
+    assert guard.claim(token)
+    guard.release(token)
+    assert guard.claim(token)
+    # Releasing an unknown token is harmless
+    guard.release("unknown")
+
+
+def test_new_tokens_are_unique():
+    guard = IdempotencyGuard()
+    assert len({guard.new_token() for _ in range(1000)}) == 1000
@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+from src.infrastructure.database.repositories.option_repository import InMemoryOptionRepository
+from src.infrastructure.database.repositories.overlay import Overlay
+from src.infrastructure.database.repositories.product_repository import InMemoryProductRepository
+
+OVERRIDES = {
+    "2": {
+        "products": {
+            "6": None,
+            "3": {"volumes": [{"volume": "250мл", "price": 180}]},
+            "50": {"name": "Матча", "volumes": [{"volume": "350мл", "price": 250}]},
+        },
+        "options": {"102": {"price": 40}, "1": None},
+    }
+}
+
+
+@pytest.fixture
+def overrides_path(tmp_path):
+    path = tmp_path / "shop_menus.json"
+    path.write_text(json.dumps(OVERRIDES), encoding="utf-8")
+    return str(path)
+
+
+def test_overlay_replaces_adds_and_removes_keys_in_base_order():
+    overlay = Overlay({1: "a", 2: "b", 3: "c"}, {2: None, 3: "C", 4: "d"})
+    assert list(overlay.items()) == [(1, "a"), (3, "C"), (4, "d")]
+    assert len(overlay) == 3
+    assert 2 not in overlay and overlay.get(2) is None
+    with pytest.raises(KeyError):
+        overlay[2]
+
+
+def test_shop_products_and_prices_merge_over_the_base_menu(overrides_path):
+    repository = InMemoryProductRepository(file_path="data/menu.json", overrides_path=overrides_path)
+
+    async def read():
+        return (
+            [product.id for product in await repository.get_all(2)],
+            [product.id for product in await repository.get_all(1)],
+            await repository.get_by_id(3, 2),
+            await repository.get_by_id(6, 2),
+            [await repository.get_price(3, volume, shop_id) for volume in ("250мл", "350мл") for shop_id in (2, None)],
+            await repository.get_price(50, "350мл", 2),
+        )
+
+    shop_menu, other_menu, cappuccino, removed, cappuccino_prices, matcha_price = asyncio.run(read())
+    assert shop_menu == [1, 2, 3, 4, 5, 50]
+    assert other_menu == [1, 2, 3, 4, 5, 6]
+    # Fields that are not overridden come from the base product
+    assert cappuccino.name == "Капучино" and [volume.volume for volume in cappuccino.volumes] == ["250мл"]
+    assert removed is None
+    # The 350 ml cappuccino is gone from the shop's price table, the base keeps it
+    assert cappuccino_prices == [180, 170, None, 210]
+    assert matcha_price == 250
+
+
+def test_shop_options_merge_over_the_base_ones(overrides_path):
+    repository = InMemoryOptionRepository(file_path="data/options.json", overrides_path=overrides_path)
+
+    async def read():
+        return (
+            [option.id for option in await repository.get_all_by_category("milk", 2)],
+            await repository.get_by_id(102, 2),
+            await repository.get_by_id(102),
+        )
+
+    milk, shop_syrup, base_syrup = asyncio.run(read())
+    assert 1 not in milk and milk
+    assert shop_syrup.price == 40 and shop_syrup.name == base_syrup.name and base_syrup.price == 30
+
+
+def test_without_an_overrides_file_every_shop_sells_the_base_menu(tmp_path):
+    repository = InMemoryProductRepository(file_path="data/menu.json", overrides_path=str(tmp_path / "missing.json"))
+    assert [product.id for product in asyncio.run(repository.get_all(2))] == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,55 @@
+from src.application.menu_search import MenuSearchIndex, tokenize
+from src.application.metrics import metrics
+from src.domain.entities.option import Option
+from src.domain.entities.product import Product, Volume
+from src.domain.entities.stop_list import OPTION, PRODUCT
+
+PRODUCTS = [
+    Product(1, "Капучино", [Volume("250мл", 180)]),
+    Product(2, "Латте", [Volume("350мл", 200)]),
+    Product(3, "Раф ванильный", [Volume("350мл", 240)]),
+    Product(4, "Латте ёлочный", [Volume("350мл", 260)]),
+]
+OPTIONS = [
+    Option(101, "Овсяное", 50, "milk"),
+    Option(201, "Ванильный сироп", 40, "syrups"),
+]
+
+
+def names(results) -> list:
+    return [item.name for _, item in results]
+
+
+def test_tokenize_lowercases_and_folds_yo():
+    assert tokenize("Латте Ёлочный, 350мл") == ["латте", "елочный", "350мл"]
+
+
+def test_any_word_prefix_matches_in_menu_order():
+    index = MenuSearchIndex(PRODUCTS, OPTIONS)
+    assert names(index.search("ван")) == ["Раф ванильный", "Ванильный сироп"]
+    assert [kind for kind, _ in index.search("ван")] == [PRODUCT, OPTION]
+    assert names(index.search("ЛАТ")) == ["Латте", "Латте ёлочный"]
+
+
+def test_every_query_word_must_match():
+    index = MenuSearchIndex(PRODUCTS, OPTIONS)
+    assert names(index.search("лат ел")) == ["Латте ёлочный"]
+    assert names(index.search("латте ёлк")) == []
+    assert index.search("эспрессо") == []
+
+
+def test_empty_query_lists_drinks_and_limit_applies():
+    index = MenuSearchIndex(PRODUCTS, OPTIONS)
+    assert names(index.search("")) == [product.name for product in PRODUCTS]
+    assert names(index.search("  ", limit=2)) == ["Капучино", "Латте"]
+    assert len(index.search("в", limit=1)) == 1
+
+
+def test_repeated_queries_are_served_from_the_cache():
+    index = MenuSearchIndex(PRODUCTS, OPTIONS)
+    first = index.search("Лат")
+    hits = metrics.counters.get("menu_search_cache_hits_total", 0)
+    assert index.search("лат ") == first
+    # A cached query still honours a smaller limit
+    assert names(index.search("лат", limit=1)) == ["Латте"]
+    assert metrics.counters["menu_search_cache_hits_total"] == hits + 2
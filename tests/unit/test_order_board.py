@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from src.application.active_orders import ActiveOrderIndex
+from src.application.services.board_service import OrderBoard
+from src.application.shops import ShopRegistry
+from src.domain.entities.order import Order, OrderItem
+
+NOW = datetime(2025, 12, 11, 6, 0, tzinfo=timezone.utc)
+SHOPS = ShopRegistry.from_config([{"id": 1, "address": "ул. Ленина, 1", "admin_id": 500}])
+
+
+class FakeBot:
+    def __init__(self):
+        self.posts = 0
+        self.edits = []
+        self.send_gate = asyncio.Event()
+        self.send_gate.set()
+        self.flood = False
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        self.posts += 1
+        await self.send_gate.wait()
+        return SimpleNamespace(message_id=100 + self.posts)
+
+    async def pin_chat_message(self, **kwargs):
+        pass
+
+    async def edit_message_text(self, text, **kwargs):
+        if self.flood:
+            self.flood = False
+            raise TelegramRetryAfter(method=None, message="Flood control", retry_after=10)
+        self.edits.append(text)
+
+
+class FakeTimers:
+    """
+    Collects the scheduled jobs instead of running them, so a test fires them one by one.
+    """
+    def __init__(self):
+        self.now = NOW
+        self.jobs = {}
+
+    def clock(self) -> datetime:
+        return self.now
+
+    def schedule(self, key, fire_at, job):
+        self.jobs[key] = (fire_at, job)
+
+    def cancel(self, key):
+        self.jobs.pop(key, None)
+
+    def fire_at(self) -> datetime:
+        return self.jobs[("order_board", 1)][0]
+
+    def fire(self):
+        fire_at, job = self.jobs.pop(("order_board", 1))
+        self.now = max(self.now, fire_at)
+        return job()
+
+
+def make_order(order_id: int) -> Order:
+    return Order(id=order_id, user_id=1000 + order_id, shop_id=1, address="ул. Ленина, 1", quantity=1,
+                 pickup_time=NOW + timedelta(minutes=order_id), total_price=200, items=[OrderItem("Латте", "350мл", 1, 200)])
+
+
+def make_board():
+    bot, timers, index = FakeBot(), FakeTimers(), ActiveOrderIndex()
+    board = OrderBoard(bot, SHOPS, timers, index, min_interval=timedelta(seconds=3))
+    return board, bot, timers, index
+
+
+def test_a_burst_of_changes_is_one_edit_after_min_interval():
+    async def scenario():
+        board, bot, timers, index = make_board()
+        board.start()
+        await timers.fire()
+        assert bot.posts == 1 and not timers.jobs
+
+        timers.now += timedelta(seconds=1)
+        for order_id in range(1, 6):
+            index.upsert(make_order(order_id))
+        assert timers.fire_at() == NOW + timedelta(seconds=3)
+        await timers.fire()
+        assert len(bot.edits) == 1 and "#5" in bot.edits[0]
+
+        # A change that does not alter the text is never sent
+        index.upsert(make_order(5))
+        await timers.fire()
+        assert len(bot.edits) == 1
+
+    asyncio.run(scenario())
+
+
+def test_changes_during_a_send_are_rendered_once_it_is_done():
+    async def scenario():
+        board, bot, timers, index = make_board()
+        bot.send_gate.clear()
+        board.start()
+        posting = asyncio.create_task(timers.fire())
+        await asyncio.sleep(0)
+        # The post is in flight: the change only marks the board dirty
+        index.upsert(make_order(1))
+        assert not timers.jobs
+        bot.send_gate.set()
+        await posting
+        assert bot.posts == 1 and board._messages[1] == 101
+        # Re-armed after the post, no earlier than min_interval after it
+        assert timers.fire_at() == NOW + timedelta(seconds=3)
+        await timers.fire()
+        assert bot.posts == 1 and len(bot.edits) == 1 and "#1" in bot.edits[0]
+
+    asyncio.run(scenario())
+
+
+def test_flood_control_retries_after_the_given_delay():
+    async def scenario():
+        board, bot, timers, index = make_board()
+        board.start()
+        await timers.fire()
+        timers.now += timedelta(seconds=5)
+        index.upsert(make_order(1))
+        bot.flood = True
+        await timers.fire()
+        assert timers.fire_at() == timers.now + timedelta(seconds=10)
+        # Changes until then join the retry
+        index.upsert(make_order(2))
+        await timers.fire()
+        assert len(bot.edits) == 1 and "#2" in bot.edits[0]
+        assert not timers.jobs
+
+    asyncio.run(scenario())
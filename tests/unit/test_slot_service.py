@@ -0,0 +1,67 @@
+import multiprocessing as mp
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from src.application.services.slot_service import PickupSlotScheduler, SharedSlotCounters
+
+PICKUP = datetime(2025, 12, 11, 9, 30, tzinfo=ZoneInfo("Europe/Moscow"))
+
+
+def make_workers(workers: int, capacity: int = 6, store=None, lock=None):
+    store = {} if store is None else store
+    lock = lock or threading.Lock()
+    return [
+        PickupSlotScheduler(default_capacity=capacity, counters=SharedSlotCounters(store, lock, index, workers))
+        for index in range(workers)
+    ]
+
+
+def test_reserve_and_release_in_one_process():
+    scheduler = PickupSlotScheduler(default_capacity=6)
+    assert scheduler.reserve(1, PICKUP, 4)
+    assert not scheduler.reserve(1, PICKUP + timedelta(minutes=5), 3)
+    scheduler.release(1, PICKUP, 4)
+    assert scheduler.reserve(1, PICKUP, 6)
+    assert scheduler.suggest_slot(1, PICKUP, 1) == PICKUP + timedelta(minutes=10)
+
+
+def test_every_worker_can_book_when_there_are_more_workers_than_capacity():
+    workers = make_workers(8, capacity=6)
+    assert workers[7].reserve(1, PICKUP, 1)
+    assert workers[6].reserve(1, PICKUP, 5)
+    # The whole capacity is counted once, whichever workers booked it
+    assert all(worker.used(1, PICKUP) == 6 for worker in workers)
+    assert not workers[0].reserve(1, PICKUP, 1)
+    workers[6].release(1, PICKUP, 5)
+    assert workers[0].reserve(1, PICKUP, 5)
+
+
+def test_a_cart_bigger_than_an_even_split_fits():
+    workers = make_workers(4, capacity=6)
+    assert workers[3].reserve(1, PICKUP, 3)
+    assert workers[2].reserve(1, PICKUP, 3)
+    assert not workers[1].reserve(1, PICKUP, 1)
+
+
+def test_a_worker_only_releases_and_reloads_its_own_reservations():
+    workers = make_workers(2, capacity=6)
+    assert workers[0].reserve(1, PICKUP, 2)
+    assert workers[1].reserve(1, PICKUP, 3)
+    workers[0].release(1, PICKUP, 5)
+    assert workers[1].used(1, PICKUP) == 3
+    # A restarted worker rebuilds its own reservations without dropping the other worker's
+    workers[1].load([])
+    assert workers[1].used(1, PICKUP) == 0
+    assert workers[0].reserve(1, PICKUP, 4)
+    workers[1].prune(PICKUP + timedelta(minutes=10))
+    assert workers[0].used(1, PICKUP) == 0
+
+
+def test_counters_work_through_a_manager_dict():
+    context = mp.get_context("spawn")
+    with context.Manager() as manager:
+        workers = make_workers(2, capacity=6, store=manager.dict(), lock=context.Lock())
+        assert workers[0].reserve(1, PICKUP, 4)
+        assert not workers[1].reserve(1, PICKUP, 3)
+        assert workers[1].reserve(1, PICKUP, 2)
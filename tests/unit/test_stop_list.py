@@ -0,0 +1,58 @@
+import asyncio
+from typing import List
+
+from src.application.cart import CartLine
+from src.application.services.stop_list_service import StopListService
+from src.application.stop_list import StopList
+from src.domain.entities.stop_list import OPTION, PRODUCT, StopListItem
+from src.domain.repositories.stop_list_repository import AbstractStopListRepository
+
+
+class InMemoryStopListRepository(AbstractStopListRepository):
+    def __init__(self):
+        self.items = set()
+
+    async def get_all(self) -> List[StopListItem]:
+        return list(self.items)
+
+    async def add(self, item: StopListItem) -> None:
+        self.items.add(item)
+
+    async def remove(self, item: StopListItem) -> None:
+        self.items.discard(item)
+
+
+def test_toggle_stops_and_returns_an_item_in_the_store_and_in_memory():
+    stop_list, repository = StopList(), InMemoryStopListRepository()
+    service = StopListService(None, stop_list, stop_list_repository=repository)
+
+    assert asyncio.run(service.toggle(1, PRODUCT, 3)) is True
+    assert not stop_list.is_available(1, PRODUCT, 3)
+    assert repository.items == {StopListItem(1, PRODUCT, 3)}
+    # Only that shop and that kind of item
+    assert stop_list.is_available(2, PRODUCT, 3) and stop_list.is_available(1, OPTION, 3)
+
+    assert asyncio.run(service.toggle(1, PRODUCT, 3)) is False
+    assert stop_list.is_available(1, PRODUCT, 3) and not repository.items
+
+
+def test_another_worker_picks_up_toggles_on_reload():
+    repository = InMemoryStopListRepository()
+    handling, other = StopList(), StopList()
+    asyncio.run(StopListService(None, handling, stop_list_repository=repository).toggle(1, OPTION, 7))
+    assert other.is_available(1, OPTION, 7)
+    other.load(asyncio.run(repository.get_all()))
+    assert not other.is_available(1, OPTION, 7)
+
+
+def test_cart_lines_with_a_stopped_drink_milk_or_syrup_are_unavailable():
+    stop_list = StopList()
+    stop_list.load([StopListItem(1, PRODUCT, 2), StopListItem(1, OPTION, 5), StopListItem(1, OPTION, 9)])
+    cart = [
+        CartLine(2, "350мл", None, None, 1),  # Stopped drink
+        CartLine(3, "350мл", 5, None, 1),  # Stopped milk
+        CartLine(3, "350мл", None, 9, 1),  # Stopped syrup
+        CartLine(3, "250мл", 6, 8, 2),
+    ]
+    assert stop_list.unavailable_lines(1, cart) == cart[:3]
+    assert stop_list.unavailable_lines(2, cart) == []
@@ -0,0 +1,47 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.application.templates import ITEM_TEMPLATE, Markup, Template, item_options, paginate
+
+
+def test_values_are_escaped_and_markup_is_kept():
+    template = Template("<b>{name}</b>: {note}")
+    rendered = template.render(name="Раф <i>& Ко</i>", note=Markup("<i>свой</i>"))
+    assert rendered == "<b>Раф &lt;i&gt;&amp; Ко&lt;/i&gt;</b>: <i>свой</i>"
+    assert isinstance(rendered, Markup)
+    # A rendered template nests into another one without being escaped twice
+    assert Template("{inner}!").render(inner=rendered) == rendered + "!"
+
+
+def test_attribute_paths_and_format_specs():
+    order = SimpleNamespace(id=7, pickup_time=datetime(2025, 12, 11, 9, 5), total_price=1234.5)
+    template = Template("#{order.id} к {order.pickup_time:%H:%M} — {order.total_price:.0f} ₽")
+    assert template.render(order=order) == "#7 к 09:05 — 1234 ₽"
+
+
+def test_item_template():
+    item = SimpleNamespace(product_name="Латте", volume="350мл", milk_name="Овсяное", syrup_name=None, quantity=2)
+    assert ITEM_TEMPLATE.render(item=item, options=item_options(item)) == "Латте (350мл), Овсяное × 2"
+
+
+@pytest.mark.parametrize("source", ["{}", "{0}", "{items[0]}", "{name!r}", "{value:{width}}"])
+def test_unsupported_fields_are_rejected(source):
+    with pytest.raises(ValueError):
+        Template(source)
+
+
+def test_paginate_breaks_only_between_records():
+    records = ["<b>a</b>\n" * 3, "<b>b</b>\n" * 3, "<b>c</b>\n" * 3]  # 27 characters each
+    pages = paginate(records, header="H\n", limit=60)
+    assert pages == ["H\n" + records[0] + records[1], records[2]]
+    assert all(len(page) <= 60 for page in pages)
+    assert paginate([]) == [] and paginate([], header="H") == ["H"]
+
+
+def test_paginate_splits_a_long_record_at_lines():
+    record = "".join(f"<i>{n}</i>\n" for n in range(10))  # 9 characters per line
+    pages = paginate([record], limit=20)
+    assert "".join(pages) == record
+    assert all(len(page) <= 20 and page.endswith("</i>\n") for page in pages)
@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.api.middlewares.throttling import Rate, ThrottlingMiddleware
+
+USER = SimpleNamespace(id=42)
+
+
+class FakeCallback:
+    def __init__(self, data: str):
+        self.data = data
+        self.answers = []
+
+    async def answer(self, text: str):
+        self.answers.append(text)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def handler(event, data):
+    return "handled"
+
+
+def callback(data: str = "add_to_cart") -> SimpleNamespace:
+    return SimpleNamespace(callback_query=FakeCallback(data), message=None)
+
+
+def send(middleware: ThrottlingMiddleware, event, user=USER):
+    return asyncio.run(middleware(handler, event, {"event_from_user": user}))
+
+
+def make_middleware(clock: Clock) -> ThrottlingMiddleware:
+    rates = {"confirm_order": Rate(burst=1, per_second=0.5), "callback_query": Rate(burst=3, per_second=1)}
+    return ThrottlingMiddleware(rates=rates, clock=clock)
+
+
+def test_burst_is_allowed_and_the_rest_is_answered_with_a_toast():
+    middleware = make_middleware(Clock())
+    assert [send(middleware, callback()) for _ in range(3)] == ["handled"] * 3
+    event = callback()
+    assert send(middleware, event) is None
+    assert len(event.callback_query.answers) == 1
+
+
+def test_bucket_refills_with_time():
+    clock = Clock()
+    middleware = make_middleware(clock)
+    for _ in range(3):
+        send(middleware, callback())
+    assert send(middleware, callback()) is None
+    clock.now = 1.0
+    assert send(middleware, callback()) == "handled"
+    assert send(middleware, callback()) is None
+    # Never above the burst, however long the user was idle
+    clock.now = 30.0
+    assert [send(middleware, callback()) for _ in range(4)] == ["handled"] * 3 + [None]
+
+
+def test_rates_are_per_user_and_per_handler_class():
+    middleware = make_middleware(Clock())
+    assert send(middleware, callback("confirm_order")) == "handled"
+    assert send(middleware, callback("confirm_order")) is None
+    # Other buttons of the same user and the same button of another user have their own buckets
+    assert send(middleware, callback("add_to_cart")) == "handled"
+    assert send(middleware, callback("confirm_order"), user=SimpleNamespace(id=7)) == "handled"
+
+
+def test_updates_without_a_user_or_rate_pass():
+    middleware = make_middleware(Clock())
+    inline_query = SimpleNamespace(callback_query=None, message=None)
+    assert [send(middleware, inline_query) for _ in range(10)] == ["handled"] * 10
+    assert [send(middleware, callback(), user=None) for _ in range(10)] == ["handled"] * 10
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.application.time_utils import PickupTimeParser
+
+# 09:00 in Moscow
+NOW = datetime(2025, 12, 11, 6, 0, tzinfo=timezone.utc)
+
+
+def make_parser(now: datetime = NOW) -> PickupTimeParser:
+    return PickupTimeParser("Europe/Moscow", clock=lambda: now)
+
+
+def local(hour: int, minute: int = 0, now: datetime = NOW) -> datetime:
+    return make_parser(now).now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("к 09:40", (9, 40)),
+    ("в 9.40", (9, 40)),
+    ("9-40", (9, 40)),
+    ("к 10", (10, 0)),
+    ("к 10 часам", (10, 0)),
+    ("полодиннадцатого", (10, 30)),
+    ("К 18:05", (18, 5)),
+])
+def test_clock_times(text, expected):
+    assert make_parser().parse(text) == local(*expected)
+
+
+@pytest.mark.parametrize("text, minutes", [
+    ("через 10 минут", 10),
+    ("через полчаса", 30),
+    ("через четверть часа", 15),
+    ("через пятнадцать минут", 15),
+    ("через 2 часа", 120),
+    ("через час", 60),
+    ("через полтора часа", 90),
+])
+def test_relative_times(text, minutes):
+    assert make_parser().parse(text) == local(9) + timedelta(minutes=minutes)
+
+
+def test_relative_time_is_rounded_up_to_a_whole_minute():
+    parser = make_parser(NOW + timedelta(seconds=20))
+    pickup_time = parser.parse("через 10 минут")
+    assert pickup_time == local(9, 11)
+    assert parser.is_valid(pickup_time)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("к 08:40", (8, 40)),
+    ("в 8.40", (8, 40)),
+    ("8-40", (8, 40)),
+    ("полвосьмого", (7, 30)),
+    ("к 08", (8, 0)),
+])
+def test_past_times_are_kept_and_rejected(text, expected):
+    parser = make_parser()
+    pickup_time = parser.parse(text)
+    assert pickup_time == local(*expected)
+    assert not parser.is_valid(pickup_time)
+
+
+def test_bare_hour_after_it_passed_means_the_evening():
+    assert make_parser().parse("в 8") == local(20)
+    # Not once it is more than 12 hours ago
+    late = datetime(2025, 12, 11, 18, 0, tzinfo=timezone.utc)  # 21:00 in Moscow
+    assert make_parser(late).parse("к 8") == local(8, now=late)
+
+
+def test_number_that_is_not_a_time_of_day_is_rejected():
+    parser = make_parser()
+    pickup_time = parser.parse("цена 3.50")
+    assert pickup_time == local(3, 50)
+    assert not parser.is_valid(pickup_time)
+
+
+@pytest.mark.parametrize("text", ["", "Спасибо, а можно без сахара?", "к 25", "в 9:75"])
+def test_not_a_pickup_time(text):
+    assert make_parser().parse(text) is None
+
+
+def test_too_soon_is_invalid_and_earliest_passes():
+    parser = make_parser()
+    assert not parser.is_valid(parser.parse("через 5 минут"))
+    assert parser.earliest() == local(9, 10)
+    assert parser.is_valid(parser.earliest())